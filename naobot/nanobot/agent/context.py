@@ -37,12 +37,66 @@ NanoBot Context Builder - 上下文构建器模块
 
 import base64
 import mimetypes
+import os
 import platform
+import stat
+from datetime import datetime
 from pathlib import Path
 from typing import Any
 
 from nanobot.agent.memory import MemoryStore
 from nanobot.agent.skills import SkillsLoader
+from nanobot.utils.helpers import today_date
+
+# 可选依赖：pybase64 提供 SIMD（AVX2/NEON）加速的 base64 编码
+# 未安装时回退到标准库 base64
+try:
+    import pybase64
+
+    def _b64encode_str(data: bytes) -> str:
+        return pybase64.b64encode_as_string(data)
+except ImportError:
+    def _b64encode_str(data: bytes) -> str:
+        return base64.b64encode(data).decode()
+
+
+# 当前用户消息开头附带的时间标记（见 ContextBuilder.build_messages）
+_TIME_TAG_PREFIX = "[Current time: "
+_TIME_TAG_END = "]\n\n"
+
+
+def strip_current_time(content: str) -> str:
+    """
+    去掉 build_messages 加在用户消息开头的时间标记
+    
+    参数:
+        content: str，用户消息内容
+    
+    返回:
+        str，不含时间标记的消息内容（没有标记时原样返回）
+    """
+    if content.startswith(_TIME_TAG_PREFIX):
+        end = content.find(_TIME_TAG_END)
+        if end != -1:
+            return content[end + len(_TIME_TAG_END):]
+    return content
+
+
+def _stat_key(path: str | Path) -> tuple[int, int] | None:
+    """
+    获取文件的 (mtime_ns, size) 作为缓存键
+    
+    参数:
+        path: str | Path，要检查的文件或目录
+    
+    返回:
+        tuple[int, int] | None，文件不存在时返回 None
+    """
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
 
 
 class ContextBuilder:
@@ -86,10 +140,18 @@ class ContextBuilder:
         初始化组件:
             - memory: MemoryStore，记忆存储
             - skills: SkillsLoader，技能加载器
+            - _memory_cache: 记忆上下文缓存（按 MEMORY.md 和今日笔记的 mtime/size 失效）
+            - _identity: 预生成的身份信息（不含当前时间，跨轮次保持不变）
+            - _static_prefix: 上一次构建的 system 消息（内容不变时复用同一对象）
         """
         self.workspace = workspace
+        self._workspace_str = os.fspath(workspace)
+        self._memory_dir_str = os.path.join(self._workspace_str, "memory")
         self.memory = MemoryStore(workspace)
         self.skills = SkillsLoader(workspace)
+        self._memory_cache: tuple[tuple, str] | None = None
+        self._identity = self._build_identity()
+        self._static_prefix: dict[str, Any] | None = None
     
     def build_system_prompt(self, skill_names: list[str] | None = None) -> str:
         """
@@ -122,7 +184,8 @@ class ContextBuilder:
         # ====================================================================
         # 1. 核心身份信息
         # ====================================================================
-        # 包括 Agent 的名称、当前时间、运行环境、工作空间路径等
+        # 包括 Agent 的名称、运行环境、工作空间路径等
+        # （当前时间随每轮的用户消息发送，见 build_messages）
         parts.append(self._get_identity())
         
         # ====================================================================
@@ -136,8 +199,8 @@ class ContextBuilder:
         # ====================================================================
         # 3. 记忆上下文
         # ====================================================================
-        # 从 MemoryStore 获取长期记忆中的相关信息
-        memory = self.memory.get_memory_context()
+        # 从 MemoryStore 获取长期记忆中的相关信息（文件未变化时复用缓存）
+        memory = self._get_memory_context()
         if memory:
             parts.append(f"# Memory\n\n{memory}")
         
@@ -145,17 +208,14 @@ class ContextBuilder:
         # 4. 始终加载的技能（完整内容）
         # ====================================================================
         # 这些技能会一直包含在系统提示词中
-        always_skills = self.skills.get_always_skills()
-        if always_skills:
-            always_content = self.skills.load_skills_for_context(always_skills)
-            if always_content:
-                parts.append(f"# Active Skills\n\n{always_content}")
+        always_content, skills_summary = self._get_skills_sections()
+        if always_content:
+            parts.append(f"# Active Skills\n\n{always_content}")
         
         # ====================================================================
         # 5. 可用技能摘要（仅标题）
         # ====================================================================
         # 其他技能只显示摘要，Agent 可以使用 read_file 工具按需读取
-        skills_summary = self.skills.build_skills_summary()
         if skills_summary:
             skills_section = f"""# Skills
 
@@ -168,6 +228,49 @@ Skills with available="false" need dependencies installed first - you can try in
         # 使用分隔符连接各个部分
         return "\n\n---\n\n".join(parts)
     
+    def _get_memory_context(self) -> str:
+        """
+        获取记忆上下文（带 mtime 缓存）
+        
+        缓存键:
+            memory/MEMORY.md 和 memory/YYYY-MM-DD.md（今天）的 (mtime_ns, size)
+            以及今天的日期（跨天时自动失效）
+        
+        返回:
+            str，与 MemoryStore.get_memory_context() 相同的内容
+        """
+        memory_dir = self._memory_dir_str
+        today = today_date()
+        key = (
+            today,
+            _stat_key(os.path.join(memory_dir, "MEMORY.md")),
+            _stat_key(os.path.join(memory_dir, f"{today}.md")),
+        )
+        if self._memory_cache is not None and self._memory_cache[0] == key:
+            return self._memory_cache[1]
+        
+        memory = self.memory.get_memory_context(today)
+        self._memory_cache = (key, memory)
+        return memory
+    
+    def _get_skills_sections(self) -> tuple[str, str]:
+        """
+        获取始终加载的技能内容和技能摘要
+        
+        说明:
+            不在这里另加缓存：SkillsLoader 已按每个 SKILL.md 的 mtime 缓存
+            文件内容和元数据，原地编辑技能文件后下一轮即可生效
+        
+        返回:
+            tuple[str, str]，(始终加载技能的内容, 技能摘要 XML)
+        """
+        always_content = ""
+        always_skills = self.skills.get_always_skills()
+        if always_skills:
+            always_content = self.skills.load_skills_for_context(always_skills)
+        
+        return always_content, self.skills.build_skills_summary()
+    
     def _get_identity(self) -> str:
         """
         获取核心身份信息部分
@@ -175,20 +278,36 @@ Skills with available="false" need dependencies installed first - you can try in
         包含内容:
             1. Agent 介绍（nanobot 🐈）
             2. 可用工具列表
-            3. 当前时间
-            4. 运行时环境（操作系统、CPU 架构、Python 版本）
-            5. 工作空间路径
-            6. 重要文件的位置
-            7. 使用指南
+            3. 运行时环境（操作系统、CPU 架构、Python 版本）
+            4. 工作空间路径
+            5. 重要文件的位置
+            6. 使用指南
+        
+        实现方式:
+            内容在 __init__ 中预先生成（_identity）。当前时间不放在这里，
+            否则 system 前缀每分钟变化一次，提供者的前缀缓存无法命中
         
         返回:
             str，格式化的身份信息文本
         """
-        from datetime import datetime
+        return self._identity
+    
+    def _current_time(self) -> str:
+        """
+        获取当前时间，格式化为易读的格式（随每轮用户消息发送）
+        """
+        return datetime.now().strftime("%Y-%m-%d %H:%M (%A)")
+    
+    def _build_identity(self) -> str:
+        """
+        预先生成身份信息
         
-        # 获取当前时间，格式化为易读的格式
-        now = datetime.now().strftime("%Y-%m-%d %H:%M (%A)")
+        运行时环境和工作空间路径在构建器生命周期内不会变化，
+        因此只在初始化时计算一次。
         
+        返回:
+            str，身份信息文本
+        """
         # 获取工作空间的绝对路径
         workspace_path = str(self.workspace.expanduser().resolve())
         
@@ -196,8 +315,7 @@ Skills with available="false" need dependencies installed first - you can try in
         system = platform.system()
         runtime = f"{'macOS' if system == 'Darwin' else system} {platform.machine()}, Python {platform.python_version()}"
         
-        # 构建并返回身份信息文本
-        return f"""# nanobot 🐈
+        identity = f"""# nanobot 🐈
 
 You are nanobot, a helpful AI assistant. You have access to tools that allow you to:
 - Read, write, and edit files
@@ -206,8 +324,7 @@ You are nanobot, a helpful AI assistant. You have access to tools that allow you
 - Send messages to users on chat channels
 - Spawn subagents for complex background tasks
 
-## Current Time
-{now}
+The current time is given at the start of each user message.
 
 ## Runtime
 {runtime}
@@ -224,6 +341,8 @@ For normal conversation, just respond with text - do not call the message tool.
 
 Always be helpful, accurate, and concise. When using tools, explain what you're doing.
 When remembering something, write to {workspace_path}/memory/MEMORY.md"""
+        
+        return identity
     
     def _load_bootstrap_files(self) -> str:
         """
@@ -238,7 +357,7 @@ When remembering something, write to {workspace_path}/memory/MEMORY.md"""
         
         处理逻辑:
             1. 遍历 BOOTSTRAP_FILES 列表
-            2. 检查每个文件是否存在
+            2. 直接尝试读取文件（不存在则跳过）
             3. 读取文件内容
             4. 用文件名作为标题格式化
         
@@ -249,10 +368,14 @@ When remembering something, write to {workspace_path}/memory/MEMORY.md"""
         parts = []
         
         for filename in self.BOOTSTRAP_FILES:
-            file_path = self.workspace / filename
-            if file_path.exists():
-                content = file_path.read_text(encoding="utf-8")
-                parts.append(f"## {filename}\n\n{content}")
+            # 使用 str 路径和内置 open，避免每次循环创建 Path 对象
+            file_path = os.path.join(self._workspace_str, filename)
+            try:
+                with open(file_path, "r", encoding="utf-8") as f:
+                    content = f.read()
+            except (FileNotFoundError, IsADirectoryError, NotADirectoryError):
+                continue
+            parts.append(f"## {filename}\n\n{content}")
         
         return "\n\n".join(parts) if parts else ""
     
@@ -291,17 +414,21 @@ When remembering something, write to {workspace_path}/memory/MEMORY.md"""
             1. 添加系统提示词消息
             2. 扩展历史消息
             3. 处理附件（图片需要 base64 编码）
-            4. 添加当前用户消息
+            4. 添加当前用户消息（开头附带当前时间）
         """
         messages = []
         
         # ====================================================================
         # 1. 系统提示词
         # ====================================================================
+        # 静态前缀（system 消息）放在最前面，内容不变时复用同一个消息对象，
+        # 保证跨轮次字节一致，便于提供者的前缀缓存命中
         system_prompt = self.build_system_prompt(skill_names)
         if channel and chat_id:
             system_prompt += f"\n\n## Current Session\nChannel: {channel}\nChat ID: {chat_id}"
-        messages.append({"role": "system", "content": system_prompt})
+        if self._static_prefix is None or self._static_prefix["content"] != system_prompt:
+            self._static_prefix = {"role": "system", "content": system_prompt}
+        messages.append(self._static_prefix)
         
         # ====================================================================
         # 2. 历史消息
@@ -311,6 +438,9 @@ When remembering something, write to {workspace_path}/memory/MEMORY.md"""
         # ====================================================================
         # 3. 当前消息（支持图片附件）
         # ====================================================================
+        # 当前时间放在本轮用户消息开头，而不是 system 消息中，
+        # 保证 system 前缀跨轮次不变
+        current_message = f"{_TIME_TAG_PREFIX}{self._current_time()}{_TIME_TAG_END}{current_message}"
         user_content = self._build_user_content(current_message, media)
         messages.append({"role": "user", "content": user_content})
         
@@ -321,8 +451,8 @@ When remembering something, write to {workspace_path}/memory/MEMORY.md"""
         构建用户消息内容，支持图片附件
         
         图片处理流程:
-            1. 检查文件是否存在
-            2. 检查是否为图片类型
+            1. 检查是否为图片类型
+            2. 检查文件是否存在
             3. 读取文件并 base64 编码
             4. 构建 OpenAI 格式的图片 URL
         
@@ -345,21 +475,22 @@ When remembering something, write to {workspace_path}/memory/MEMORY.md"""
         
         images = []
         for path in media:
-            p = Path(path)
             mime, _ = mimetypes.guess_type(path)
             
-            # 检查文件是否存在且是图片类型
-            if not p.is_file() or not mime or not mime.startswith("image/"):
+            # 检查是否为图片类型
+            if not mime or not mime.startswith("image/"):
                 continue
             
-            # 读取图片并 base64 编码
-            b64 = base64.b64encode(p.read_bytes()).decode()
+            # 获取图片 URL（文件不存在时跳过）
+            url = self._get_media_url(path, mime)
+            if url is None:
+                continue
             
             # 构建 OpenAI 格式的图片 URL
             images.append({
                 "type": "image_url",
                 "image_url": {
-                    "url": f"data:{mime};base64,{b64}"
+                    "url": url
                 }
             })
         
@@ -370,6 +501,29 @@ When remembering something, write to {workspace_path}/memory/MEMORY.md"""
         # 返回混合内容（图片 + 文本）
         return images + [{"type": "text", "text": text}]
     
+    def _get_media_url(self, path: str, mime: str) -> str | None:
+        """
+        获取媒体文件的图片 URL（base64 内联的 data URL）
+        
+        参数:
+            path: str，媒体文件路径
+            mime: str，媒体 MIME 类型
+        
+        返回:
+            str | None，图片 URL；文件不存在或不是普通文件时返回 None
+        """
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        if not stat.S_ISREG(st.st_mode):
+            return None
+        
+        # 读取图片并 base64 编码（优先使用 pybase64）
+        with open(path, "rb") as f:
+            b64 = _b64encode_str(f.read())
+        return f"data:{mime};base64,{b64}"
+    
     def add_tool_result(
         self,
         messages: list[dict[str, Any]],
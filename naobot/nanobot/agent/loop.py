@@ -42,29 +42,40 @@ NanoBot Agent Loop - Agent 循环模块
 
 # 导入异步处理相关模块
 import asyncio
+import hashlib
 import json
+import os
+import sys
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Any
 
 # 导入日志模块
 from loguru import logger
 
+# 导入配置和定时任务服务
+from nanobot.config.schema import ExecToolConfig
+from nanobot.cron.service import CronService
+
 # 导入消息总线相关模块
 from nanobot.bus.events import InboundMessage, OutboundMessage
 from nanobot.bus.queue import MessageBus
 
 # 导入 LLM 提供者相关模块
-from nanobot.providers.base import LLMProvider
+from nanobot.providers.base import LLMProvider, LLMResponse, ToolCallRequest
 
 # 导入上下文构建器
-from nanobot.agent.context import ContextBuilder
+from nanobot.agent.context import ContextBuilder, strip_current_time
 
 # 导入工具注册表
 from nanobot.agent.tools.registry import ToolRegistry
+from nanobot.agent.tools.base import ContextAwareTool
 
 # 导入各种工具实现
 from nanobot.agent.tools.filesystem import ReadFileTool, WriteFileTool, EditFileTool, ListDirTool
-from nanobot.agent.tools.shell import ExecTool
+from nanobot.agent.tools.shell import EXEC_TIMEOUT_GRACE, ExecTool
 from nanobot.agent.tools.web import WebSearchTool, WebFetchTool
 from nanobot.agent.tools.message import MessageTool
 from nanobot.agent.tools.spawn import SpawnTool
@@ -74,7 +85,25 @@ from nanobot.agent.tools.cron import CronTool
 from nanobot.agent.subagent import SubagentManager
 
 # 导入会话管理器
-from nanobot.session.manager import SessionManager
+from nanobot.session.manager import Session, SessionManager
+
+# 可选依赖：orjson 序列化工具调用参数（比标准库 json 快数倍，直接输出 UTF-8）
+# 未安装时回退到 json.dumps(ensure_ascii=False)
+try:
+    import orjson
+
+    def _dumps(obj: Any) -> str:
+        return orjson.dumps(obj).decode()
+except ImportError:
+    def _dumps(obj: Any) -> str:
+        return json.dumps(obj, ensure_ascii=False)
+
+# 可选依赖：uvloop 基于 libuv 的事件循环，消息总线、LLM 调用、工具 I/O 都能受益
+# 需要在启动事件循环之前调用 uvloop.install()（CLI 入口已处理），未安装时使用标准 asyncio
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
 
 
 class AgentLoop:
@@ -107,7 +136,7 @@ class AgentLoop:
         - sessions: 会话管理器，负责管理对话历史
         - tools: 工具注册表，负责管理可用的工具
         - subagents: 子代理管理器，负责管理子代理
-        - _running: 循环运行状态标志
+        - _stop: 停止事件，由 stop() 设置
     
     ========================================================================
     """
@@ -120,10 +149,19 @@ class AgentLoop:
         model: str | None = None,
         max_iterations: int = 20,
         brave_api_key: str | None = None,
-        exec_config: "ExecToolConfig | None" = None,
-        cron_service: "CronService | None" = None,
+        exec_config: ExecToolConfig | None = None,
+        cron_service: CronService | None = None,
         restrict_to_workspace: bool = False,
         session_manager: SessionManager | None = None,
+        max_parallel_tools: int = 8,
+        max_subagents: int = 4,
+        prompt_cache: bool = True,
+        response_cache_ttl: float = 0.0,
+        response_cache_size: int = 1024,
+        stream_tools: bool = True,
+        history_window: int = 20,
+        history_summary_threshold: int = 40,
+        summary_model: str | None = None,
     ):
         """
         初始化 AgentLoop 实例
@@ -139,6 +177,17 @@ class AgentLoop:
             cron_service: CronService 或 None，定时任务服务实例
             restrict_to_workspace: bool，是否限制文件操作在 workspace 内
             session_manager: SessionManager 或 None，自定义的会话管理器
+            max_parallel_tools: int，单轮中同时执行的工具调用上限，默认为 8
+            max_subagents: int，同时运行的子代理上限，超出的排队等待，默认为 4
+            prompt_cache: bool，是否请求提供者缓存静态前缀（系统提示词），默认为 True
+            response_cache_ttl: float，相同上下文的响应缓存有效期（秒），默认为 0（禁用），
+                大于 0 时开启；带媒体附件的消息不缓存
+            response_cache_size: int，响应缓存的最大条目数
+            stream_tools: bool，提供者支持流式时，工具调用解码完成即开始执行，默认为 True
+            history_window: int，生成摘要后保留的最近消息条数，默认为 20
+            history_summary_threshold: int，未摘要的消息超过此条数时生成滚动摘要，
+                默认为 40，0 表示禁用摘要（只发送最近 50 条）
+            summary_model: str 或 None，生成摘要使用的模型，默认与 model 相同
         
         初始化过程:
             1. 保存所有传入的配置参数
@@ -149,9 +198,6 @@ class AgentLoop:
             6. 创建子代理管理器
             7. 注册默认工具集
         """
-        from nanobot.config.schema import ExecToolConfig
-        from nanobot.cron.service import CronService
-        
         # 保存消息总线引用，用于消息的接收和发送
         self.bus = bus
         
@@ -176,6 +222,25 @@ class AgentLoop:
         # 保存定时任务服务引用
         self.cron_service = cron_service
         
+        # 是否请求提示词缓存（只对支持 cache_control 的提供者生效）
+        self.prompt_cache = prompt_cache
+        
+        # 响应缓存：相同模型 + 相同消息列表（系统提示词、历史、当前消息）时
+        # 直接复用上次的最终回复，跳过 LLM 调用（例如重复触发的定时任务），默认关闭
+        # key: (model, 消息哈希)，value: (过期时间, 回复内容)
+        self.response_cache_ttl = response_cache_ttl
+        self.response_cache_size = response_cache_size
+        self._response_cache: OrderedDict[tuple[str, str], tuple[float, str]] = OrderedDict()
+        
+        # 流式工具派发：不必等整个响应生成完，工具调用一解码完成就开始执行
+        self.stream_tools = stream_tools
+        
+        # 历史窗口：超过阈值时把较早的消息压缩为滚动摘要，只保留最近 history_window 条
+        # 摘要边界只在重新摘要时移动，期间发送的消息前缀保持不变，利于提供者前缀缓存
+        self.history_window = max(1, history_window)
+        self.history_summary_threshold = history_summary_threshold
+        self.summary_model = summary_model
+        
         # 是否限制所有文件操作在 workspace 目录内
         # True 表示只能操作 workspace 内的文件，更安全
         self.restrict_to_workspace = restrict_to_workspace
@@ -187,8 +252,14 @@ class AgentLoop:
         # 如果未提供则创建一个新的会话管理器
         self.sessions = session_manager or SessionManager(workspace)
         
+        # 同步工具共享的有界线程池，大量工具调用并发时不会挤占默认线程池
+        self._tool_executor = ThreadPoolExecutor(
+            max_workers=min(32, (os.cpu_count() or 1) * 2),
+            thread_name_prefix="nanobot-tool",
+        )
+        
         # 创建工具注册表，用于管理所有可用的工具
-        self.tools = ToolRegistry()
+        self.tools = ToolRegistry(executor=self._tool_executor)
         
         # 创建子代理管理器
         # 子代理是独立的 Agent，可以并行处理任务
@@ -200,10 +271,22 @@ class AgentLoop:
             brave_api_key=brave_api_key,
             exec_config=self.exec_config,
             restrict_to_workspace=restrict_to_workspace,
+            max_concurrent=max_subagents,
+            executor=self._tool_executor,
         )
         
-        # 初始化运行状态标志，初始为 False
-        self._running = False
+        # 工具并发信号量，限制同时执行的工具调用数量
+        # 避免一轮中大量工具调用同时压垮 shell/网络工具
+        self._tool_sem = asyncio.Semaphore(max(1, max_parallel_tools))
+        
+        # 预先绑定的错误回复模板，异常处理时只做一次格式化
+        self._err_tmpl = "Sorry, I encountered an error: {err}".format_map
+        
+        # 停止事件：stop() 设置后 run() 立即退出，无需轮询
+        self._stop = asyncio.Event()
+        
+        # 需要路由上下文的工具，注册时直接记录引用，处理消息时无需查找和类型判断
+        self._context_tools: list[ContextAwareTool] = []
         
         # 注册所有默认工具集
         self._register_default_tools()
@@ -234,19 +317,19 @@ class AgentLoop:
         # ========================================================================
         # ReadFileTool: 读取文件内容
         # 用途：让 Agent 可以阅读代码、文档等内容
-        self.tools.register(ReadFileTool(allowed_dir=allowed_dir))
+        self.tools.register(ReadFileTool(allowed_dir=allowed_dir, executor=self._tool_executor))
         
         # WriteFileTool: 写入文件内容
         # 用途：让 Agent 可以创建新文件、修改现有文件
-        self.tools.register(WriteFileTool(allowed_dir=allowed_dir))
+        self.tools.register(WriteFileTool(allowed_dir=allowed_dir, executor=self._tool_executor))
         
         # EditFileTool: 编辑文件内容
         # 用途：让 Agent 可以精确修改文件的某一部分
-        self.tools.register(EditFileTool(allowed_dir=allowed_dir))
+        self.tools.register(EditFileTool(allowed_dir=allowed_dir, executor=self._tool_executor))
         
         # ListDirTool: 列出目录内容
         # 用途：让 Agent 可以查看目录结构、了解项目布局
-        self.tools.register(ListDirTool(allowed_dir=allowed_dir))
+        self.tools.register(ListDirTool(allowed_dir=allowed_dir, executor=self._tool_executor))
         
         # ========================================================================
         # 注册 Shell 执行工具
@@ -278,6 +361,7 @@ class AgentLoop:
         # 用途：让 Agent 可以通过消息总线发送消息给用户
         message_tool = MessageTool(send_callback=self.bus.publish_outbound)
         self.tools.register(message_tool)
+        self._context_tools.append(message_tool)
         
         # ========================================================================
         # 注册子代理工具
@@ -286,6 +370,7 @@ class AgentLoop:
         # 用途：让 Agent 可以并行启动其他 Agent 处理任务
         spawn_tool = SpawnTool(manager=self.subagents)
         self.tools.register(spawn_tool)
+        self._context_tools.append(spawn_tool)
         
         # ========================================================================
         # 注册定时任务工具
@@ -294,15 +379,17 @@ class AgentLoop:
         # CronTool: 管理定时任务
         # 用途：让 Agent 可以创建、查看、删除定时任务
         if self.cron_service:
-            self.tools.register(CronTool(self.cron_service))
+            cron_tool = CronTool(self.cron_service)
+            self.tools.register(cron_tool)
+            self._context_tools.append(cron_tool)
     
     async def run(self) -> None:
         """
         启动 Agent 循环，持续处理来自消息总线的消息
         
         循环逻辑:
-            1. 调用 bus.consume_inbound() 等待接收消息
-            2. 如果超时（1秒），继续等待
+            1. 同时等待 bus.consume_inbound() 和停止事件 _stop
+            2. 如果停止事件先触发，取消等待中的消费任务并退出
             3. 收到消息后，调用 _process_message() 处理
             4. 如果处理产生响应，发送到消息总线
             5. 如果处理出错，发送错误消息给用户
@@ -310,37 +397,52 @@ class AgentLoop:
         
         异常处理:
             - 消息处理异常：捕获异常，发送错误消息给用户
-            - 超时异常：忽略，继续等待下一个消息
+        
+        事件循环:
+            - 推荐在 asyncio.run() 之前调用 uvloop.install()（需安装 speedups 可选依赖）
+            - 已安装 uvloop 但未启用时会记录一条警告
         
         退出条件:
-            - 调用 stop() 方法将 _running 设为 False
-            - 循环会检查此标志并在下次迭代时退出
+            - 调用 stop() 方法设置 _stop 事件
+            - 空闲时立即退出，无需轮询（没有每秒一次的超时唤醒）
         
         使用示例:
             # 在 asyncio 事件循环中启动
             agent = AgentLoop(...)
             await agent.run()
         """
-        # 设置运行状态为 True
-        self._running = True
+        # 重置停止事件
+        self._stop.clear()
+        
+        # 已安装 uvloop 但入口没有调用 uvloop.install() 时提示
+        if uvloop is not None and not isinstance(asyncio.get_running_loop(), uvloop.Loop):
+            logger.warning("uvloop is installed but not active - call uvloop.install() before asyncio.run()")
         
         # 记录启动日志
         logger.info("Agent loop started - 开始接收和处理消息")
         
-        # 主循环：持续运行直到 _running 变为 False
-        while self._running:
-            try:
+        # 停止事件的等待任务在整个循环期间复用
+        stop_task = asyncio.create_task(self._stop.wait())
+        consume_task: asyncio.Task[InboundMessage] | None = None
+        
+        try:
+            # 主循环：持续运行直到 _stop 被设置
+            while not self._stop.is_set():
                 # ====================================================================
-                # 等待接收消息
+                # 等待接收消息或停止信号
                 # ====================================================================
-                # 使用 asyncio.wait_for 设置超时，避免长时间阻塞
-                # timeout=1.0 表示每 1 秒检查一次循环状态
-                # 这样可以在收到 stop() 调用后及时退出
-                msg = await asyncio.wait_for(
-                    self.bus.consume_inbound(),
-                    timeout=1.0
+                consume_task = asyncio.create_task(self.bus.consume_inbound())
+                await asyncio.wait(
+                    {consume_task, stop_task},
+                    return_when=asyncio.FIRST_COMPLETED,
                 )
                 
+                if not consume_task.done():
+                    # 停止信号先到达，退出循环（finally 中取消消费任务，队列中的消息不会丢失）
+                    break
+                
+                msg = consume_task.result()
+                
                 # ====================================================================
                 # 处理消息
                 # ====================================================================
@@ -348,38 +450,43 @@ class AgentLoop:
                     # 调用消息处理函数
                     response = await self._process_message(msg)
                     
-                    # 如果有响应，发送到消息总线
+                    # 如果有响应，发送到消息总线（同步入队，不等待投递，立即处理下一条消息）
+                    # 会话保存由 SessionManager 在后台合并写入，同样不阻塞这里
                     if response:
-                        await self.bus.publish_outbound(response)
+                        self.bus.publish_outbound_nowait(response)
                 except Exception as e:
-                    # 处理消息时发生异常
-                    logger.error(f"Error processing message: {e}")
+                    # 处理消息时发生异常（logger.exception 惰性格式化并附带堆栈）
+                    logger.exception("Error processing message")
                     
                     # 发送错误消息给用户
-                    await self.bus.publish_outbound(OutboundMessage(
+                    self.bus.publish_outbound_nowait(OutboundMessage(
                         channel=msg.channel,  # 回复到相同的频道
                         chat_id=msg.chat_id,  # 回复到相同的聊天
-                        content=f"Sorry, I encountered an error: {str(e)}"
+                        content=self._err_tmpl({"err": e}),
                     ))
-            
-            except asyncio.TimeoutError:
-                # 超时异常是预期的行为（每 1 秒触发一次）
-                # 忽略此异常，继续循环
-                continue
+        finally:
+            stop_task.cancel()
+            if consume_task is not None and not consume_task.done():
+                consume_task.cancel()
+            # 写入尚在合并窗口中的会话
+            self.sessions.flush()
+            # 结束仍在后台运行的子代理
+            await self.subagents.aclose()
+            # 关闭共享工具线程池（不等待正在运行的工具，取消排队中的任务）
+            self._tool_executor.shutdown(wait=False, cancel_futures=True)
     
     def stop(self) -> None:
         """
         停止 Agent 循环
         
         实现方式:
-            将 _running 标志设为 False
-            下次循环迭代时会检测到此变化并退出
+            设置 _stop 事件，run() 中等待消息的操作会被立即唤醒并退出
         
         注意:
             - 这是一个同步方法，可以在任何地方调用
-            - 不会立即停止，而是在当前消息处理完成后退出
+            - 正在处理的消息会先处理完成，然后再退出
         """
-        self._running = False
+        self._stop.set()
         logger.info("Agent loop stopping - 正在停止...")
     
     async def _process_message(self, msg: InboundMessage) -> OutboundMessage | None:
@@ -421,9 +528,11 @@ class AgentLoop:
             return await self._process_system_message(msg)
         
         # 记录处理开始日志
-        # 截取消息前 80 个字符作为预览
-        preview = msg.content[:80] + "..." if len(msg.content) > 80 else msg.content
-        logger.info(f"Processing message from {msg.channel}:{msg.sender_id}: {preview}")
+        # 截取消息前 80 个字符作为预览（lazy：日志级别被过滤时不构建预览）
+        logger.opt(lazy=True).info(
+            "Processing message from {}:{}: {}",
+            lambda: msg.channel, lambda: msg.sender_id, lambda: self._preview(msg.content, 80),
+        )
         
         # ========================================================================
         # 会话管理
@@ -435,31 +544,19 @@ class AgentLoop:
         # ========================================================================
         # 更新工具上下文
         # ========================================================================
-        # 设置消息工具的上下文，确保回复发送到正确的频道和聊天
-        message_tool = self.tools.get("message")
-        if isinstance(message_tool, MessageTool):
-            message_tool.set_context(msg.channel, msg.chat_id)
-        
-        # 设置子代理工具的上下文
-        spawn_tool = self.tools.get("spawn")
-        if isinstance(spawn_tool, SpawnTool):
-            spawn_tool.set_context(msg.channel, msg.chat_id)
-        
-        # 设置定时任务工具的上下文
-        cron_tool = self.tools.get("cron")
-        if isinstance(cron_tool, CronTool):
-            cron_tool.set_context(msg.channel, msg.chat_id)
+        # 设置消息、子代理、定时任务工具的上下文，确保回复发送到正确的频道和聊天
+        self._set_tool_context(msg.channel, msg.chat_id)
         
         # ========================================================================
         # 构建 LLM 上下文
         # ========================================================================
         # 组装 LLM 需要的所有信息：
-        # - 历史消息（对话记录）
+        # - 历史消息（滚动摘要 + 最近的对话记录）
         # - 当前消息（用户的新请求）
         # - 媒体信息（如果有附件）
         # - 频道和聊天上下文
         messages = self.context.build_messages(
-            history=session.get_history(),
+            history=await self._get_history(session),
             current_message=msg.content,
             media=msg.media if msg.media else None,
             channel=msg.channel,
@@ -469,70 +566,15 @@ class AgentLoop:
         # ========================================================================
         # Agent 循环
         # ====================================================================
-        # 核心循环：调用 LLM，处理工具调用
-        # 最多迭代 max_iterations 次，防止无限循环
-        iteration = 0
-        final_content = None
-        
-        while iteration < self.max_iterations:
-            iteration += 1
-            
-            # ====================================================================
-            # 调用 LLM
-            # ====================================================================
-            # 发送消息列表、可用工具列表给 LLM
-            # LLM 会决定是否需要调用工具
-            response = await self.provider.chat(
-                messages=messages,
-                tools=self.tools.get_definitions(),
-                model=self.model
-            )
-            
-            # ====================================================================
-            # 处理工具调用
-            # ====================================================================
-            if response.has_tool_calls:
-                # LLM 决定调用工具
-                
-                # 将工具调用信息添加到消息历史
-                tool_call_dicts = [
-                    {
-                        "id": tc.id,
-                        "type": "function",
-                        "function": {
-                            "name": tc.name,
-                            "arguments": json.dumps(tc.arguments)
-                        }
-                    }
-                    for tc in response.tool_calls
-                ]
-                
-                # 添加助手消息（包含工具调用）
-                messages = self.context.add_assistant_message(
-                    messages, response.content, tool_call_dicts,
-                    reasoning_content=response.reasoning_content,
-                )
-                
-                # ====================================================================
-                # 执行工具
-                # ====================================================================
-                # 遍历所有工具调用，逐一执行
-                for tool_call in response.tool_calls:
-                    # 记录工具调用日志（截取前 200 字符）
-                    args_str = json.dumps(tool_call.arguments, ensure_ascii=False)
-                    logger.info(f"Tool call: {tool_call.name}({args_str[:200]})")
-                    
-                    # 执行工具调用
-                    result = await self.tools.execute(tool_call.name, tool_call.arguments)
-                    
-                    # 将工具执行结果添加到消息历史
-                    messages = self.context.add_tool_result(
-                        messages, tool_call.id, tool_call.name, result
-                    )
-            else:
-                # LLM 没有调用工具，响应已完成
-                final_content = response.content
-                break
+        # 核心循环见 _run_llm_loop
+        # 相同上下文命中响应缓存时直接跳过 LLM 调用
+        cache_key = self._response_cache_key(messages)
+        final_content = self._get_cached_response(cache_key)
+        if final_content is None:
+            final_content, messages, cacheable = await self._run_llm_loop(messages)
+            # 只缓存没有工具调用且没有出错的回复
+            if cacheable and final_content is not None:
+                self._put_cached_response(cache_key, final_content)
         
         # 如果达到最大迭代次数但没有完成
         if final_content is None:
@@ -542,8 +584,10 @@ class AgentLoop:
         # 保存和返回
         # ========================================================================
         # 记录响应日志
-        preview = final_content[:120] + "..." if len(final_content) > 120 else final_content
-        logger.info(f"Response to {msg.channel}:{msg.sender_id}: {preview}")
+        logger.opt(lazy=True).info(
+            "Response to {}:{}: {}",
+            lambda: msg.channel, lambda: msg.sender_id, lambda: self._preview(final_content, 120),
+        )
         
         # 保存会话历史到磁盘
         session.add_message("user", msg.content)
@@ -589,14 +633,13 @@ class AgentLoop:
         # ========================================================================
         # chat_id 格式为 "channel:chat_id"
         # 例如："telegram:123456789"
-        if ":" in msg.chat_id:
-            parts = msg.chat_id.split(":", 1)
-            origin_channel = parts[0]
-            origin_chat_id = parts[1]
-        else:
+        # partition 一次扫描完成查找和切分
+        origin_channel, sep, origin_chat_id = msg.chat_id.partition(":")
+        if not sep:
             # 如果没有冒号，默认使用 CLI
-            origin_channel = "cli"
-            origin_chat_id = msg.chat_id
+            origin_channel, origin_chat_id = "cli", msg.chat_id
+        # 频道名取值有限（telegram、qq、cli 等），驻留后后续比较和字典查找更快
+        origin_channel = sys.intern(origin_channel)
         
         # 构建会话键
         session_key = f"{origin_channel}:{origin_chat_id}"
@@ -609,23 +652,13 @@ class AgentLoop:
         # ========================================================================
         # 更新工具上下文
         # ========================================================================
-        message_tool = self.tools.get("message")
-        if isinstance(message_tool, MessageTool):
-            message_tool.set_context(origin_channel, origin_chat_id)
-        
-        spawn_tool = self.tools.get("spawn")
-        if isinstance(spawn_tool, SpawnTool):
-            spawn_tool.set_context(origin_channel, origin_chat_id)
-        
-        cron_tool = self.tools.get("cron")
-        if isinstance(cron_tool, CronTool):
-            cron_tool.set_context(origin_channel, origin_chat_id)
+        self._set_tool_context(origin_channel, origin_chat_id)
         
         # ========================================================================
         # 构建消息
         # ========================================================================
         messages = self.context.build_messages(
-            history=session.get_history(),
+            history=await self._get_history(session),
             current_message=msg.content,
             channel=origin_channel,
             chat_id=origin_chat_id,
@@ -634,45 +667,7 @@ class AgentLoop:
         # ========================================================================
         # Agent 循环
         # ========================================================================
-        iteration = 0
-        final_content = None
-        
-        while iteration < self.max_iterations:
-            iteration += 1
-            
-            response = await self.provider.chat(
-                messages=messages,
-                tools=self.tools.get_definitions(),
-                model=self.model
-            )
-            
-            if response.has_tool_calls:
-                tool_call_dicts = [
-                    {
-                        "id": tc.id,
-                        "type": "function",
-                        "function": {
-                            "name": tc.name,
-                            "arguments": json.dumps(tc.arguments)
-                        }
-                    }
-                    for tc in response.tool_calls
-                ]
-                messages = self.context.add_assistant_message(
-                    messages, response.content, tool_call_dicts,
-                    reasoning_content=response.reasoning_content,
-                )
-                
-                for tool_call in response.tool_calls:
-                    args_str = json.dumps(tool_call.arguments, ensure_ascii=False)
-                    logger.info(f"Tool call: {tool_call.name}({args_str[:200]})")
-                    result = await self.tools.execute(tool_call.name, tool_call.arguments)
-                    messages = self.context.add_tool_result(
-                        messages, tool_call.id, tool_call.name, result
-                    )
-            else:
-                final_content = response.content
-                break
+        final_content, messages, _ = await self._run_llm_loop(messages)
         
         if final_content is None:
             final_content = "Background task completed."
@@ -692,6 +687,454 @@ class AgentLoop:
             content=final_content
         )
     
+    async def _get_history(self, session: Session) -> list[dict[str, Any]]:
+        """
+        获取发送给 LLM 的历史消息：滚动摘要 + 最近的消息
+        
+        摘要策略:
+            - session.metadata["summary_upto"] 记录已被摘要覆盖的消息条数
+            - 未摘要的消息超过 history_summary_threshold 时，把除最近 history_window 条
+              以外的消息（连同旧摘要）压缩为新摘要，边界移动到 len - history_window
+            - 摘要以一条 system 消息放在历史最前面
+            - 摘要失败时保持原边界，本轮退回到只发送最近的消息
+        
+        参数:
+            session: Session，当前会话
+        
+        返回:
+            list[dict]，历史消息列表
+        """
+        if self.history_summary_threshold <= 0:
+            return session.get_history()
+        
+        total = len(session.messages)
+        summary = session.metadata.get("summary")
+        upto = session.metadata.get("summary_upto", 0)
+        if upto > total:
+            # 会话被截断过，旧摘要已失效
+            summary, upto = None, 0
+        
+        # history_window 可能大于 history_summary_threshold：边界不能早于已摘要的位置，
+        # 否则 cut 为负数时切片会从末尾倒数
+        cut = max(upto, total - self.history_window)
+        if total - upto > self.history_summary_threshold and cut > upto:
+            new_summary = await self._summarize(summary, session.messages[upto:cut])
+            if new_summary is not None:
+                summary, upto = new_summary, cut
+                session.metadata["summary"] = summary
+                session.metadata["summary_upto"] = upto
+        
+        history = session.get_history(max_messages=min(total - upto, self.history_summary_threshold))
+        if summary:
+            history.insert(0, {
+                "role": "system",
+                "content": f"Summary of the earlier conversation:\n{summary}",
+            })
+        return history
+    
+    async def _summarize(
+        self, summary: str | None, messages: list[dict[str, Any]]
+    ) -> str | None:
+        """
+        将旧摘要和一段消息压缩为新的滚动摘要
+        
+        参数:
+            summary: str 或 None，之前的摘要
+            messages: list[dict]，需要并入摘要的消息
+        
+        返回:
+            str | None，新摘要；LLM 调用失败时返回 None
+        """
+        lines = [f"Previous summary:\n{summary}\n"] if summary else []
+        lines.extend(f"{m['role']}: {m['content']}" for m in messages)
+        response = await self.provider.chat(
+            messages=[
+                {
+                    "role": "system",
+                    "content": (
+                        "Summarize the conversation below for your own future reference. "
+                        "Keep facts, decisions, user preferences and open tasks; drop small talk. "
+                        "Reply with the summary only."
+                    ),
+                },
+                {"role": "user", "content": "\n".join(lines)},
+            ],
+            model=self.summary_model or self.model,
+            max_tokens=1024,
+            temperature=0.2,
+        )
+        if response.finish_reason == "error" or not response.content:
+            logger.warning("History summarization failed, sending recent messages only")
+            return None
+        logger.debug(f"Summarized {len(messages)} messages")
+        return response.content
+    
+    @staticmethod
+    def _preview(text: str, limit: int) -> str:
+        """
+        截取日志预览
+        
+        参数:
+            text: str，原始文本
+            limit: int，最大字符数
+        
+        返回:
+            str，不超过 limit 时原样返回，否则截断并追加 "…"
+        """
+        return text if len(text) <= limit else f"{text[:limit]}…"
+    
+    def _set_tool_context(self, channel: str, chat_id: str) -> None:
+        """
+        设置需要路由信息的工具（消息、子代理、定时任务）的当前频道和聊天 ID
+        
+        参数:
+            channel: str，回复目标频道
+            chat_id: str，回复目标聊天 ID
+        """
+        for tool in self._context_tools:
+            tool.set_context(channel, chat_id)
+    
+    async def _run_llm_loop(
+        self, messages: list[dict[str, Any]]
+    ) -> tuple[str | None, list[dict[str, Any]], bool]:
+        """
+        Agent 核心循环：调用 LLM，执行工具调用，直到 LLM 给出最终回复
+        
+        _process_message 和 _process_system_message 共用此方法
+        
+        循环逻辑:
+            1. 调用 LLM（支持流式的提供者在响应生成期间就开始执行只读工具）
+            2. 如果有工具调用：添加助手消息，等待工具结果并按原始顺序添加到消息历史
+            3. 如果没有工具调用：响应已完成，退出循环
+            4. 同一轮中出现完全相同的工具调用和结果时提前退出（LLM 陷入循环）
+            5. 最多迭代 max_iterations 次，防止无限循环
+        
+        参数:
+            messages: list[dict]，build_messages 构建好的消息列表
+        
+        返回:
+            tuple[str | None, list[dict], bool]:
+                - 最终回复内容（达到最大迭代次数时为 None）
+                - 包含工具调用和结果的完整消息列表
+                - 回复是否可缓存（没有发生工具调用且 LLM 调用没有出错）
+        """
+        cacheable = True
+        # 本轮已出现过的 (工具调用, 结果) 组合摘要，用于检测没有进展的循环
+        seen_rounds: set[bytes] = set()
+        
+        for iteration in range(1, self.max_iterations + 1):
+            # 发送消息列表、可用工具列表给 LLM，LLM 会决定是否需要调用工具
+            response, tool_call_dicts, tool_tasks = await self._chat(messages)
+            
+            if not response.has_tool_calls:
+                # LLM 没有调用工具，响应已完成
+                return (
+                    response.content,
+                    messages,
+                    cacheable and response.finish_reason != "error",
+                )
+            
+            # 工具调用可能有副作用，这类回复不进入响应缓存
+            cacheable = False
+            
+            # 添加助手消息（工具调用参数在 _chat 中只序列化一次）
+            messages = self.context.add_assistant_message(
+                messages, response.content, tool_call_dicts,
+                reasoning_content=response.reasoning_content,
+            )
+            
+            # 等待所有工具调用完成（已在 _chat 中按分组启动），按原始顺序添加结果
+            results = await self._collect_tool_results(tool_tasks)
+            for tool_call, result in zip(response.tool_calls, results):
+                messages = self.context.add_tool_result(
+                    messages, tool_call.id, tool_call.name, result
+                )
+            
+            # 相同的工具调用得到相同的结果，说明 LLM 在原地打转，继续迭代只会浪费调用
+            # （工具调用 ID 每轮都不同，只比较工具名、参数和结果）
+            round_digest = hashlib.blake2b(_dumps([
+                [d["function"]["name"], d["function"]["arguments"], result]
+                for d, result in zip(tool_call_dicts, results)
+            ]).encode("utf-8"), digest_size=16).digest()
+            if round_digest in seen_rounds:
+                logger.warning(f"Agent loop detected after {iteration} iterations, aborting")
+                return (
+                    "I stopped because I was repeating the same tool calls without making progress.",
+                    messages,
+                    False,
+                )
+            seen_rounds.add(round_digest)
+        
+        return None, messages, False
+    
+    def _response_cache_key(self, messages: list[dict[str, Any]]) -> tuple[str, str] | None:
+        """
+        计算响应缓存键
+        
+        参数:
+            messages: list[dict]，发送给 LLM 的完整消息列表
+        
+        返回:
+            tuple[str, str] | None，(模型名称, 消息列表的 blake2b 哈希)
+            响应缓存禁用或当前消息带媒体附件（内容为列表）时返回 None
+        
+        说明:
+            - 逐条序列化消息并增量更新哈希，不拼接整个上下文的 JSON 字符串
+            - 当前消息开头的时间标记（精确到分钟）不参与哈希，
+              否则缓存只能在同一分钟内命中，response_cache_ttl 实际不超过 60 秒
+        """
+        if self.response_cache_ttl <= 0 or not isinstance(messages[-1].get("content"), str):
+            return None
+        current = {**messages[-1], "content": strip_current_time(messages[-1]["content"])}
+        digest = hashlib.blake2b()
+        for message in (*messages[:-1], current):
+            digest.update(json.dumps(message, sort_keys=True, ensure_ascii=False, default=str).encode("utf-8"))
+            digest.update(b"\n")
+        return (self.model, digest.hexdigest())
+    
+    def _get_cached_response(self, key: tuple[str, str] | None) -> str | None:
+        """
+        查找未过期的缓存回复
+        
+        参数:
+            key: 响应缓存键（None 表示禁用）
+        
+        返回:
+            str | None，命中时返回缓存的回复内容
+        """
+        if key is None:
+            return None
+        entry = self._response_cache.get(key)
+        if entry is None:
+            return None
+        expires_at, content = entry
+        if expires_at < time.monotonic():
+            del self._response_cache[key]
+            return None
+        self._response_cache.move_to_end(key)
+        logger.debug("Response cache hit, skipping LLM call")
+        return content
+    
+    def _put_cached_response(self, key: tuple[str, str] | None, content: str) -> None:
+        """
+        写入响应缓存（超出容量时淘汰最久未使用的条目）
+        
+        参数:
+            key: 响应缓存键（None 表示禁用）
+            content: str，最终回复内容
+        """
+        if key is None:
+            return
+        self._response_cache[key] = (time.monotonic() + self.response_cache_ttl, content)
+        self._response_cache.move_to_end(key)
+        while len(self._response_cache) > self.response_cache_size:
+            self._response_cache.popitem(last=False)
+    
+    async def _chat(
+        self, messages: list[dict[str, Any]]
+    ) -> tuple[LLMResponse, list[dict[str, Any]], list[asyncio.Future[str]]]:
+        """
+        调用 LLM 并启动响应中的工具调用
+        
+        执行方式:
+            - 提供者支持流式且 stream_tools 为 True 时，消费 chat_stream()，
+              位于最前面的连续只读工具调用解码完成立即启动执行，与后续 token 生成重叠；
+              有副作用的调用（write_file、exec 等）及其之后的调用等最终响应到达后，
+              只为其中实际包含的调用启动（流中途出错时不会留下没人知道的副作用）
+            - 否则调用 chat()，拿到完整响应后再启动所有工具调用
+            - 执行顺序见 _start_tool_calls
+        
+        参数:
+            messages: list[dict]，发送给 LLM 的消息列表
+        
+        返回:
+            tuple[LLMResponse, list[dict], list[Future]]:
+                - 最终响应
+                - OpenAI 格式的工具调用字典（用于 add_assistant_message）
+                - 工具执行任务（用 _collect_tool_results 等待结果）
+            后两者都与 response.tool_calls 顺序一致
+        """
+        kwargs = {
+            "messages": messages,
+            "tools": self.tools.get_definitions(),
+            "model": self.model,
+            "prompt_cache": self.prompt_cache,
+        }
+        
+        # 第一组（最前面的连续只读调用）中参数完全相同的调用共享同一个执行任务
+        shared: dict[tuple[str, str], asyncio.Future[str]] = {}
+        
+        if not (self.stream_tools and self.provider.supports_streaming):
+            response = await self.provider.chat(**kwargs)
+            return (response, *self._start_tool_calls(response.tool_calls, {}, shared))
+        
+        streamed: dict[str, tuple[dict[str, Any], asyncio.Future[str]]] = {}
+        # 出现第一个有副作用的调用后，之后的调用都要等它执行完，不再提前启动
+        eager = True
+        response: LLMResponse | None = None
+        try:
+            async for event in self.provider.chat_stream(**kwargs):
+                if isinstance(event, ToolCallRequest):
+                    if eager and self.tools.is_read_only(event.name):
+                        streamed[event.id] = self._start_tool_call(event, shared, [])
+                    else:
+                        eager = False
+                else:
+                    response = event
+        except BaseException:
+            for _, task in streamed.values():
+                task.cancel()
+            raise
+        
+        if response is None:
+            raise RuntimeError("chat_stream() ended without a final LLMResponse")
+        
+        call_dicts, tasks = self._start_tool_calls(response.tool_calls, streamed, shared)
+        # 最终响应中不存在的只读调用（例如流中途出错）不再等待（不取消仍被共享的任务）
+        in_use = {id(task) for task in tasks}
+        for _, task in streamed.values():
+            if id(task) not in in_use:
+                task.cancel()
+        return response, call_dicts, tasks
+    
+    def _start_tool_calls(
+        self,
+        tool_calls: list[ToolCallRequest],
+        streamed: dict[str, tuple[dict[str, Any], asyncio.Future[str]]],
+        shared: dict[tuple[str, str], asyncio.Future[str]],
+    ) -> tuple[list[dict[str, Any]], list[asyncio.Future[str]]]:
+        """
+        按 ToolRegistry.group_calls 的分组启动一轮中的全部工具调用
+        
+        执行顺序（与子代理一致）:
+            - 连续的只读调用为一组，组内并发执行
+            - 有副作用的调用单独成组，组与组之间按 LLM 给出的顺序执行
+              （例如先写文件再执行、先编辑再读取）
+            - 每组的任务先等待上一组全部完成再开始执行
+        
+        参数:
+            tool_calls: list[ToolCallRequest]，最终响应中的工具调用
+            streamed: dict，流式阶段已启动的第一组调用（被复用的条目会被移除）
+            shared: dict，第一组的只读调用去重表（流式阶段已在使用）
+        
+        返回:
+            tuple[list[dict], list[Future]]，与 tool_calls 顺序一致的调用字典和执行任务
+        """
+        started: list[tuple[dict[str, Any], asyncio.Future[str]] | None] = [None] * len(tool_calls)
+        previous: list[asyncio.Future[str]] = []
+        for group in self.tools.group_calls([tc.name for tc in tool_calls]):
+            for i in group:
+                tc = tool_calls[i]
+                entry = streamed.pop(tc.id, None) if not previous else None
+                started[i] = entry or self._start_tool_call(tc, shared, previous)
+            previous = [started[i][1] for i in group]
+            # 去重只在组内进行：组之间可能有写操作，结果不能跨组复用
+            shared = {}
+        return [d for d, _ in started], [t for _, t in started]
+    
+    def _start_tool_call(
+        self,
+        tool_call: ToolCallRequest,
+        shared: dict[tuple[str, str], asyncio.Future[str]],
+        after: list[asyncio.Future[str]],
+    ) -> tuple[dict[str, Any], asyncio.Future[str]]:
+        """
+        序列化工具调用参数并创建执行任务
+        
+        优先使用提供者保留的原始 JSON 参数字符串，没有时才序列化一次；
+        同一字符串用于消息历史中的 function.arguments 和日志预览。
+        只读工具的调用按 (工具名, 规范化参数) 去重，重复的调用复用已有任务，
+        每个 tool_call.id 仍各自得到一条工具结果。
+        
+        参数:
+            tool_call: ToolCallRequest，要执行的工具调用
+            shared: dict，本组已启动的只读调用任务（会被更新）
+            after: list[Future]，需要先完成的上一组任务
+        
+        返回:
+            tuple[dict, Future]，OpenAI 格式的工具调用字典和执行任务
+        """
+        args_json = tool_call.raw_arguments or _dumps(tool_call.arguments)
+        call_dict = {
+            "id": tool_call.id,
+            "type": "function",
+            "function": {"name": tool_call.name, "arguments": args_json},
+        }
+        
+        if not self.tools.is_read_only(tool_call.name):
+            return call_dict, asyncio.ensure_future(self._execute_tool_call(tool_call, args_json, after))
+        
+        key = (tool_call.name, json.dumps(tool_call.arguments, sort_keys=True, default=str))
+        task = shared.get(key)
+        if task is None:
+            task = shared[key] = asyncio.ensure_future(self._execute_tool_call(tool_call, args_json, after))
+        else:
+            logger.debug(f"Reusing identical {tool_call.name} call in this turn")
+        return call_dict, task
+    
+    async def _execute_tool_call(
+        self,
+        tool_call: ToolCallRequest,
+        args_json: str,
+        after: list[asyncio.Future[str]],
+    ) -> str:
+        """
+        执行单个工具调用
+        
+        执行方式:
+            - 先等待 after 中的上一组任务全部完成
+            - 通过 _tool_sem 限制并发数量，空出的槽位立即交给下一个等待的调用
+            - 以 exec_config.timeout + EXEC_TIMEOUT_GRACE 作为超时上限
+              （留出余量让 exec 工具先按自己的超时杀死子进程）
+            - 失败不抛出异常，不影响同一轮的其他工具
+        
+        参数:
+            tool_call: ToolCallRequest，LLM 返回的工具调用
+            args_json: str，已序列化的参数（仅用于日志）
+            after: list[Future]，需要先完成的任务
+        
+        返回:
+            str，执行结果；失败时返回与 ToolRegistry.execute 相同格式的 "Error..." 文本
+        """
+        if after:
+            await asyncio.wait(after)
+        async with self._tool_sem:
+            # 记录工具调用日志（截取前 200 字符，lazy：日志级别被过滤时不做切片和格式化）
+            logger.opt(lazy=True).info(
+                "Tool call: {}({})", lambda: tool_call.name, lambda: args_json[:200]
+            )
+            timeout = self.exec_config.timeout + EXEC_TIMEOUT_GRACE
+            try:
+                return await asyncio.wait_for(
+                    self.tools.execute(tool_call.name, tool_call.arguments),
+                    timeout=timeout,
+                )
+            except asyncio.TimeoutError:
+                error = f"Error: Tool '{tool_call.name}' timed out after {timeout:g}s"
+            except Exception as e:
+                error = f"Error executing {tool_call.name}: {str(e)}"
+        logger.warning(f"Tool call {tool_call.name} failed: {error}")
+        return error
+    
+    async def _collect_tool_results(self, tasks: list[asyncio.Future[str]]) -> list[str]:
+        """
+        等待一轮中的所有工具任务完成
+        
+        参数:
+            tasks: list[Future]，_start_tool_call 创建的任务
+        
+        返回:
+            list[str]，与 tasks 顺序一致的执行结果
+        
+        注意:
+            等待被取消时（例如 Agent 停止）会一并取消尚未完成的任务
+        """
+        try:
+            return list(await asyncio.gather(*tasks))
+        finally:
+            for task in tasks:
+                task.cancel()
+    
     async def process_direct(
         self,
         content: str,
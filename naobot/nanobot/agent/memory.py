@@ -21,6 +21,7 @@ NanoBot Memory Store - 记忆存储模块
 记忆读取时机:
     - 系统启动时: 读取长期记忆和今天的笔记
     - 消息处理时: 构建上下文时会包含记忆内容
+    - 文件内容按 (mtime_ns, size) 缓存，未变化时只需一次 stat()
 
 与 Agent 的交互:
     - Agent 可以调用 append_today() 追加今天的笔记
@@ -30,12 +31,73 @@ NanoBot Memory Store - 记忆存储模块
 ================================================================================
 """
 
+import io
+import mmap
+import os
+from collections.abc import Iterator
 from pathlib import Path
-from datetime import datetime
+from datetime import datetime, timedelta
 
 from nanobot.utils.helpers import ensure_dir, today_date
 
 
+# 超过此大小的记忆文件通过 mmap 读取
+_MMAP_THRESHOLD = 64 * 1024
+
+
+def _read_text(path: Path, size: int) -> str:
+    """
+    读取 UTF-8 文本文件
+    
+    参数:
+        path: Path，文件路径
+        size: int，stat() 得到的文件大小
+    
+    返回:
+        str，文件内容
+    
+    说明:
+        - 小文件用 read_bytes() 一次读入，不经过 TextIOWrapper/BufferedReader
+        - 大文件直接从 mmap 映射的页缓存解码，省去先复制到 bytes 再解码的一次拷贝
+        - 与 read_text() 一样把 \r\n 和 \r 统一为 \n
+        - stat() 之后文件被截断为 0 字节时 mmap 会抛出 ValueError，此时回退到 read_bytes()
+    """
+    text = None
+    if size >= _MMAP_THRESHOLD:
+        with open(path, "rb") as f:
+            try:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    text = str(mm, "utf-8")
+            except ValueError:
+                pass
+    if text is None:
+        text = path.read_bytes().decode("utf-8")
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text
+
+
+def _is_date_md(name: str) -> bool:
+    """
+    判断文件名是否为每日笔记格式（YYYY-MM-DD.md）
+    
+    参数:
+        name: str，文件名
+    
+    返回:
+        bool，匹配时返回 True
+    """
+    return (
+        len(name) == 13
+        and name.endswith(".md")
+        and name[4] == "-"
+        and name[7] == "-"
+        and name[:4].isdigit()
+        and name[5:7].isdigit()
+        and name[8:10].isdigit()
+    )
+
+
 class MemoryStore:
     """
     ========================================================================
@@ -60,6 +122,7 @@ class MemoryStore:
         - get_memory_context(): 获取所有记忆（用于上下文构建）
         - get_recent_memories(): 获取最近 N 天的记忆
         - list_memory_files(): 列出所有记忆文件
+        - iter_memory_files(): 惰性遍历记忆文件（不排序）
     
     ========================================================================
     """
@@ -79,6 +142,13 @@ class MemoryStore:
         self.workspace = workspace
         self.memory_dir = ensure_dir(workspace / "memory")
         self.memory_file = self.memory_dir / "MEMORY.md"
+        
+        # 今天的日期和对应的笔记路径，日期变化时重建
+        self._today_date: str | None = None
+        self._today_file: Path | None = None
+        
+        # 文件内容缓存：路径 -> (mtime_ns, size, 内容)
+        self._file_cache: dict[Path, tuple[int, int, str]] = {}
     
     def get_today_file(self) -> Path:
         """
@@ -94,7 +164,50 @@ class MemoryStore:
             today_file = memory_store.get_today_file()
             print(f"今天的笔记: {today_file}")
         """
-        return self.memory_dir / f"{today_date()}.md"
+        return self._today_path(today_date())
+    
+    def _today_path(self, date: str) -> Path:
+        """
+        根据已计算好的日期字符串返回笔记路径（同一天内复用同一个 Path）
+        
+        参数:
+            date: str，YYYY-MM-DD 格式的日期
+        
+        返回:
+            Path，该日期记忆文件的完整路径
+        """
+        if date != self._today_date:
+            self._today_date = date
+            self._today_file = self.memory_dir / f"{date}.md"
+        return self._today_file
+    
+    def _read_cached(self, path: Path) -> str:
+        """
+        读取文件内容，文件未变化时返回缓存
+        
+        参数:
+            path: Path，要读取的文件
+        
+        返回:
+            str，文件内容；文件不存在时返回空字符串
+        
+        缓存策略:
+            以 (st_mtime_ns, st_size) 判断文件是否变化，
+            命中时只有一次 stat() 系统调用，不打开文件
+        """
+        # EAFP：不做 exists() 预检查，文件在 stat 与读取之间被删除也按不存在处理
+        try:
+            st = os.stat(path)
+            cached = self._file_cache.get(path)
+            if cached is not None and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+                return cached[2]
+            text = _read_text(path, st.st_size)
+        except FileNotFoundError:
+            self._file_cache.pop(path, None)
+            return ""
+        
+        self._file_cache[path] = (st.st_mtime_ns, st.st_size, text)
+        return text
     
     def read_today(self) -> str:
         """
@@ -113,12 +226,19 @@ class MemoryStore:
             if today_notes:
                 print(f"今天的笔记: {today_notes[:100]}...")
         """
-        today_file = self.get_today_file()
+        return self._read_today_with_date(today_date())
+    
+    def _read_today_with_date(self, date: str) -> str:
+        """
+        读取指定日期的笔记（调用方已计算好日期，避免重复 datetime.now()）
+        
+        参数:
+            date: str，YYYY-MM-DD 格式的日期
         
-        # 检查文件是否存在
-        if today_file.exists():
-            return today_file.read_text(encoding="utf-8")
-        return ""
+        返回:
+            str，笔记内容；文件不存在时返回空字符串
+        """
+        return self._read_cached(self._today_path(date))
     
     def append_today(self, content: str) -> None:
         """
@@ -129,10 +249,10 @@ class MemoryStore:
             - 保存临时但重要的信息
         
         处理逻辑:
-            1. 检查今天的文件是否存在
-            2. 如果存在，读取现有内容
-            3. 在末尾追加新内容
-            4. 如果不存在，创建新文件（自动添加日期标题）
+            1. 以追加模式打开今天的文件（不存在时创建）
+            2. 如果是空文件，先写入日期标题
+            3. 否则写入换行符分隔
+            4. 在末尾写入新内容（只写入增量，不重写整个文件）
         
         参数:
             content: str，要追加的内容
@@ -147,17 +267,19 @@ class MemoryStore:
         """
         today_file = self.get_today_file()
         
-        if today_file.exists():
-            # 文件存在，读取并追加
-            existing = today_file.read_text(encoding="utf-8")
-            content = existing + "\n" + content
-        else:
-            # 新文件，添加日期标题
-            header = f"# {today_date()}\n\n"
-            content = header + content
-        
-        # 写入文件
-        today_file.write_text(content, encoding="utf-8")
+        # 追加模式（O_APPEND）只写入新增内容，不读取和重写已有内容
+        # 二进制模式跳过文本层，分隔符和内容一次 writelines 写出，不拼接中间字符串
+        with open(today_file, "ab") as f:
+            if f.tell() == 0:
+                # 新文件，添加日期标题
+                prefix = f"# {self._today_date}\n\n".encode("utf-8")
+            else:
+                # 使用换行符分隔现有内容和新内容
+                prefix = b"\n"
+            f.writelines((prefix, content.encode("utf-8")))
+        
+        # 同一时间戳精度内的写入不一定改变 mtime，主动失效缓存
+        self._file_cache.pop(today_file, None)
     
     def read_long_term(self) -> str:
         """
@@ -180,9 +302,7 @@ class MemoryStore:
         使用示例:
             long_term = memory_store.read_long_term()
         """
-        if self.memory_file.exists():
-            return self.memory_file.read_text(encoding="utf-8")
-        return ""
+        return self._read_cached(self.memory_file)
     
     def write_long_term(self, content: str) -> None:
         """
@@ -211,6 +331,7 @@ class MemoryStore:
             - 确保内容完整后再调用此方法
         """
         self.memory_file.write_text(content, encoding="utf-8")
+        self._file_cache.pop(self.memory_file, None)
     
     def get_recent_memories(self, days: int = 7) -> str:
         """
@@ -224,10 +345,10 @@ class MemoryStore:
             days: int，回溯的天数，默认为 7 天
         
         处理逻辑:
-            1. 从今天开始，往回遍历 N 天
-            2. 检查每天的文件是否存在
-            3. 读取存在的文件内容
-            4. 使用分隔符连接所有内容
+            1. 扫描一次 memory 目录，得到已存在的笔记文件名集合
+            2. 从今天开始，往回遍历 N 天
+            3. 只读取集合中存在的文件
+            4. 依次写入 StringIO，用分隔符连接所有内容
         
         返回:
             str，所有近期记忆的合并内容
@@ -236,25 +357,45 @@ class MemoryStore:
             # 获取过去 3 天的记忆
             recent = memory_store.get_recent_memories(days=3)
         """
-        from datetime import timedelta
-        
-        memories = []
+        buf = io.StringIO()
         today = datetime.now().date()
         
-        # 遍历最近 N 天
+        # 一次目录扫描得到所有存在的笔记，避免逐天探测不存在的文件
+        existing = {path.name for path in self.iter_memory_files()}
+        
+        # 遍历最近 N 天（从今天开始，最新的在前），边读边写入缓冲区
         for i in range(days):
-            date = today - timedelta(days=i)
-            date_str = date.strftime("%Y-%m-%d")
-            file_path = self.memory_dir / f"{date_str}.md"
-            
-            if file_path.exists():
-                content = file_path.read_text(encoding="utf-8")
-                memories.append(content)
+            name = f"{(today - timedelta(days=i)).strftime('%Y-%m-%d')}.md"
+            if name in existing:
+                content = self._read_cached(self.memory_dir / name)
+                if content:
+                    # 使用分隔符连接
+                    if buf.tell():
+                        buf.write("\n\n---\n\n")
+                    buf.write(content)
+        
+        return buf.getvalue()
+    
+    def iter_memory_files(self) -> Iterator[Path]:
+        """
+        惰性遍历所有记忆文件（不排序）
         
-        # 使用分隔符连接
-        return "\n\n---\n\n".join(memories)
+        用途:
+            - 只需过滤或查找、不关心顺序的调用方
+            - 可以提前停止遍历
+        
+        返回:
+            Iterator[Path]，目录顺序的每日笔记路径
+        """
+        try:
+            with os.scandir(self.memory_dir) as it:
+                for entry in it:
+                    if _is_date_md(entry.name):
+                        yield Path(entry.path)
+        except FileNotFoundError:
+            return
     
-    def list_memory_files(self) -> list[Path]:
+    def list_memory_files(self, sort: bool = True) -> list[Path]:
         """
         列出所有记忆文件
         
@@ -262,25 +403,25 @@ class MemoryStore:
             - 查看历史记忆
             - 清理旧文件
         
+        参数:
+            sort: bool，是否按日期降序排列，默认为 True
+        
         返回:
             list[Path]，所有记忆文件的路径列表
-            按日期降序排列（最新的在前）
+            sort 为 True 时按日期降序排列（最新的在前）
         
         使用示例:
             files = memory_store.list_memory_files()
             for f in files:
                 print(f.name)
         """
-        if not self.memory_dir.exists():
-            return []
-        
-        # 查找所有日期格式的文件
-        files = list(self.memory_dir.glob("????-??-??.md"))
-        
-        # 按日期降序排列
-        return sorted(files, reverse=True)
+        files = list(self.iter_memory_files())
+        if sort:
+            # ISO 日期的字典序即时间顺序
+            files.sort(key=lambda p: p.name, reverse=True)
+        return files
     
-    def get_memory_context(self) -> str:
+    def get_memory_context(self, date: str | None = None) -> str:
         """
         获取完整的记忆上下文（用于构建系统提示词）
         
@@ -299,6 +440,11 @@ class MemoryStore:
             ## Today's Notes
             [今天的内容]
         
+        参数:
+            date: str | None，今天的日期（YYYY-MM-DD）
+                调用方已计算过日期时传入，避免重复 datetime.now()，
+                也保证与调用方的缓存键使用同一天
+        
         返回:
             str，格式化的记忆上下文
             如果没有任何记忆，返回空字符串
@@ -315,8 +461,8 @@ class MemoryStore:
         if long_term:
             parts.append("## Long-term Memory\n" + long_term)
         
-        # 2. 今天的笔记
-        today = self.read_today()
+        # 2. 今天的笔记（日期只计算一次）
+        today = self._read_today_with_date(date or today_date())
         if today:
             parts.append("## Today's Notes\n" + today)
         
@@ -56,11 +56,27 @@ import os
 import re
 import shutil
 from pathlib import Path
+from typing import Iterator
+from xml.etree.ElementTree import Element, SubElement, indent, tostring
+
+# 可选依赖（speedups extra 中的 pyyaml）：PyYAML 完整解析 frontmatter（支持嵌套的 metadata.nanobot 结构）
+# 未安装时回退到逐行 `key: value` 解析（metadata 需写成单行 JSON）
+try:
+    import yaml
+except ImportError:
+    yaml = None
 
 # 内置技能目录常量
 # 相对于当前文件的位置
 BUILTIN_SKILLS_DIR = Path(__file__).parent.parent / "skills"
 
+# SKILL.md 开头的 frontmatter 块（group(1) 为 --- 之间的内容）
+# 去除 frontmatter 和解析元数据共用，模块加载时编译一次
+_FRONTMATTER_RE = re.compile(r"^---\n(.*?)\n---(?:\n|$)", re.DOTALL)
+
+# frontmatter 中的 `key: value` 行（无 PyYAML 时的回退解析）
+_META_LINE_RE = re.compile(r"^([^:\n]+):[ \t]*(.*?)[ \t]*$", re.MULTILINE)
+
 
 class SkillsLoader:
     """
@@ -96,10 +112,17 @@ class SkillsLoader:
             1. 保存工作空间路径
             2. 确定工作空间技能目录
             3. 确定内置技能目录
+            4. 初始化 SKILL.md 内容/元数据缓存和 CLI 命令查找缓存
         """
         self.workspace = workspace
         self.workspace_skills = workspace / "skills"
         self.builtin_skills = builtin_skills_dir or BUILTIN_SKILLS_DIR
+        # SKILL.md 路径 -> (mtime_ns, 解析后的 frontmatter)
+        self._meta_cache: dict[Path, tuple[int, dict | None]] = {}
+        # SKILL.md 路径 -> (mtime_ns, size, 文件内容)
+        self._text_cache: dict[Path, tuple[int, int, str]] = {}
+        # CLI 命令名 -> shutil.which 结果（每次查找都要遍历 PATH 中的所有目录）
+        self._which_cache: dict[str, str | None] = {}
     
     def list_skills(self, filter_unavailable: bool = True) -> list[dict[str, str]]:
         """
@@ -132,32 +155,27 @@ class SkillsLoader:
         # ====================================================================
         # 1. 工作空间技能（高优先级）
         # ====================================================================
-        if self.workspace_skills.exists():
-            for skill_dir in self.workspace_skills.iterdir():
-                if skill_dir.is_dir():
-                    skill_file = skill_dir / "SKILL.md"
-                    if skill_file.exists():
-                        skills.append({
-                            "name": skill_dir.name,
-                            "path": str(skill_file),
-                            "source": "workspace"
-                        })
+        for name, skill_file in self._scan_skill_dirs(self.workspace_skills):
+            skills.append({
+                "name": name,
+                "path": str(skill_file),
+                "source": "workspace"
+            })
         
         # ====================================================================
         # 2. 内置技能（低优先级）
         # ====================================================================
-        if self.builtin_skills and self.builtin_skills.exists():
-            for skill_dir in self.builtin_skills.iterdir():
-                if skill_dir.is_dir():
-                    skill_file = skill_dir / "SKILL.md"
-                    # 避免重复添加（工作空间有同名技能时）
-                    if (skill_file.exists() and 
-                        not any(s["name"] == skill_dir.name for s in skills)):
-                        skills.append({
-                            "name": skill_dir.name,
-                            "path": str(skill_file),
-                            "source": "builtin"
-                        })
+        if self.builtin_skills:
+            seen = {s["name"] for s in skills}
+            for name, skill_file in self._scan_skill_dirs(self.builtin_skills):
+                # 避免重复添加（工作空间有同名技能时）
+                if name not in seen:
+                    seen.add(name)
+                    skills.append({
+                        "name": name,
+                        "path": str(skill_file),
+                        "source": "builtin"
+                    })
         
         # ====================================================================
         # 3. 按需求过滤
@@ -169,6 +187,31 @@ class SkillsLoader:
                     )]
         return skills
     
+    @staticmethod
+    def _scan_skill_dirs(root: Path) -> Iterator[tuple[str, Path]]:
+        """
+        遍历技能目录下包含 SKILL.md 的子目录
+        
+        实现方式:
+            使用 os.scandir，DirEntry.is_dir() 复用目录读取时得到的类型信息，
+            普通目录无需再逐个 stat
+        
+        参数:
+            root: Path，技能根目录（不存在时不产出任何内容）
+        
+        返回:
+            Iterator[tuple[str, Path]]，(技能名称, SKILL.md 路径)
+        """
+        try:
+            with os.scandir(root) as it:
+                for entry in it:
+                    if entry.is_dir():
+                        skill_file = Path(entry.path, "SKILL.md")
+                        if skill_file.exists():
+                            yield entry.name, skill_file
+        except (FileNotFoundError, NotADirectoryError):
+            return
+    
     def load_skill(self, name: str) -> str | None:
         """
         加载指定技能的内容
@@ -190,16 +233,56 @@ class SkillsLoader:
             if python_skill:
                 print(python_skill[:100])
         """
+        path = self._skill_path(name)
+        return self._read_cached(path) if path else None
+    
+    def _read_cached(self, path: Path) -> str | None:
+        """
+        读取 SKILL.md 内容，文件未变化时返回缓存
+        
+        缓存策略:
+            以 (st_mtime_ns, st_size) 判断文件是否变化，
+            命中时只有一次 stat() 系统调用，不打开文件
+        
+        参数:
+            path: Path，SKILL.md 路径
+        
+        返回:
+            str | None，文件内容；文件不存在时返回 None
+        """
+        try:
+            st = os.stat(path)
+            cached = self._text_cache.get(path)
+            if cached is not None and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+                return cached[2]
+            text = path.read_text(encoding="utf-8")
+        except FileNotFoundError:
+            self._text_cache.pop(path, None)
+            return None
+        
+        self._text_cache[path] = (st.st_mtime_ns, st.st_size, text)
+        return text
+    
+    def _skill_path(self, name: str) -> Path | None:
+        """
+        定位技能的 SKILL.md 文件（工作空间优先，其次内置）
+        
+        参数:
+            name: str，技能名称
+        
+        返回:
+            Path | None，SKILL.md 路径，不存在时返回 None
+        """
         # 首先检查工作空间
         workspace_skill = self.workspace_skills / name / "SKILL.md"
         if workspace_skill.exists():
-            return workspace_skill.read_text(encoding="utf-8")
+            return workspace_skill
         
         # 检查内置技能
         if self.builtin_skills:
             builtin_skill = self.builtin_skills / name / "SKILL.md"
             if builtin_skill.exists():
-                return builtin_skill.read_text(encoding="utf-8")
+                return builtin_skill
         
         return None
     
@@ -215,10 +298,9 @@ class SkillsLoader:
             skill_names: list[str]，要加载的技能名称列表
         
         处理逻辑:
-            1. 遍历每个技能名称
-            2. 加载技能内容
-            3. 去除 frontmatter
-            4. 用分隔符连接
+            1. 按顺序加载每个技能内容（load_skill 按 mtime 缓存，通常不读磁盘）
+            2. 去除 frontmatter
+            3. 用分隔符连接
         
         返回:
             str，格式化的技能内容
@@ -276,35 +358,42 @@ class SkillsLoader:
         if not all_skills:
             return ""
         
-        def escape_xml(s: str) -> str:
-            """转义 XML 特殊字符"""
-            return s.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
-        
-        lines = ["<skills>"]
+        # 使用 ElementTree 构建，文本转义在序列化时由 C 加速模块完成
+        root = Element("skills")
         
         for s in all_skills:
-            name = escape_xml(s["name"])
-            path = s["path"]
-            desc = escape_xml(self._get_skill_description(s["name"]))
-            skill_meta = self._get_skill_meta(s["name"])
-            available = self._check_requirements(skill_meta)
+            # 每个 SKILL.md 只解析一次，描述、可用性和缺失需求都来自同一份记录
+            desc, available, missing = self._load_skill_record(s["name"], Path(s["path"]))
             
-            lines.append(f'  <skill available="{str(available).lower()}">')
-            lines.append(f"    <name>{name}</name>")
-            lines.append(f"    <description>{desc}</description>")
-            lines.append(f"    <location>{path}</location>")
+            skill = SubElement(root, "skill", available=str(available).lower())
+            SubElement(skill, "name").text = s["name"]
+            SubElement(skill, "description").text = desc
+            SubElement(skill, "location").text = s["path"]
             
             # 显示不可用技能的需求
-            if not available:
-                missing = self._get_missing_requirements(skill_meta)
-                if missing:
-                    lines.append(f"    <requires>{escape_xml(missing)}</requires>")
-            
-            lines.append(f"  </skill>")
+            if missing:
+                SubElement(skill, "requires").text = missing
+        
+        indent(root, space="  ")
+        return tostring(root, encoding="unicode")
+    
+    def _load_skill_record(self, name: str, path: Path) -> tuple[str, bool, str]:
+        """
+        一次性获取技能摘要所需的全部信息
         
-        lines.append("</skills>")
+        参数:
+            name: str，技能名称
+            path: Path，SKILL.md 路径
         
-        return "\n".join(lines)
+        返回:
+            tuple[str, bool, str]，(描述, 是否可用, 缺失需求描述)
+        """
+        meta = self._metadata_for_path(path) or {}
+        desc = str(meta["description"]) if meta.get("description") else name
+        missing = self._get_missing_requirements(
+            self._parse_nanobot_metadata(meta.get("metadata", ""))
+        )
+        return desc, not missing, missing
     
     def _get_missing_requirements(self, skill_meta: dict) -> str:
         """
@@ -325,7 +414,7 @@ class SkillsLoader:
         
         # 检查 CLI 命令
         for b in requires.get("bins", []):
-            if not shutil.which(b):
+            if not self._which(b):
                 missing.append(f"CLI: {b}")
         
         # 检查环境变量
@@ -335,22 +424,29 @@ class SkillsLoader:
         
         return ", ".join(missing)
     
-    def _get_skill_description(self, name: str) -> str:
+    def _which(self, binary: str) -> str | None:
         """
-        获取技能的描述
-        
-        优先从 frontmatter 的 description 字段获取
+        查找 CLI 命令路径（结果在加载器生命周期内缓存）
         
         参数:
-            name: str，技能名称
+            binary: str，命令名称
         
         返回:
-            str，技能描述
+            str | None，命令的完整路径，不存在时返回 None
         """
-        meta = self.get_skill_metadata(name)
-        if meta and meta.get("description"):
-            return meta["description"]
-        return name
+        if binary not in self._which_cache:
+            self._which_cache[binary] = shutil.which(binary)
+        return self._which_cache[binary]
+    
+    def invalidate_which_cache(self) -> None:
+        """
+        清空 CLI 命令查找缓存
+        
+        用途:
+            长时间运行的 Agent 在安装新命令或修改 PATH 后调用，
+            使技能可用性重新检测
+        """
+        self._which_cache.clear()
     
     def _strip_frontmatter(self, content: str) -> str:
         """
@@ -371,12 +467,12 @@ class SkillsLoader:
             str，去除 frontmatter 后的内容
         """
         if content.startswith("---"):
-            match = re.match(r"^---\n.*?\n---\n", content, re.DOTALL)
+            match = _FRONTMATTER_RE.match(content)
             if match:
                 return content[match.end():].strip()
         return content
     
-    def _parse_nanobot_metadata(self, raw: str) -> dict:
+    def _parse_nanobot_metadata(self, raw: dict | str) -> dict:
         """
         解析 frontmatter 中的 nanobot 元数据
         
@@ -388,16 +484,23 @@ class SkillsLoader:
                   bins: [cmd1, cmd2]
         
         参数:
-            raw: str，metadata 字段的原始内容
+            raw: dict | str，metadata 字段的内容
+                - dict: YAML 已解析的嵌套结构
+                - str: 单行 JSON（无 PyYAML 时的回退格式）
         
         返回:
             dict，解析后的 nanobot 元数据
         """
-        try:
-            data = json.loads(raw)
-            return data.get("nanobot", {}) if isinstance(data, dict) else {}
-        except (json.JSONDecodeError, TypeError):
+        data = raw
+        if isinstance(raw, str):
+            try:
+                data = json.loads(raw)
+            except (json.JSONDecodeError, TypeError):
+                return {}
+        if not isinstance(data, dict):
             return {}
+        nanobot = data.get("nanobot")
+        return nanobot if isinstance(nanobot, dict) else {}
     
     def _check_requirements(self, skill_meta: dict) -> bool:
         """
@@ -417,7 +520,7 @@ class SkillsLoader:
         
         # 检查 CLI 命令
         for b in requires.get("bins", []):
-            if not shutil.which(b):
+            if not self._which(b):
                 return False
         
         # 检查环境变量
@@ -470,7 +573,7 @@ class SkillsLoader:
     
     def get_skill_metadata(self, name: str) -> dict | None:
         """
-        获取技能的完整元数据
+        获取技能的完整元数据（按 SKILL.md 的 mtime 缓存）
         
         从 frontmatter 解析:
             ---
@@ -479,25 +582,76 @@ class SkillsLoader:
             metadata: {...}
             ---
         
+        缓存策略:
+            以 SKILL.md 路径为键，记录 mtime_ns 与解析结果；
+            文件未修改时直接返回缓存，不再读取和解析
+        
         参数:
             name: str，技能名称
         
         返回:
             dict | None，解析后的元数据
         """
-        content = self.load_skill(name)
-        if not content:
+        path = self._skill_path(name)
+        return self._metadata_for_path(path) if path else None
+    
+    def _metadata_for_path(self, path: Path) -> dict | None:
+        """
+        读取并解析指定 SKILL.md 的 frontmatter（按 mtime 缓存）
+        
+        参数:
+            path: Path，SKILL.md 路径
+        
+        返回:
+            dict | None，解析后的元数据
+        """
+        try:
+            mtime = path.stat().st_mtime_ns
+        except FileNotFoundError:
             return None
         
-        # 解析 frontmatter
-        if content.startswith("---"):
-            match = re.match(r"^---\n(.*?)\n---", content, re.DOTALL)
-            if match:
-                metadata = {}
-                for line in match.group(1).split("\n"):
-                    if ":" in line:
-                        key, value = line.split(":", 1)
-                        metadata[key.strip()] = value.strip().strip('"\'')
-                return metadata
-        
-        return None
\ No newline at end of file
+        cached = self._meta_cache.get(path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        
+        content = self._read_cached(path)
+        if content is None:
+            return None
+        metadata = self._parse_frontmatter(content)
+        self._meta_cache[path] = (mtime, metadata)
+        return metadata
+    
+    def _parse_frontmatter(self, content: str) -> dict | None:
+        """
+        解析 Markdown 内容开头的 YAML frontmatter
+        
+        解析方式:
+            1. 安装了 PyYAML 时使用 yaml.safe_load（支持嵌套结构）
+            2. 未安装或 YAML 语法错误时回退到逐行 `key: value` 解析
+        
+        参数:
+            content: str，完整的 Markdown 内容
+        
+        返回:
+            dict | None，解析后的元数据，没有 frontmatter 时返回 None
+        """
+        if not content.startswith("---"):
+            return None
+        match = _FRONTMATTER_RE.match(content)
+        if not match:
+            return None
+        block = match.group(1)
+        
+        if yaml is not None:
+            try:
+                data = yaml.safe_load(block)
+            except yaml.YAMLError:
+                data = None
+            if isinstance(data, dict):
+                return data
+        
+        # 回退解析：一次 findall 取出所有 `key: value` 行
+        return {
+            key.strip(): value.strip().strip('"\'')
+            for key, value in _META_LINE_RE.findall(block)
+        }
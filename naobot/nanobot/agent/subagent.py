@@ -31,21 +31,78 @@ Subagent Manager - 子代理管理器模块
 
 import asyncio
 import json
-import uuid
+import secrets
+import time
+from collections import OrderedDict, namedtuple
+from concurrent.futures import Executor
 from pathlib import Path
 from typing import Any
 
 from loguru import logger
 
 from nanobot.bus.events import InboundMessage
+from nanobot.config.schema import ExecToolConfig
 from nanobot.bus.queue import MessageBus
-from nanobot.providers.base import LLMProvider
+from nanobot.providers.base import LLMProvider, ToolCallRequest
 from nanobot.agent.tools.registry import ToolRegistry
 from nanobot.agent.tools.filesystem import ReadFileTool, WriteFileTool, ListDirTool
-from nanobot.agent.tools.shell import ExecTool
+from nanobot.agent.tools.shell import EXEC_TIMEOUT_GRACE, ExecTool
 from nanobot.agent.tools.web import WebSearchTool, WebFetchTool
 
 
+# 结果公告的结尾提示（固定文本，只创建一次）
+_ANNOUNCE_FOOTER = (
+    "\n\nSummarize this naturally for the user. Keep it brief (1-2 sentences). "
+    'Do not mention technical details like "subagent" or task IDs.'
+)
+
+# 自动生成的显示标签最多保留的任务描述字符数
+_LABEL_MAX = 30
+
+# 结果公告的目的地（spawn 时构建一次，chat_key 预先拼好 "channel:chat_id"）
+Origin = namedtuple("Origin", "channel chat_id chat_key")
+
+# 子代理系统提示词模板（模块加载时创建一次，每次 spawn 只做 format 填充）
+_SUBAGENT_PROMPT_TMPL = """# Subagent
+
+You are a subagent spawned by the main agent to complete a specific task.
+
+## Your Task
+{task}
+
+## Rules
+1. Stay focused - complete only the assigned task, nothing else
+2. Your final response will be reported back to the main agent
+3. Do not initiate conversations or take on side tasks
+4. Be concise but informative in your findings
+
+## What You Can Do
+- Read and write files in the workspace
+- Execute shell commands
+- Search the web and fetch web pages
+- Complete the task thoroughly
+
+## What You Cannot Do
+- Send messages directly to users (no message tool available)
+- Spawn other subagents
+- Access the main agent's conversation history
+
+## Workspace
+Your workspace is at: {workspace}
+
+When you have completed the task, provide a clear summary of your findings or actions."""
+
+# 每个子代理缓存的只读工具调用结果条数上限
+_RESULT_CACHE_SIZE = 128
+
+
+def _truncate_result(text: str, limit: int) -> str:
+    """截断超长的工具结果（limit <= 0 时不截断），末尾注明被截掉的字符数"""
+    if limit <= 0 or len(text) <= limit:
+        return text
+    return f"{text[:limit]}\n... (truncated, {len(text) - limit} more chars)"
+
+
 class SubagentManager:
     """
     ========================================================================
@@ -83,11 +140,21 @@ class SubagentManager:
         - brave_api_key: Brave 搜索引擎 API Key
         - exec_config: Shell 执行配置
         - restrict_to_workspace: 是否限制在 workspace 内操作
-        - _running_tasks: 正在运行的子代理任务字典
+        - _running_tasks: 已启动（运行中或排队中）的子代理任务字典
+        - _concurrency: 限制同时运行子代理数量的信号量
+        - _reaper: 取消超时子代理的后台清理任务
     
     ========================================================================
     """
     
+    # 固定属性集合：实例不带 __dict__，属性访问走 slot 描述符
+    __slots__ = (
+        "provider", "workspace", "_workspace_str", "bus", "model", "brave_api_key",
+        "exec_config", "restrict_to_workspace", "_running_tasks", "_concurrency",
+        "_started_at", "max_runtime", "reap_interval", "_reaper", "_reaped",
+        "llm_timeout", "max_tool_result_chars", "_executor", "_tools", "_tool_defs",
+    )
+    
     def __init__(
         self,
         provider: LLMProvider,
@@ -95,8 +162,14 @@ class SubagentManager:
         bus: MessageBus,
         model: str | None = None,
         brave_api_key: str | None = None,
-        exec_config: "ExecToolConfig | None" = None,
+        exec_config: ExecToolConfig | None = None,
         restrict_to_workspace: bool = False,
+        max_concurrent: int = 4,
+        max_runtime: float = 600.0,
+        reap_interval: float = 5.0,
+        llm_timeout: float = 120.0,
+        max_tool_result_chars: int = 8192,
+        executor: Executor | None = None,
     ):
         """
         初始化子代理管理器
@@ -109,6 +182,16 @@ class SubagentManager:
             brave_api_key: str 或 None，Brave 搜索引擎 API Key
             exec_config: ExecToolConfig 或 None，Shell 执行配置
             restrict_to_workspace: bool，是否限制文件操作在 workspace 内
+            max_concurrent: int，同时运行的子代理上限，超出的任务排队等待
+            max_runtime: float，单个子代理的最长运行时间（秒），超时由清理任务取消，
+                0 表示不限制
+            reap_interval: float，清理任务检查超时子代理的间隔（秒）
+            llm_timeout: float，单次 LLM 调用的超时时间（秒），0 表示不限制；
+                单次工具调用的超时为 exec_config.timeout + EXEC_TIMEOUT_GRACE
+                （留出余量让 exec 工具先按自己的超时杀死子进程）
+            max_tool_result_chars: int，写入消息历史的单个工具结果最大字符数，0 表示不截断
+            executor: Executor 或 None，运行同步工具的共享线程池
+                （AgentLoop 传入自己的工具线程池，主 Agent 与所有子代理共用）
         
         初始化过程:
             1. 保存 LLM 提供者引用
@@ -117,14 +200,15 @@ class SubagentManager:
             4. 确定使用的模型
             5. 保存其他配置
             6. 初始化运行任务字典
+            7. 构建共享的工具集和工具定义
         """
-        from nanobot.config.schema import ExecToolConfig
         
         # 保存 LLM 提供者引用
         self.provider = provider
         
-        # 保存工作空间路径
+        # 保存工作空间路径（字符串形式缓存一份，用于提示词和 ExecTool）
         self.workspace = workspace
+        self._workspace_str = str(workspace)
         
         # 保存消息总线引用，用于将结果传回主 Agent
         self.bus = bus
@@ -144,6 +228,69 @@ class SubagentManager:
         # 正在运行的子代理任务字典
         # key: 任务 ID，value: asyncio.Task
         self._running_tasks: dict[str, asyncio.Task[None]] = {}
+        
+        # 并发上限：每个运行中的子代理都占用 LLM 会话和工具资源，
+        # 超出上限的任务在信号量上排队，而不是同时向提供者发起请求
+        self._concurrency = asyncio.Semaphore(max(1, max_concurrent))
+        # 已拿到信号量、正在执行的子代理开始运行的时间（monotonic），其余为排队中
+        self._started_at: dict[str, float] = {}
+        
+        # 僵尸清理：定期取消运行时间超过 max_runtime 的子代理
+        # （提供者调用挂起或工具死循环时，任务不会永远占着并发名额）
+        self.max_runtime = max_runtime
+        self.reap_interval = reap_interval
+        self._reaper: asyncio.Task[None] | None = None
+        self._reaped: set[str] = set()
+        
+        # 单次调用超时：LLM 调用超时视为子代理失败（尽快公告），
+        # 工具调用超时则作为工具结果返回给 LLM，由它决定如何继续
+        self.llm_timeout = llm_timeout
+        
+        # 工具结果会在后续每一轮都发送给 LLM，超长结果（网页、命令输出）先截断再写入历史
+        self.max_tool_result_chars = max_tool_result_chars
+        
+        # 子代理工具集：工具只持有构造时的配置、没有按任务变化的状态，
+        # 所有子代理共用同一个注册表和同一份工具定义列表
+        self._executor = executor
+        self._tools = self._build_tools()
+        self._tool_defs = self._tools.get_definitions()
+    
+    def _build_tools(self) -> ToolRegistry:
+        """
+        构建子代理专用的工具集
+        
+        工具集限制:
+            - ReadFileTool / WriteFileTool / ListDirTool: 文件操作
+            - ExecTool: 执行 Shell 命令
+            - WebSearchTool / WebFetchTool: 网络工具
+            - 无 message 工具（不能直接发送消息）
+            - 无 spawn 工具（不能嵌套启动）
+        
+        返回值:
+            ToolRegistry，注册好全部子代理工具的注册表
+        """
+        tools = ToolRegistry(executor=self._executor)
+        
+        # 确定允许操作的目录
+        allowed_dir = self.workspace if self.restrict_to_workspace else None
+        
+        # 注册文件操作工具
+        tools.register(ReadFileTool(allowed_dir=allowed_dir, executor=self._executor))
+        tools.register(WriteFileTool(allowed_dir=allowed_dir, executor=self._executor))
+        tools.register(ListDirTool(allowed_dir=allowed_dir, executor=self._executor))
+        
+        # 注册 Shell 执行工具
+        tools.register(ExecTool(
+            working_dir=self._workspace_str,
+            timeout=self.exec_config.timeout,
+            restrict_to_workspace=self.restrict_to_workspace,
+        ))
+        
+        # 注册网络工具
+        tools.register(WebSearchTool(api_key=self.brave_api_key))
+        tools.register(WebFetchTool())
+        
+        return tools
     
     async def spawn(
         self,
@@ -189,21 +336,19 @@ class SubagentManager:
             - 这是异步方法，需要 await 调用
             - 任务在后台运行，不会阻塞当前代码
         """
-        # 生成唯一的任务 ID（UUID 前 8 位）
-        task_id = str(uuid.uuid4())[:8]
+        # 生成唯一的任务 ID（8 位十六进制，只取 4 字节随机数）
+        task_id = secrets.token_hex(4)
         
         # 确定显示标签
-        display_label = label or task[:30] + ("..." if len(task) > 30 else "")
+        display_label = label or (task if len(task) <= _LABEL_MAX else f"{task[:_LABEL_MAX]}...")
         
         # 构建原始目的地信息
-        origin = {
-            "channel": origin_channel,
-            "chat_id": origin_chat_id,
-        }
+        origin = Origin(origin_channel, origin_chat_id, f"{origin_channel}:{origin_chat_id}")
         
-        # 创建后台任务
+        # 创建后台任务（任务命名便于调试和 asyncio 任务列表排查）
         bg_task = asyncio.create_task(
-            self._run_subagent(task_id, task, display_label, origin)
+            self._run_limited(task_id, task, display_label, origin),
+            name=f"subagent:{task_id}",
         )
         
         # 添加到运行任务字典
@@ -212,18 +357,76 @@ class SubagentManager:
         # 注册完成回调：任务完成后自动从字典中移除
         bg_task.add_done_callback(lambda _: self._running_tasks.pop(task_id, None))
         
+        # 按需启动僵尸清理任务（没有子代理时自行退出）
+        if self.max_runtime > 0 and (self._reaper is None or self._reaper.done()):
+            self._reaper = asyncio.create_task(self._reap_zombies(), name="subagent-reaper")
+        
         # 记录日志
         logger.info(f"Spawned subagent [{task_id}]: {display_label}")
         
         # 返回启动消息
         return f"Subagent [{display_label}] started (id: {task_id}). I'll notify you when it completes."
     
+    async def _run_limited(
+        self,
+        task_id: str,
+        task: str,
+        label: str,
+        origin: Origin,
+    ) -> None:
+        """
+        在并发上限内执行子代理
+        
+        功能描述:
+            先在 _concurrency 信号量上排队，拿到名额后才调用 _run_subagent()，
+            保证同时运行的子代理数量不超过 max_concurrent。
+        
+        参数说明:
+            与 _run_subagent() 相同
+        """
+        async with self._concurrency:
+            self._started_at[task_id] = time.monotonic()
+            try:
+                await self._run_subagent(task_id, task, label, origin)
+            except asyncio.CancelledError:
+                # 被清理任务取消：公告超时错误，让主 Agent 能通知用户
+                if task_id in self._reaped:
+                    await self._announce_result(
+                        task_id, label, task,
+                        f"Error: subagent exceeded the {self.max_runtime:g}s time limit and was stopped.",
+                        origin, "error",
+                    )
+                raise
+            finally:
+                self._started_at.pop(task_id, None)
+                self._reaped.discard(task_id)
+    
+    async def _reap_zombies(self) -> None:
+        """
+        定期取消运行时间超过 max_runtime 的子代理
+        
+        处理逻辑:
+            1. 每隔 reap_interval 秒检查一次正在运行的子代理
+            2. 运行时间超过 max_runtime 的任务标记为已清理并取消
+               （排队中的任务不计时，不会被清理）
+            3. 没有任何子代理时退出，下次 spawn 时重新启动
+        """
+        while self._running_tasks:
+            await asyncio.sleep(self.reap_interval)
+            deadline = time.monotonic() - self.max_runtime
+            for task_id, started in list(self._started_at.items()):
+                bg_task = self._running_tasks.get(task_id)
+                if started < deadline and bg_task is not None and task_id not in self._reaped:
+                    logger.warning(f"Subagent [{task_id}] exceeded {self.max_runtime:g}s, cancelling")
+                    self._reaped.add(task_id)
+                    bg_task.cancel()
+    
     async def _run_subagent(
         self,
         task_id: str,
         task: str,
         label: str,
-        origin: dict[str, str],
+        origin: Origin,
     ) -> None:
         """
         执行子代理的核心逻辑
@@ -235,24 +438,17 @@ class SubagentManager:
             task_id: str，任务的唯一标识
             task: str，需要完成的任务描述
             label: str，任务的易读标签
-            origin: dict，包含原始目的地信息（channel 和 chat_id）
+            origin: Origin，原始目的地信息（channel、chat_id 和 chat_key）
         
         处理流程:
-            1. 构建子代理专用的工具集
+            1. 取用共享的子代理工具集
             2. 构建子代理专用的系统提示词
             3. 执行 Agent 循环（最多 15 次迭代）
             4. 处理工具调用
             5. 公告结果回主 Agent
         
-        工具集限制:
-            - ReadFileTool: 读取文件
-            - WriteFileTool: 写入文件
-            - ListDirTool: 列出目录
-            - ExecTool: 执行 Shell 命令
-            - WebSearchTool: 网络搜索
-            - WebFetchTool: 网页抓取
-            - 无 message 工具（不能直接发送消息）
-            - 无 spawn 工具（不能嵌套启动）
+        工具集:
+            见 _build_tools()
         
         注意:
             - 这是内部方法，通过 spawn() 间接调用
@@ -263,40 +459,18 @@ class SubagentManager:
         
         try:
             # ====================================================================
-            # 1. 构建子代理工具集
-            # ====================================================================
-            tools = ToolRegistry()
-            
-            # 确定允许操作的目录
-            allowed_dir = self.workspace if self.restrict_to_workspace else None
-            
-            # 注册文件操作工具
-            tools.register(ReadFileTool(allowed_dir=allowed_dir))
-            tools.register(WriteFileTool(allowed_dir=allowed_dir))
-            tools.register(ListDirTool(allowed_dir=allowed_dir))
-            
-            # 注册 Shell 执行工具
-            tools.register(ExecTool(
-                working_dir=str(self.workspace),
-                timeout=self.exec_config.timeout,
-                restrict_to_workspace=self.restrict_to_workspace,
-            ))
-            
-            # 注册网络工具
-            tools.register(WebSearchTool(api_key=self.brave_api_key))
-            tools.register(WebFetchTool())
-            
-            # ====================================================================
-            # 2. 构建消息
+            # 1. 构建消息（工具集在 __init__ 中构建，所有子代理共用）
             # ====================================================================
             system_prompt = self._build_subagent_prompt(task)
+            # 只读工具调用结果缓存（仅在本子代理内有效）
+            result_cache: OrderedDict[tuple[str, str], str] = OrderedDict()
             messages: list[dict[str, Any]] = [
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": task},
             ]
             
             # ====================================================================
-            # 3. 执行 Agent 循环
+            # 2. 执行 Agent 循环
             # ====================================================================
             max_iterations = 15  # 子代理的最大迭代次数
             iteration = 0
@@ -306,14 +480,29 @@ class SubagentManager:
                 iteration += 1
                 
                 # 调用 LLM
-                response = await self.provider.chat(
-                    messages=messages,
-                    tools=tools.get_definitions(),
-                    model=self.model,
-                )
+                try:
+                    response = await asyncio.wait_for(
+                        self.provider.chat(
+                            messages=messages,
+                            tools=self._tool_defs,
+                            model=self.model,
+                        ),
+                        timeout=self.llm_timeout or None,
+                    )
+                except asyncio.TimeoutError:
+                    raise RuntimeError(f"LLM call timed out after {self.llm_timeout:g}s") from None
                 
                 # 如果有工具调用
                 if response.has_tool_calls:
+                    # 每个工具调用的参数只序列化一次（优先复用提供者返回的原始 JSON），
+                    # 助手消息和调试日志共用同一个字符串
+                    encoded = [
+                        (tc, tc.raw_arguments or json.dumps(
+                            tc.arguments, ensure_ascii=False, separators=(",", ":")
+                        ))
+                        for tc in response.tool_calls
+                    ]
+                    
                     # 构建工具调用字典
                     tool_call_dicts = [
                         {
@@ -321,10 +510,10 @@ class SubagentManager:
                             "type": "function",
                             "function": {
                                 "name": tc.name,
-                                "arguments": json.dumps(tc.arguments),
+                                "arguments": args_json,
                             },
                         }
-                        for tc in response.tool_calls
+                        for tc, args_json in encoded
                     ]
                     
                     # 添加助手消息（包含工具调用）
@@ -334,18 +523,14 @@ class SubagentManager:
                         "tool_calls": tool_call_dicts,
                     })
                     
-                    # 执行每个工具调用
-                    for tool_call in response.tool_calls:
-                        args_str = json.dumps(tool_call.arguments)
-                        logger.debug(f"Subagent [{task_id}] executing: {tool_call.name} with arguments: {args_str}")
-                        result = await tools.execute(tool_call.name, tool_call.arguments)
-                        
-                        # 添加工具结果
+                    # 执行本轮所有工具调用（只读工具并发），结果按调用顺序追加
+                    results = await self._execute_tool_calls(task_id, encoded, result_cache)
+                    for (tool_call, _), result in zip(encoded, results):
                         messages.append({
                             "role": "tool",
                             "tool_call_id": tool_call.id,
                             "name": tool_call.name,
-                            "content": result,
+                            "content": _truncate_result(result, self.max_tool_result_chars),
                         })
                 else:
                     # 没有工具调用，任务完成
@@ -368,13 +553,101 @@ class SubagentManager:
             logger.error(f"Subagent [{task_id}] failed: {e}")
             await self._announce_result(task_id, label, task, error_msg, origin, "error")
     
+    async def _execute_tool_calls(
+        self,
+        task_id: str,
+        encoded: list[tuple[ToolCallRequest, str]],
+        cache: OrderedDict[tuple[str, str], str] | None = None,
+    ) -> list[str]:
+        """
+        执行一轮 LLM 响应中的全部工具调用
+        
+        执行顺序（与主 Agent 共用 ToolRegistry.group_calls 的分组策略）:
+            - 连续的只读工具（read_file、list_dir、web_search、web_fetch）
+              彼此独立，归为一组并发执行，耗时取决于最慢的一个而不是总和
+            - 有副作用的工具（write_file、exec 等）可能互相依赖
+              （例如先写文件再执行），每个单独成组
+            - 组与组之间按原顺序执行，写操作之后的读取一定能看到写入结果
+        
+        结果缓存（cache 不为 None 时）:
+            - 同一子代理内参数完全相同的只读调用直接复用之前的结果，
+              同一组中的重复调用也只执行一次
+            - 执行有副作用的调用前清空缓存（文件或外部状态可能已经改变）
+            - 超过 _RESULT_CACHE_SIZE 条时淘汰最久未使用的条目
+        
+        参数说明:
+            task_id: str，任务 ID（用于日志）
+            encoded: list，(工具调用, 参数 JSON) 列表
+            cache: OrderedDict 或 None，本子代理的只读调用结果缓存
+        
+        返回值:
+            list[str]，与 encoded 顺序一致的工具结果
+        """
+        results: list[str] = [""] * len(encoded)
+        
+        async def run(index: int) -> None:
+            tool_call, args_json = encoded[index]
+            logger.debug(
+                "Subagent [{}] executing: {} with arguments: {}",
+                task_id, tool_call.name, args_json,
+            )
+            timeout = self.exec_config.timeout + EXEC_TIMEOUT_GRACE
+            try:
+                results[index] = await asyncio.wait_for(
+                    self._tools.execute(tool_call.name, tool_call.arguments),
+                    timeout=timeout,
+                )
+            except asyncio.TimeoutError:
+                # 不中断子代理：把超时作为工具结果交给 LLM，让它换个方式继续
+                results[index] = f"Error: Tool '{tool_call.name}' timed out after {timeout:g}s"
+        
+        for group in self._tools.group_calls([tc.name for tc, _ in encoded]):
+            if not self._tools.is_read_only(encoded[group[0]][0].name):
+                # 有副作用的调用单独成组
+                if cache is not None:
+                    cache.clear()
+                await run(group[0])
+                continue
+            
+            pending: list[int] = []
+            # 缓存键 -> 本组第一次出现的下标；重复的只读调用指向同一个下标
+            first_of: dict[tuple[str, str], int] = {}
+            duplicates: list[tuple[int, int]] = []
+            for i in group:
+                if cache is None:
+                    pending.append(i)
+                    continue
+                tc = encoded[i][0]
+                key = (tc.name, json.dumps(tc.arguments, sort_keys=True, separators=(",", ":"), default=str))
+                if key in cache:
+                    cache.move_to_end(key)
+                    results[i] = cache[key]
+                elif key in first_of:
+                    duplicates.append((i, first_of[key]))
+                else:
+                    first_of[key] = i
+                    pending.append(i)
+            
+            await asyncio.gather(*(run(i) for i in pending))
+            
+            for i, j in duplicates:
+                results[i] = results[j]
+            
+            if cache is not None:
+                for key, i in first_of.items():
+                    if not results[i].startswith("Error"):
+                        cache[key] = results[i]
+                while len(cache) > _RESULT_CACHE_SIZE:
+                    cache.popitem(last=False)
+        return results
+    
     async def _announce_result(
         self,
         task_id: str,
         label: str,
         task: str,
         result: str,
-        origin: dict[str, str],
+        origin: Origin,
         status: str,
     ) -> None:
         """
@@ -389,7 +662,7 @@ class SubagentManager:
             label: str，任务的易读标签
             task: str，原始任务描述
             result: str，子代理的执行结果
-            origin: dict，包含原始目的地信息
+            origin: Origin，原始目的地信息
             status: str，执行状态（"ok" 或 "error"）
         
         处理流程:
@@ -416,21 +689,17 @@ class SubagentManager:
         # 生成状态描述
         status_text = "completed successfully" if status == "ok" else "failed"
         
-        # 构建公告内容
-        announce_content = f"""[Subagent '{label}' {status_text}]
-
-Task: {task}
-
-Result:
-{result}
-
-Summarize this naturally for the user. Keep it brief (1-2 sentences). Do not mention technical details like "subagent" or task IDs."""
+        # 构建公告内容（result 可能很大，一次 join 拼接，不产生中间字符串）
+        announce_content = "".join((
+            "[Subagent '", label, "' ", status_text, "]\n\nTask: ", task,
+            "\n\nResult:\n", result, _ANNOUNCE_FOOTER,
+        ))
         
         # 注入为系统消息，触发主 Agent
         msg = InboundMessage(
             channel="system",
             sender_id="subagent",
-            chat_id=f"{origin['channel']}:{origin['chat_id']}",
+            chat_id=origin.chat_key,
             content=announce_content,
         )
         
@@ -438,7 +707,10 @@ Summarize this naturally for the user. Keep it brief (1-2 sentences). Do not men
         await self.bus.publish_inbound(msg)
         
         # 记录日志
-        logger.debug(f"Subagent [{task_id}] announced result to {origin['channel']}:{origin['chat_id']}")
+        # 参数交给 loguru 延迟格式化，DEBUG 被过滤时不拼接字符串
+        logger.debug(
+            "Subagent [{}] announced result to {}", task_id, origin.chat_key,
+        )
     
     def _build_subagent_prompt(self, task: str) -> str:
         """
@@ -465,34 +737,23 @@ Summarize this naturally for the user. Keep it brief (1-2 sentences). Do not men
         使用示例:
             prompt = manager._build_subagent_prompt("搜索最新的 AI 新闻")
         """
-        return f"""# Subagent
-
-You are a subagent spawned by the main agent to complete a specific task.
-
-## Your Task
-{task}
-
-## Rules
-1. Stay focused - complete only the assigned task, nothing else
-2. Your final response will be reported back to the main agent
-3. Do not initiate conversations or take on side tasks
-4. Be concise but informative in your findings
-
-## What You Can Do
-- Read and write files in the workspace
-- Execute shell commands
-- Search the web and fetch web pages
-- Complete the task thoroughly
-
-## What You Cannot Do
-- Send messages directly to users (no message tool available)
-- Spawn other subagents
-- Access the main agent's conversation history
-
-## Workspace
-Your workspace is at: {self.workspace}
-
-When you have completed the task, provide a clear summary of your findings or actions."""
+        return _SUBAGENT_PROMPT_TMPL.format(task=task, workspace=self._workspace_str)
+    
+    async def aclose(self) -> None:
+        """
+        取消所有子代理和清理任务，并等待它们结束
+        
+        用途:
+            Agent 循环退出时调用，让后台子代理有序结束，
+            而不是留到事件循环关闭时被强制销毁
+        """
+        tasks = list(self._running_tasks.values())
+        if self._reaper is not None:
+            tasks.append(self._reaper)
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._reaper = None
     
     def get_running_count(self) -> int:
         """
@@ -510,6 +771,15 @@ When you have completed the task, provide a clear summary of your findings or ac
         
         注意:
             - 这是同步方法，不需要 await
-            - 返回的是_tasks字典的长度
+            - 返回的是_tasks字典的长度（包含排队中的子代理，见 get_queued_count）
         """
         return len(self._running_tasks)
+    
+    def get_queued_count(self) -> int:
+        """
+        获取已启动但仍在排队（尚未拿到并发名额）的子代理数量
+        
+        返回值:
+            int，排队中的子代理数量
+        """
+        return len(self._running_tasks) - len(self._started_at)
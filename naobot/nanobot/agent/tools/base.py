@@ -25,11 +25,12 @@
   - execute：异步执行方法
   - validate_params：参数验证方法
   - to_schema：模式转换方法
+- ContextAwareTool：需要知道当前频道和聊天 ID 的工具协议（set_context）
 
 类型映射系统：
 - 支持 JSON Schema 类型到 Python 类型的映射转换
 - 自动验证参数类型是否符合预期
-- 支持复杂嵌套结构的递归验证
+- 支持复杂嵌套结构的逐层验证
 
 使用示例：
 ```python
@@ -74,7 +75,126 @@ class CustomTool(Tool):
 """
 
 from abc import ABC, abstractmethod
-from typing import Any
+from collections.abc import Mapping
+from types import MappingProxyType
+from typing import Any, Callable, Protocol
+
+# 可选依赖：fastjsonschema 把参数 schema 编译成直线式 Python 校验函数
+# 未安装时只使用下面的 _validate 逐层校验
+try:
+    import fastjsonschema
+except ImportError:
+    fastjsonschema = None
+
+# 编译时使用的 JSON Schema 版本：draft-06 起 fastjsonschema 把 1.0 这类整数值
+# 浮点数视为 integer，而 _validate 只接受 int；draft-04 的 integer 检查同样严格，
+# 保证快速路径接受的参数不会多于 _validate
+_COMPILE_SCHEMA_VERSION = "http://json-schema.org/draft-04/schema#"
+
+# 可选依赖：msgspec 用 C 实现按 Struct 类型校验参数（工具声明 struct_type 时使用）
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+# =====================================================================
+# 类型映射字典（Type Mapping Dictionary）
+# =====================================================================
+# 功能说明：将 JSON Schema 类型规范映射到对应的 Python 类型
+# 处理流程：在参数验证阶段使用，用于检查参数类型是否正确
+# 支持类型：string→str, integer→int, number→(int/float), boolean→bool,
+#          array→list, object→dict
+# 实现方式：模块级只读映射，校验时一次 .get() 取出类型（未知类型为 None）
+# =====================================================================
+_TYPE_MAP: Mapping[str, type | tuple[type, ...]] = MappingProxyType({
+    "string": str,
+    "integer": int,
+    "number": (int, float),
+    "boolean": bool,
+    "array": list,
+    "object": dict,
+})
+
+
+# =====================================================================
+# 按类型分派的约束检查（Type-Specific Constraint Checks）
+# =====================================================================
+# 功能说明：Tool._validate 按 schema 的 type 查表调用，每个节点只做一次查找
+# 参数约定：(val, schema, path, add_error, children)
+#          - 错误标签 path or "parameter" 只在出错时生成
+#          - add_error：追加错误信息的函数
+#          - children：待检查的 (值, 子 schema, 路径) 列表（对象属性/数组元素）
+# =====================================================================
+_Child = tuple[Any, dict[str, Any], str]
+
+
+def _check_number(
+    val: Any, schema: dict[str, Any], path: str,
+    add_error: Callable[[str], None], children: list[_Child],
+) -> None:
+    """数值类型：检查 minimum/maximum 范围"""
+    if "minimum" in schema and val < schema["minimum"]:
+        add_error(f"{path or 'parameter'} must be >= {schema['minimum']}")
+    if "maximum" in schema and val > schema["maximum"]:
+        add_error(f"{path or 'parameter'} must be <= {schema['maximum']}")
+
+
+def _check_string(
+    val: Any, schema: dict[str, Any], path: str,
+    add_error: Callable[[str], None], children: list[_Child],
+) -> None:
+    """字符串类型：检查 minLength/maxLength 长度"""
+    if "minLength" in schema and len(val) < schema["minLength"]:
+        add_error(f"{path or 'parameter'} must be at least {schema['minLength']} chars")
+    if "maxLength" in schema and len(val) > schema["maxLength"]:
+        add_error(f"{path or 'parameter'} must be at most {schema['maxLength']} chars")
+
+
+def _check_object(
+    val: Any, schema: dict[str, Any], path: str,
+    add_error: Callable[[str], None], children: list[_Child],
+) -> None:
+    """对象类型：检查必需参数，已声明的子属性留待后续检查"""
+    props = schema.get("properties", {})
+    for k in schema.get("required", []):
+        if k not in val:
+            add_error(f"missing required {path + '.' + k if path else k}")
+    for k, v in val.items():
+        if k in props:
+            children.append((v, props[k], path + '.' + k if path else k))
+
+
+def _check_array(
+    val: Any, schema: dict[str, Any], path: str,
+    add_error: Callable[[str], None], children: list[_Child],
+) -> None:
+    """数组类型：每个元素留待后续检查"""
+    if "items" in schema:
+        items = schema["items"]
+        for i, item in enumerate(val):
+            children.append((item, items, f"{path}[{i}]" if path else f"[{i}]"))
+
+
+_TYPE_CHECKS: Mapping[str, Callable[..., None]] = MappingProxyType({
+    "integer": _check_number,
+    "number": _check_number,
+    "string": _check_string,
+    "object": _check_object,
+    "array": _check_array,
+})
+
+
+class ContextAwareTool(Protocol):
+    """
+    需要路由上下文的工具协议
+    
+    MessageTool、SpawnTool、CronTool 等工具需要知道当前消息来自哪个频道和聊天，
+    Agent 处理每条消息前会调用 set_context() 更新它们。
+    """
+    
+    def set_context(self, channel: str, chat_id: str) -> None:
+        """设置当前消息的频道和聊天 ID"""
+        ...
 
 
 class Tool(ABC):
@@ -98,6 +218,9 @@ class Tool(ABC):
     - description：返回工具的功能描述
     - parameters：返回参数的 JSON Schema 定义
     - execute：实现工具的具体执行逻辑
+    取值固定的 name/description/parameters 推荐直接声明为类属性
+    （如 name = "read_file"），访问时不经过 property 调用；
+    需要按实例计算时仍可用 @property 实现
 
     使用场景：
     - 文件操作工具（读取、写入、编辑、列表）
@@ -115,22 +238,27 @@ class Tool(ABC):
     3. 生成符合参数规范的工具调用
     """
 
-    # =====================================================================
-    # 类型映射字典（Type Mapping Dictionary）
-    # =====================================================================
-    # 功能说明：将 JSON Schema 类型规范映射到对应的 Python 类型
-    # 处理流程：在参数验证阶段使用，用于检查参数类型是否正确
-    # 支持类型：string→str, integer→int, number→(int/float), boolean→bool,
-    #          array→list, object→dict
-    # =====================================================================
-    _TYPE_MAP = {
-        "string": str,
-        "integer": int,
-        "number": (int, float),
-        "boolean": bool,
-        "array": list,
-        "object": dict,
-    }
+    # 基类不引入实例属性：声明了 __slots__ 的子类实例不带 __dict__
+    __slots__ = ()
+
+    # 类型映射（见模块级 _TYPE_MAP，保留类属性供子类引用）
+    _TYPE_MAP = _TYPE_MAP
+
+    # 只读工具：没有副作用，相同参数的调用结果可以共享
+    # （Agent 在同一轮中对参数完全相同的只读调用只执行一次）
+    read_only: bool = False
+
+    # 可选的 msgspec.Struct 参数类型：声明且安装了 msgspec 时，
+    # validate_params 直接用 msgspec.convert 校验，不再遍历 JSON Schema
+    # （Struct 字段应与 parameters 描述的约束保持一致）
+    struct_type: type | None = None
+
+    # to_schema() 结果缓存，键由 _schema_cache_key() 给出（默认按工具类）
+    _schema_cache: dict[Any, dict[str, Any]] = {}
+
+    # fastjsonschema 编译出的参数校验函数，与 _schema_cache 同样按 _schema_cache_key() 缓存
+    # （默认同一个类的所有实例共用，首次校验时编译，不可用时为 None）
+    _validators: dict[Any, Callable[[Any], Any] | None] = {}
 
     @property
     @abstractmethod
@@ -348,9 +476,10 @@ class Tool(ABC):
 
         处理流程：
         1. 获取工具的 parameters 定义（JSON Schema）
-        2. 检查顶级类型是否为 "object"
-        3. 调用内部 _validate 方法进行递归验证
-        4. 收集并返回所有验证错误
+        2. 检查顶级类型是否为 "object"；没有 properties/required 约束时直接通过
+        3. 声明了 struct_type 且安装了 msgspec 时交给 msgspec.convert 校验
+        4. 安装了 fastjsonschema 时先用编译后的校验函数快速验证，通过即返回
+        5. 否则调用内部 _validate 方法逐层验证，收集并返回所有验证错误
 
         错误类型检测：
         - 类型错误：参数类型与预期不符
@@ -358,8 +487,8 @@ class Tool(ABC):
         - 枚举值错误：参数值不在允许的枚举列表中
         - 数值范围错误：超出 minimum/maximum 范围
         - 字符串长度错误：超出 minLength/maxLength 限制
-        - 嵌套对象验证：递归验证子属性
-        - 数组元素验证：递归验证每个数组元素
+        - 嵌套对象验证：逐层验证子属性
+        - 数组元素验证：逐个验证数组元素
 
         使用示例：
         ```python
@@ -382,14 +511,64 @@ class Tool(ABC):
         schema = self.parameters or {}
         if schema.get("type", "object") != "object":
             raise ValueError(f"Schema must be object type, got {schema.get('type')!r}")
-        return self._validate(params, {**schema, "type": "object"}, "")
+        schema = {**schema, "type": "object"}
+
+        # 声明了 msgspec Struct：整个校验由 msgspec 完成
+        if self.struct_type is not None and msgspec is not None:
+            try:
+                msgspec.convert(params, type=self.struct_type)
+                return []
+            except msgspec.ValidationError as e:
+                return [str(e)]
+
+        # 没有任何属性和必需参数约束的 schema：只需确认参数是字典
+        if isinstance(params, dict) and not schema.get("properties") and not schema.get("required"):
+            return []
+
+        # 快速路径：编译后的校验函数通过即返回；失败时回退到 _validate，
+        # 以生成与原来格式一致的详细错误列表
+        validator = self._get_compiled_validator(schema)
+        if validator is not None:
+            try:
+                validator(params)
+                return []
+            except fastjsonschema.JsonSchemaException:
+                pass
+        return self._validate(params, schema, "")
+
+    def _get_compiled_validator(self, schema: dict[str, Any]) -> Callable[[Any], Any] | None:
+        """
+        获取（每个缓存键首次调用时编译）fastjsonschema 参数校验函数
+
+        说明：
+        - 以 _schema_cache_key() 为键缓存在 Tool._validators 中（与 to_schema 一致），
+          parameters 随实例变化的工具不会共用其他实例的校验函数
+        - 未安装 fastjsonschema 或 schema 无法编译时返回 None，只使用 _validate
+        - use_default=False：校验时不把 default 值写回调用方的参数字典
+        - 按 draft-04 编译：integer 只接受 int，与 _validate 一致（不接受 1.0）
+        """
+        key = self._schema_cache_key()
+        try:
+            return Tool._validators[key]
+        except KeyError:
+            pass
+        validator = None
+        if fastjsonschema is not None:
+            try:
+                validator = fastjsonschema.compile(
+                    {"$schema": _COMPILE_SCHEMA_VERSION, **schema}, use_default=False
+                )
+            except fastjsonschema.JsonSchemaDefinitionException:
+                validator = None
+        Tool._validators[key] = validator
+        return validator
 
     def _validate(self, val: Any, schema: dict[str, Any], path: str) -> list[str]:
         """
-        内部递归验证方法（Internal Recursive Validation Method）
+        内部遍历验证方法（Internal Schema-Walk Validation Method）
         
         功能描述：
-        内部使用的递归验证方法，处理嵌套结构的参数验证。
+        内部使用的验证方法，处理嵌套结构的参数验证。
         该方法直接操作底层数据结构，不对外暴露。
 
         参数说明：
@@ -404,9 +583,15 @@ class Tool(ABC):
         1. 类型检查：验证值类型是否符合 schema 定义
         2. 枚举检查：验证值是否在允许的枚举列表中
         3. 数值范围：检查 minimum/maximum 约束
-        4. 字符串长度：检查 minLength/maxLength 约束
-        5. 对象属性：递归验证子属性
-        6. 数组元素：递归验证每个数组元素
+        4. 类型相关约束：按 type 查 _TYPE_CHECKS 表调用对应检查函数
+           - 数值：minimum/maximum
+           - 字符串：minLength/maxLength
+           - 对象：required，子属性压入待检查栈
+           - 数组：每个数组元素压入待检查栈
+
+        遍历方式：
+        - 用显式栈代替递归，嵌套层级再深也不新增 Python 栈帧
+        - 子节点逆序入栈，错误顺序与深度优先递归遍历一致
 
         路径构建：
         - 顶级参数：使用参数名作为 path
@@ -418,48 +603,39 @@ class Tool(ABC):
         - 此方法为内部方法，不建议外部直接调用
         - 由 validate_params 方法内部调用
         """
-        t, label = schema.get("type"), path or "parameter"
-        
-        # 类型验证：检查值是否符合预期的 Python 类型
-        if t in self._TYPE_MAP and not isinstance(val, self._TYPE_MAP[t]):
-            return [f"{label} should be {t}"]
-
-        errors = []
-
-        # 枚举值验证：检查值是否在允许的枚举列表中
-        if "enum" in schema and val not in schema["enum"]:
-            errors.append(f"{label} must be one of {schema['enum']}")
-
-        # 数值类型验证：检查数值是否在允许范围内
-        if t in ("integer", "number"):
-            if "minimum" in schema and val < schema["minimum"]:
-                errors.append(f"{label} must be >= {schema['minimum']}")
-            if "maximum" in schema and val > schema["maximum"]:
-                errors.append(f"{label} must be <= {schema['maximum']}")
-
-        # 字符串类型验证：检查字符串长度
-        if t == "string":
-            if "minLength" in schema and len(val) < schema["minLength"]:
-                errors.append(f"{label} must be at least {schema['minLength']} chars")
-            if "maxLength" in schema and len(val) > schema["maxLength"]:
-                errors.append(f"{label} must be at most {schema['maxLength']} chars")
-
-        # 对象类型验证：递归验证子属性
-        if t == "object":
-            props = schema.get("properties", {})
-            # 检查必需参数是否存在
-            for k in schema.get("required", []):
-                if k not in val:
-                    errors.append(f"missing required {path + '.' + k if path else k}")
-            # 递归验证每个提供的属性
-            for k, v in val.items():
-                if k in props:
-                    errors.extend(self._validate(v, props[k], path + '.' + k if path else k))
-
-        # 数组类型验证：递归验证每个元素
-        if t == "array" and "items" in schema:
-            for i, item in enumerate(val):
-                errors.extend(self._validate(item, schema["items"], f"{path}[{i}]" if path else f"[{i}]"))
+        errors: list[str] = []
+        stack: list[_Child] = [(val, schema, path)]
+
+        # 循环内频繁使用的全局/属性查找提前绑定为局部变量
+        type_for = _TYPE_MAP.get
+        check_for = _TYPE_CHECKS.get
+        is_instance = isinstance
+        add_error = errors.append
+        pop = stack.pop
+
+        while stack:
+            val, schema, path = pop()
+            t = schema.get("type")
+            
+            # 类型验证：检查值是否符合预期的 Python 类型
+            py_type = type_for(t) if t is not None else None
+            if py_type is not None and not is_instance(val, py_type):
+                add_error(f"{path or 'parameter'} should be {t}")
+                continue
+
+            # 枚举值验证：检查值是否在允许的枚举列表中
+            if "enum" in schema and val not in schema["enum"]:
+                add_error(f"{path or 'parameter'} must be one of {schema['enum']}")
+
+            # 类型相关约束：一次查表分派到对应的检查函数
+            check = check_for(t) if t is not None else None
+            if check is None:
+                continue
+            children: list[_Child] = []
+            check(val, schema, path, add_error, children)
+
+            # 逆序入栈，保证按声明顺序弹出
+            stack.extend(reversed(children))
 
         return errors
 
@@ -515,12 +691,31 @@ class Tool(ABC):
         - 在初始化代理时将所有工具的 schema 传递给 LLM
         - 保持工具描述的准确性和完整性
         - 定期审查工具定义与实际功能的匹配度
+
+        缓存说明：
+        - name、description、parameters 对同一个工具类是常量，
+          首次调用后按 _schema_cache_key() 缓存，同类实例返回同一个字典（调用方不应修改）
+        - schema 随实例变化的工具应重写 _schema_cache_key()
         """
-        return {
-            "type": "function",
-            "function": {
-                "name": self.name,
-                "description": self.description,
-                "parameters": self.parameters,
+        key = self._schema_cache_key()
+        schema = Tool._schema_cache.get(key)
+        if schema is None:
+            schema = {
+                "type": "function",
+                "function": {
+                    "name": self.name,
+                    "description": self.description,
+                    "parameters": self.parameters,
+                }
             }
-        }
+            Tool._schema_cache[key] = schema
+        return schema
+
+    def _schema_cache_key(self) -> Any:
+        """
+        to_schema() 与编译后参数校验函数的缓存键
+
+        默认返回工具类本身（同类实例共享 schema 和校验函数）；
+        name、description 或 parameters 随实例变化的子类应返回能区分实例的键
+        """
+        return type(self)
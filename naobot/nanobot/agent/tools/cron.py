@@ -24,12 +24,15 @@ Cron Tool - 定时任务工具模块
 ================================================================================
 """
 
-from typing import Any
+from typing import Any, Callable
 
 from nanobot.agent.tools.base import Tool
 from nanobot.cron.service import CronService
 from nanobot.cron.types import CronSchedule
 
+# 任务名称取提醒消息的前若干个字符
+_JOB_NAME_MAX = 30
+
 
 class CronTool(Tool):
     """
@@ -62,6 +65,40 @@ class CronTool(Tool):
     ========================================================================
     """
     
+    # 固定属性集合：实例不带 __dict__，属性访问走 slot 描述符
+    __slots__ = ("_cron", "_channel", "_chat_id", "_actions", "_list_cache")
+    
+    name = "cron"
+    description = "Schedule reminders and recurring tasks. Actions: add, list, remove."
+    
+    parameters = {
+        "type": "object",
+        "properties": {
+            "action": {
+                "type": "string",
+                "enum": ["add", "list", "remove"],
+                "description": "Action to perform"
+            },
+            "message": {
+                "type": "string",
+                "description": "Reminder message (for add)"
+            },
+            "every_seconds": {
+                "type": "integer",
+                "description": "Interval in seconds (for recurring tasks)"
+            },
+            "cron_expr": {
+                "type": "string",
+                "description": "Cron expression like '0 9 * * *' (for scheduled tasks)"
+            },
+            "job_id": {
+                "type": "string",
+                "description": "Job ID (for remove)"
+            }
+        },
+        "required": ["action"]
+    }
+    
     def __init__(self, cron_service: CronService):
         """
         初始化定时任务工具
@@ -72,6 +109,16 @@ class CronTool(Tool):
         self._cron = cron_service
         self._channel = ""
         self._chat_id = ""
+        
+        # 上次 list 的 (CronService.revision, 格式化结果)，任务未变化时直接复用
+        self._list_cache: tuple[int, str] | None = None
+        
+        # action → 处理函数（统一接收 message, every_seconds, cron_expr, job_id）
+        self._actions: dict[str, Callable[[str, int | None, str | None, str | None], str]] = {
+            "add": lambda m, e, c, j: self._add_job(m, e, c),
+            "list": lambda m, e, c, j: self._list_jobs(),
+            "remove": lambda m, e, c, j: self._remove_job(j),
+        }
     
     def set_context(self, channel: str, chat_id: str) -> None:
         """
@@ -87,69 +134,6 @@ class CronTool(Tool):
         self._channel = channel
         self._chat_id = chat_id
     
-    @property
-    def name(self) -> str:
-        """
-        获取工具名称
-        
-        返回值:
-            str，工具名称为 "cron"
-        """
-        return "cron"
-    
-    @property
-    def description(self) -> str:
-        """
-        获取工具描述
-        
-        返回值:
-            str，工具描述信息
-        """
-        return "Schedule reminders and recurring tasks. Actions: add, list, remove."
-    
-    @property
-    def parameters(self) -> dict[str, Any]:
-        """
-        获取工具参数定义
-        
-        返回值:
-            dict，OpenAI 格式的工具参数定义
-        
-        参数说明:
-            - action: 要执行的操作（add/list/remove）
-            - message: 提醒消息（add 操作需要）
-            - every_seconds: 间隔秒数（周期性任务）
-            - cron_expr: cron 表达式（定时任务）
-            - job_id: 任务 ID（remove 操作需要）
-        """
-        return {
-            "type": "object",
-            "properties": {
-                "action": {
-                    "type": "string",
-                    "enum": ["add", "list", "remove"],
-                    "description": "Action to perform"
-                },
-                "message": {
-                    "type": "string",
-                    "description": "Reminder message (for add)"
-                },
-                "every_seconds": {
-                    "type": "integer",
-                    "description": "Interval in seconds (for recurring tasks)"
-                },
-                "cron_expr": {
-                    "type": "string",
-                    "description": "Cron expression like '0 9 * * *' (for scheduled tasks)"
-                },
-                "job_id": {
-                    "type": "string",
-                    "description": "Job ID (for remove)"
-                }
-            },
-            "required": ["action"]
-        }
-    
     async def execute(
         self,
         action: str,
@@ -176,13 +160,10 @@ class CronTool(Tool):
         返回值:
             str，操作结果
         """
-        if action == "add":
-            return self._add_job(message, every_seconds, cron_expr)
-        elif action == "list":
-            return self._list_jobs()
-        elif action == "remove":
-            return self._remove_job(job_id)
-        return f"Unknown action: {action}"
+        handler = self._actions.get(action)
+        if handler is None:
+            return f"Unknown action: {action}"
+        return handler(message, every_seconds, cron_expr, job_id)
     
     def _add_job(self, message: str, every_seconds: int | None, cron_expr: str | None) -> str:
         """
@@ -214,7 +195,7 @@ class CronTool(Tool):
         
         # 添加任务
         job = self._cron.add_job(
-            name=message[:30],
+            name=message if len(message) <= _JOB_NAME_MAX else message[:_JOB_NAME_MAX],
             schedule=schedule,
             message=message,
             deliver=True,
@@ -230,13 +211,23 @@ class CronTool(Tool):
         
         返回值:
             str，任务列表
+        
+        说明:
+            CronService 每次保存任务都会递增 revision，
+            revision 未变化时返回上次格式化的结果
         """
+        revision = self._cron.revision
+        cached = self._list_cache
+        if cached is not None and cached[0] == revision:
+            return cached[1]
+        
         jobs = self._cron.list_jobs()
         if not jobs:
-            return "No scheduled jobs."
-        
-        lines = [f"- {j.name} (id: {j.id}, {j.schedule.kind})" for j in jobs]
-        return "Scheduled jobs:\n" + "\n".join(lines)
+            text = "No scheduled jobs."
+        else:
+            text = "Scheduled jobs:\n" + "\n".join(f"- {j.name} (id: {j.id}, {j.schedule.kind})" for j in jobs)
+        self._list_cache = (revision, text)
+        return text
     
     def _remove_job(self, job_id: str | None) -> str:
         """
@@ -14,6 +14,8 @@
 2. 沙箱支持：通过 allowed_dir 参数限制可访问的目录范围
 3. 统一接口：遵循 Tool 基类的标准接口规范
 4. 错误处理：所有操作都包含完善的异常处理和错误信息返回
+5. 异步执行：文件 I/O 放到注入的线程池（Agent 的共享 nanobot-tool 线程池）中
+   运行，不阻塞事件循环；未注入时使用事件循环默认线程池
 
 主要组件：
 1. 路径解析工具函数
@@ -74,11 +76,23 @@ print(result)
 ================================================================================
 """
 
+import asyncio
+from concurrent.futures import Executor
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable, TypeVar
 
 from nanobot.agent.tools.base import Tool
 
+_T = TypeVar("_T")
+
+# read_file 默认最多返回的字符数（超出部分截断，避免超大文件占满内存）
+_DEFAULT_MAX_READ_CHARS = 1_048_576
+
+
+async def _run_io(executor: Executor | None, func: Callable[..., _T], *args: Any) -> _T:
+    """在给定线程池中执行阻塞的文件 I/O（None 表示事件循环默认线程池）"""
+    return await asyncio.get_running_loop().run_in_executor(executor, func, *args)
+
 
 def _resolve_path(path: str, allowed_dir: Path | None = None) -> Path:
     """
@@ -95,6 +109,7 @@ def _resolve_path(path: str, allowed_dir: Path | None = None) -> Path:
       - 示例："./data/file.txt", "/absolute/path.txt", "~/documents"
     - allowed_dir：Path | None，可选的允许访问目录
       - 如果提供，路径必须在该目录范围内
+      - 应为已 resolve() 的绝对路径（工具在初始化时解析一次）
       - 用于实现沙箱限制
       - 默认为 None（不限制访问范围）
 
@@ -108,7 +123,8 @@ def _resolve_path(path: str, allowed_dir: Path | None = None) -> Path:
     1. 使用 Path() 创建 Path 对象
     2. 调用 expanduser() 展开 "~" 用户目录
     3. 调用 resolve() 转换为绝对路径并规范化
-    4. 如果设置了 allowed_dir，检查路径是否在允许范围内
+    4. 如果设置了 allowed_dir，按路径组件检查是否在允许范围内
+       （is_relative_to，"/tmp/foobar" 不会被当作 "/tmp/foo" 的子路径）
     5. 如果越权，抛出 PermissionError
     6. 返回解析后的路径
 
@@ -132,7 +148,7 @@ def _resolve_path(path: str, allowed_dir: Path | None = None) -> Path:
     print(f"用户目录: {resolved}")
     
     # 带目录限制的用法
-    allowed = Path("/workspace")
+    allowed = Path("/workspace").resolve()
     resolved = _resolve_path("/workspace/data/file.txt", allowed_dir=allowed)
     # 正常工作
     
@@ -148,7 +164,7 @@ def _resolve_path(path: str, allowed_dir: Path | None = None) -> Path:
     - 是文件系统工具安全机制的核心
     """
     resolved = Path(path).expanduser().resolve()
-    if allowed_dir and not str(resolved).startswith(str(allowed_dir.resolve())):
+    if allowed_dir and not resolved.is_relative_to(allowed_dir):
         raise PermissionError(f"Path {path} is outside allowed directory {allowed_dir}")
     return resolved
 
@@ -173,6 +189,7 @@ class ReadFileTool(Tool):
       - 设置后只能读取该目录下的文件
       - 有助于防止代理意外读取敏感文件
       - 默认为 None（无限制）
+    - max_chars：int，单次最多返回的字符数，超出部分截断
 
     使用场景：
     - 读取配置文件获取系统设置
@@ -187,7 +204,29 @@ class ReadFileTool(Tool):
     - 内部使用 _resolve_path() 进行路径解析
     """
 
-    def __init__(self, allowed_dir: Path | None = None):
+    read_only = True
+
+    name = "read_file"
+
+    description = "Read the contents of a file at the given path."
+
+    parameters = {
+        "type": "object",
+        "properties": {
+            "path": {
+                "type": "string",
+                "description": "The file path to read"
+            }
+        },
+        "required": ["path"]
+    }
+    
+    def __init__(
+        self,
+        allowed_dir: Path | None = None,
+        max_chars: int = _DEFAULT_MAX_READ_CHARS,
+        executor: Executor | None = None,
+    ):
         """
         初始化读取工具（Initialize Read File Tool）
         
@@ -199,6 +238,10 @@ class ReadFileTool(Tool):
           - 如果设置，只能访问该目录下的文件
           - 用于实现文件访问沙箱
           - 默认为 None（允许访问任何文件）
+        - max_chars：int，单次最多返回的字符数
+          - 只读取 max_chars + 1 个字符判断是否超出，超大文件不会整体载入内存
+          - 默认 1 MiB 字符
+        - executor：Executor | None，执行文件 I/O 的线程池，None 表示事件循环默认线程池
 
         使用示例：
         ```python
@@ -210,47 +253,10 @@ class ReadFileTool(Tool):
         tool = ReadFileTool(allowed_dir=allowed_dir)
         ```
         """
-        self._allowed_dir = allowed_dir
-
-    @property
-    def name(self) -> str:
-        """
-        获取工具名称（Get Tool Name）
-        
-        返回值：
-        - str：工具名称 "read_file"
-        """
-        return "read_file"
-
-    @property
-    def description(self) -> str:
-        """
-        获取工具描述（Get Tool Description）
-        
-        返回值：
-        - str：描述信息 "Read the contents of a file at the given path."
-        """
-        return "Read the contents of a file at the given path."
-
-    @property
-    def parameters(self) -> dict[str, Any]:
-        """
-        获取参数模式定义（Get Parameters JSON Schema）
-        
-        返回值：
-        - dict：参数模式定义
-          - path（必需）：要读取的文件路径
-        """
-        return {
-            "type": "object",
-            "properties": {
-                "path": {
-                    "type": "string",
-                    "description": "The file path to read"
-                }
-            },
-            "required": ["path"]
-        }
+        # 允许目录只在初始化时解析一次，每次调用不再重复 resolve()
+        self._allowed_dir = allowed_dir.resolve() if allowed_dir else None
+        self._max_chars = max_chars
+        self._executor = executor
 
     async def execute(self, path: str, **kwargs: Any) -> str:
         """
@@ -275,10 +281,9 @@ class ReadFileTool(Tool):
 
         处理流程：
         1. 调用 _resolve_path() 解析并验证路径
-        2. 检查路径是否存在
-        3. 验证路径是否为文件
-        4. 读取文件内容（UTF-8 编码）
-        5. 返回内容或错误信息
+        2. 直接读取文件内容（UTF-8 编码）
+        3. 文件不存在或路径是目录时，由对应异常转换为错误信息
+        4. 返回内容或错误信息
 
         使用示例：
         ```python
@@ -292,24 +297,39 @@ class ReadFileTool(Tool):
         ```
 
         注意事项：
-        - 读取大型文件可能占用大量内存
+        - 超过 max_chars 的文件只返回开头部分，并附加截断提示
         - 只支持 UTF-8 编码的文本文件
         - 二进制文件可能产生乱码
         """
         try:
             file_path = _resolve_path(path, self._allowed_dir)
-            if not file_path.exists():
-                return f"Error: File not found: {path}"
-            if not file_path.is_file():
-                return f"Error: Not a file: {path}"
-
-            content = file_path.read_text(encoding="utf-8")
-            return content
+            # 直接读取，不预先 exists()/is_file()：出错时再按异常类型给出提示
+            # 文件 I/O 放到线程池中执行，不阻塞事件循环
+            return await _run_io(self._executor, self._read, file_path, self._max_chars)
+        except FileNotFoundError:
+            return f"Error: File not found: {path}"
+        except IsADirectoryError:
+            return f"Error: Not a file: {path}"
         except PermissionError as e:
             return f"Error: {e}"
         except Exception as e:
             return f"Error reading file: {str(e)}"
 
+    @staticmethod
+    def _read(file_path: Path, max_chars: int) -> str:
+        """
+        读取文件开头最多 max_chars 个字符
+
+        说明：
+        - 文本模式读取，换行符转换和 UTF-8 严格解码与 read_text() 一致
+        - 多读一个字符判断是否超出，超出时截断并附加提示
+        """
+        with file_path.open("r", encoding="utf-8") as f:
+            content = f.read(max_chars + 1)
+        if len(content) <= max_chars:
+            return content
+        return content[:max_chars] + f"\n... (truncated, file is longer than {max_chars} chars)"
+
 
 class WriteFileTool(Tool):
     """
@@ -342,59 +362,36 @@ class WriteFileTool(Tool):
     - 内部使用 _resolve_path() 进行路径解析
     """
 
-    def __init__(self, allowed_dir: Path | None = None):
+    name = "write_file"
+
+    description = "Write content to a file at the given path. Creates parent directories if needed."
+
+    parameters = {
+        "type": "object",
+        "properties": {
+            "path": {
+                "type": "string",
+                "description": "The file path to write to"
+            },
+            "content": {
+                "type": "string",
+                "description": "The content to write"
+            }
+        },
+        "required": ["path", "content"]
+    }
+    
+    def __init__(self, allowed_dir: Path | None = None, executor: Executor | None = None):
         """
         初始化写入工具（Initialize Write File Tool）
         
         参数说明：
         - allowed_dir：Path | None，可选的目录限制
+        - executor：Executor | None，执行文件 I/O 的线程池，None 表示事件循环默认线程池
         """
-        self._allowed_dir = allowed_dir
-
-    @property
-    def name(self) -> str:
-        """
-        获取工具名称（Get Tool Name）
-        
-        返回值：
-        - str：工具名称 "write_file"
-        """
-        return "write_file"
-
-    @property
-    def description(self) -> str:
-        """
-        获取工具描述（Get Tool Description）
-        
-        返回值：
-        - str：描述信息 "Write content to a file at the given path. Creates parent directories if needed."
-        """
-        return "Write content to a file at the given path. Creates parent directories if needed."
-
-    @property
-    def parameters(self) -> dict[str, Any]:
-        """
-        获取参数模式定义（Get Parameters JSON Schema）
-        
-        返回值：
-        - dict：参数模式定义
-          - path（必需）：要写入的文件路径
-          - content（必需）：要写入的内容
-        """
-        return {
-            "type": "object",
-            "properties": {
-                "path": {
-                    "type": "string",
-                    "description": "The file path to write to"
-                },
-                "content": {
-                    "type": "string",
-                    "description": "The content to write"
-                }
-            },
-            "required": ["path", "content"]
-        }
+        # 允许目录只在初始化时解析一次，每次调用不再重复 resolve()
+        self._allowed_dir = allowed_dir.resolve() if allowed_dir else None
+        self._executor = executor
 
     async def execute(self, path: str, content: str, **kwargs: Any) -> str:
         """
@@ -447,14 +444,20 @@ class WriteFileTool(Tool):
         """
         try:
             file_path = _resolve_path(path, self._allowed_dir)
-            file_path.parent.mkdir(parents=True, exist_ok=True)
-            file_path.write_text(content, encoding="utf-8")
+            # 创建目录和写入放到线程池中一次完成，不阻塞事件循环
+            await _run_io(self._executor, self._write, file_path, content)
             return f"Successfully wrote {len(content)} bytes to {path}"
         except PermissionError as e:
             return f"Error: {e}"
         except Exception as e:
             return f"Error writing file: {str(e)}"
 
+    @staticmethod
+    def _write(file_path: Path, content: str) -> None:
+        """创建父目录并写入文件"""
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        file_path.write_text(content, encoding="utf-8")
+
 
 class EditFileTool(Tool):
     """
@@ -487,64 +490,40 @@ class EditFileTool(Tool):
     - 内部使用 _resolve_path() 进行路径解析
     """
 
-    def __init__(self, allowed_dir: Path | None = None):
+    name = "edit_file"
+
+    description = "Edit a file by replacing old_text with new_text. The old_text must exist exactly in the file."
+
+    parameters = {
+        "type": "object",
+        "properties": {
+            "path": {
+                "type": "string",
+                "description": "The file path to edit"
+            },
+            "old_text": {
+                "type": "string",
+                "description": "The exact text to find and replace"
+            },
+            "new_text": {
+                "type": "string",
+                "description": "The text to replace with"
+            }
+        },
+        "required": ["path", "old_text", "new_text"]
+    }
+    
+    def __init__(self, allowed_dir: Path | None = None, executor: Executor | None = None):
         """
         初始化编辑工具（Initialize Edit File Tool）
         
         参数说明：
         - allowed_dir：Path | None，可选的目录限制
+        - executor：Executor | None，执行文件 I/O 的线程池，None 表示事件循环默认线程池
         """
-        self._allowed_dir = allowed_dir
-
-    @property
-    def name(self) -> str:
-        """
-        获取工具名称（Get Tool Name）
-        
-        返回值：
-        - str：工具名称 "edit_file"
-        """
-        return "edit_file"
-
-    @property
-    def description(self) -> str:
-        """
-        获取工具描述（Get Tool Description）
-        
-        返回值：
-        - str：描述信息 "Edit a file by replacing old_text with new_text. The old_text must exist exactly in the file."
-        """
-        return "Edit a file by replacing old_text with new_text. The old_text must exist exactly in the file."
-
-    @property
-    def parameters(self) -> dict[str, Any]:
-        """
-        获取参数模式定义（Get Parameters JSON Schema）
-        
-        返回值：
-        - dict：参数模式定义
-          - path（必需）：要编辑的文件路径
-          - old_text（必需）：要查找的原文
-          - new_text（必需）：要替换成的新内容
-        """
-        return {
-            "type": "object",
-            "properties": {
-                "path": {
-                    "type": "string",
-                    "description": "The file path to edit"
-                },
-                "old_text": {
-                    "type": "string",
-                    "description": "The exact text to find and replace"
-                },
-                "new_text": {
-                    "type": "string",
-                    "description": "The text to replace with"
-                }
-            },
-            "required": ["path", "old_text", "new_text"]
-        }
+        # 允许目录只在初始化时解析一次，每次调用不再重复 resolve()
+        self._allowed_dir = allowed_dir.resolve() if allowed_dir else None
+        self._executor = executor
 
     async def execute(self, path: str, old_text: str, new_text: str, **kwargs: Any) -> str:
         """
@@ -573,12 +552,12 @@ class EditFileTool(Tool):
 
         处理流程：
         1. 调用 _resolve_path() 解析并验证路径
-        2. 检查文件是否存在
+        2. 以读写模式打开文件（不存在时返回错误）
         3. 读取文件内容
         4. 检查 old_text 是否存在
         5. 如果存在多次匹配，返回警告
         6. 执行单次替换
-        7. 写入新内容
+        7. 在同一个文件句柄上截断并写入新内容
         8. 返回成功信息
 
         使用示例：
@@ -606,30 +585,54 @@ class EditFileTool(Tool):
         - 如果匹配多次需要用户提供更具体的 old_text
         - 建议在编辑前先读取文件内容确认
         """
+        if not old_text:
+            return "Error: old_text must not be empty"
         try:
             file_path = _resolve_path(path, self._allowed_dir)
-            if not file_path.exists():
-                return f"Error: File not found: {path}"
-
-            content = file_path.read_text(encoding="utf-8")
-
-            if old_text not in content:
-                return f"Error: old_text not found in file. Make sure it matches exactly."
-
-            # Count occurrences - 统计出现次数
-            count = content.count(old_text)
-            if count > 1:
-                return f"Warning: old_text appears {count} times. Please provide more context to make it unique."
-
-            new_content = content.replace(old_text, new_text, 1)
-            file_path.write_text(new_content, encoding="utf-8")
+            # 读取、替换、写回放到线程池中执行，不阻塞事件循环
+            error = await _run_io(self._executor, self._edit, file_path, old_text, new_text)
+            if error:
+                return error
 
             return f"Successfully edited {path}"
+        except FileNotFoundError:
+            return f"Error: File not found: {path}"
         except PermissionError as e:
             return f"Error: {e}"
         except Exception as e:
             return f"Error editing file: {str(e)}"
 
+    @staticmethod
+    def _edit(file_path: Path, old_text: str, new_text: str) -> str | None:
+        """
+        在文件中执行单次替换
+
+        返回值：
+        - None：替换成功
+        - str：未找到或多次匹配时的提示信息（文件保持不变）
+        """
+        # 只打开一次文件：同一个句柄内读取、截断并写回，
+        # 文件不存在时直接由 open() 抛出 FileNotFoundError
+        with file_path.open("r+", encoding="utf-8") as f:
+            content = f.read()
+
+            # 一次扫描同时得到是否存在、是否多次出现以及替换结果：
+            # 1 段 = 未找到，2 段 = 恰好一次，3 段 = 多次出现
+            parts = content.split(old_text, 2)
+            if len(parts) == 1:
+                return f"Error: old_text not found in file. Make sure it matches exactly."
+
+            # Count occurrences - 只在多次匹配时统计确切次数
+            if len(parts) == 3:
+                count = content.count(old_text)
+                return f"Warning: old_text appears {count} times. Please provide more context to make it unique."
+
+            new_content = parts[0] + new_text + parts[1]
+            f.seek(0)
+            f.truncate()
+            f.write(new_content)
+        return None
+
 
 class ListDirTool(Tool):
     """
@@ -661,54 +664,34 @@ class ListDirTool(Tool):
     - 内部使用 _resolve_path() 进行路径解析
     """
 
-    def __init__(self, allowed_dir: Path | None = None):
-        """
-        初始化列表工具（Initialize List Directory Tool）
-        
-        参数说明：
-        - allowed_dir：Path | None，可选的目录限制
-        """
-        self._allowed_dir = allowed_dir
+    read_only = True
 
-    @property
-    def name(self) -> str:
-        """
-        获取工具名称（Get Tool Name）
-        
-        返回值：
-        - str：工具名称 "list_dir"
-        """
-        return "list_dir"
+    name = "list_dir"
 
-    @property
-    def description(self) -> str:
-        """
-        获取工具描述（Get Tool Description）
-        
-        返回值：
-        - str：描述信息 "List the contents of a directory."
-        """
-        return "List the contents of a directory."
+    description = "List the contents of a directory."
 
-    @property
-    def parameters(self) -> dict[str, Any]:
+    parameters = {
+        "type": "object",
+        "properties": {
+            "path": {
+                "type": "string",
+                "description": "The directory path to list"
+            }
+        },
+        "required": ["path"]
+    }
+    
+    def __init__(self, allowed_dir: Path | None = None, executor: Executor | None = None):
         """
-        获取参数模式定义（Get Parameters JSON Schema）
+        初始化列表工具（Initialize List Directory Tool）
         
-        返回值：
-        - dict：参数模式定义
-          - path（必需）：要列出的目录路径
+        参数说明：
+        - allowed_dir：Path | None，可选的目录限制
+        - executor：Executor | None，执行文件 I/O 的线程池，None 表示事件循环默认线程池
         """
-        return {
-            "type": "object",
-            "properties": {
-                "path": {
-                    "type": "string",
-                    "description": "The directory path to list"
-                }
-            },
-            "required": ["path"]
-        }
+        # 允许目录只在初始化时解析一次，每次调用不再重复 resolve()
+        self._allowed_dir = allowed_dir.resolve() if allowed_dir else None
+        self._executor = executor
 
     async def execute(self, path: str, **kwargs: Any) -> str:
         """
@@ -763,21 +746,27 @@ class ListDirTool(Tool):
         """
         try:
             dir_path = _resolve_path(path, self._allowed_dir)
-            if not dir_path.exists():
-                return f"Error: Directory not found: {path}"
-            if not dir_path.is_dir():
-                return f"Error: Not a directory: {path}"
-
-            items = []
-            for item in sorted(dir_path.iterdir()):
-                prefix = "📁 " if item.is_dir() else "📄 "
-                items.append(f"{prefix}{item.name}")
-
-            if not items:
-                return f"Directory {path} is empty"
-
-            return "\n".join(items)
+            # 目录遍历（含每项的 stat）放到线程池中执行，不阻塞事件循环
+            return await _run_io(self._executor, self._list, dir_path, path)
         except PermissionError as e:
             return f"Error: {e}"
         except Exception as e:
             return f"Error listing directory: {str(e)}"
+
+    @staticmethod
+    def _list(dir_path: Path, path: str) -> str:
+        """列出目录内容并格式化"""
+        if not dir_path.exists():
+            return f"Error: Directory not found: {path}"
+        if not dir_path.is_dir():
+            return f"Error: Not a directory: {path}"
+
+        items = []
+        for item in sorted(dir_path.iterdir()):
+            prefix = "📁 " if item.is_dir() else "📄 "
+            items.append(f"{prefix}{item.name}")
+
+        if not items:
+            return f"Directory {path} is empty"
+
+        return "\n".join(items)
@@ -51,6 +51,28 @@ class MessageTool(Tool):
     ========================================================================
     """
     
+    name = "message"
+    description = "Send a message to the user. Use this when you want to communicate something."
+    
+    parameters = {
+        "type": "object",
+        "properties": {
+            "content": {
+                "type": "string",
+                "description": "The message content to send"
+            },
+            "channel": {
+                "type": "string",
+                "description": "Optional: target channel (telegram, discord, etc.)"
+            },
+            "chat_id": {
+                "type": "string",
+                "description": "Optional: target chat/user ID"
+            }
+        },
+        "required": ["content"]
+    }
+    
     def __init__(
         self,
         send_callback: Callable[[OutboundMessage], Awaitable[None]] | None = None,
@@ -101,58 +123,6 @@ class MessageTool(Tool):
         """
         self._send_callback = callback
     
-    @property
-    def name(self) -> str:
-        """
-        获取工具名称
-        
-        返回值:
-            str，工具名称为 "message"
-        """
-        return "message"
-    
-    @property
-    def description(self) -> str:
-        """
-        获取工具描述
-        
-        返回值:
-            str，工具描述信息
-        """
-        return "Send a message to the user. Use this when you want to communicate something."
-    
-    @property
-    def parameters(self) -> dict[str, Any]:
-        """
-        获取工具参数定义
-        
-        返回值:
-            dict，OpenAI 格式的工具参数定义
-        
-        参数说明:
-            - content: 要发送的消息内容（必填）
-            - channel: 目标频道（可选，默认使用上下文）
-            - chat_id: 目标聊天 ID（可选，默认使用上下文）
-        """
-        return {
-            "type": "object",
-            "properties": {
-                "content": {
-                    "type": "string",
-                    "description": "The message content to send"
-                },
-                "channel": {
-                    "type": "string",
-                    "description": "Optional: target channel (telegram, discord, etc.)"
-                },
-                "chat_id": {
-                    "type": "string",
-                    "description": "Optional: target chat/user ID"
-                }
-            },
-            "required": ["content"]
-        }
-    
     async def execute(
         self,
         content: str,
@@ -65,6 +65,10 @@ result = await registry.execute("read_file", {"file_path": "/test.txt"})
 ================================================================================
 """
 
+import asyncio
+import inspect
+from concurrent.futures import Executor
+from functools import partial
 from typing import Any
 
 from nanobot.agent.tools.base import Tool
@@ -104,7 +108,7 @@ class ToolRegistry:
     - 与代理主逻辑交互：执行工具并返回结果
     """
 
-    def __init__(self):
+    def __init__(self, executor: Executor | None = None):
         """
         初始化工具注册表（Initialize Tool Registry）
         
@@ -112,13 +116,20 @@ class ToolRegistry:
         创建注册表实例，初始化内部工具存储字典。
 
         参数说明：
-        - 无参数
+        - executor：Executor | None，运行同步工具的共享线程池
 
         内部初始化：
         - self._tools：dict[str, Tool]
           - 键：工具的唯一名称（str）
           - 值：工具实例（Tool）
           - 用于存储所有已注册的工具实例
+        - self._definitions_cache：list | None
+          - get_definitions() 结果的缓存
+          - register()/unregister() 时失效
+        - self._executor：Executor | None
+          - 同步 execute 的工具在此线程池中运行，None 表示事件循环默认线程池
+        - self._sync_tools：set[str]
+          - execute 为同步函数的工具名称，注册时确定
 
         使用示例：
         ```python
@@ -127,6 +138,9 @@ class ToolRegistry:
         ```
         """
         self._tools: dict[str, Tool] = {}
+        self._definitions_cache: list[dict[str, Any]] | None = None
+        self._executor = executor
+        self._sync_tools: set[str] = set()
 
     def register(self, tool: Tool) -> None:
         """
@@ -168,6 +182,11 @@ class ToolRegistry:
         - 建议在注册前验证工具的有效性
         """
         self._tools[tool.name] = tool
+        self._definitions_cache = None
+        if inspect.iscoroutinefunction(tool.execute):
+            self._sync_tools.discard(tool.name)
+        else:
+            self._sync_tools.add(tool.name)
 
     def unregister(self, name: str) -> None:
         """
@@ -202,6 +221,8 @@ class ToolRegistry:
         - 注销不会自动清理相关资源（如文件句柄）
         """
         self._tools.pop(name, None)
+        self._definitions_cache = None
+        self._sync_tools.discard(name)
 
     def get(self, name: str) -> Tool | None:
         """
@@ -237,7 +258,7 @@ class ToolRegistry:
         ```python
         # 链式调用示例
         if (tool := registry.get("read_file")) is not None:
-            result = await tool.execute(file_path="/test.txt")
+            result = await tool.execute(path="/test.txt")
         ```
         """
         return self._tools.get(name)
@@ -292,10 +313,11 @@ class ToolRegistry:
           - 顺序与注册顺序一致（Python 3.7+ 字典顺序保证）
 
         处理流程：
-        1. 遍历注册表中所有工具实例
-        2. 调用每个工具的 to_schema() 方法
-        3. 收集所有定义到列表中
-        4. 返回完整列表
+        1. 如果缓存有效，直接返回缓存的列表
+        2. 否则遍历注册表中所有工具实例
+        3. 调用每个工具的 to_schema() 方法
+        4. 收集所有定义到列表中并缓存
+        5. 返回完整列表
 
         与 LLM 的集成：
         ```python
@@ -316,10 +338,12 @@ class ToolRegistry:
 
         注意事项：
         - 返回的列表可被 JSON 序列化
-        - 工具定义是只读的，不应修改
-        - 如果工具注册后定义发生变化，需要重新获取
+        - 工具定义是只读的，不应修改（返回的是缓存的同一个列表）
+        - 注册或注销工具后缓存自动失效
         """
-        return [tool.to_schema() for tool in self._tools.values()]
+        if self._definitions_cache is None:
+            self._definitions_cache = [tool.to_schema() for tool in self._tools.values()]
+        return self._definitions_cache
 
     async def execute(self, name: str, params: dict[str, Any]) -> str:
         """
@@ -347,7 +371,7 @@ class ToolRegistry:
         1. 工具查找：在注册表中查找对应名称的工具
         2. 参数验证：调用工具的 validate_params 方法验证参数
         3. 错误收集：如果验证失败，收集并返回错误信息
-        4. 执行调用：调用工具的 async execute 方法
+        4. 执行调用：await 异步 execute；同步 execute 放到 self._executor 线程池运行
         5. 异常处理：捕获执行过程中的异常并返回错误信息
 
         错误处理：
@@ -378,6 +402,7 @@ class ToolRegistry:
 
         性能考虑：
         - 使用异步方法，支持并发执行多个工具调用
+        - execute 为同步函数的工具在共享线程池中运行
         - 参数验证在执行前完成，避免无效执行
         - 内部异常处理减少外部错误处理负担
         """
@@ -389,10 +414,61 @@ class ToolRegistry:
             errors = tool.validate_params(params)
             if errors:
                 return f"Error: Invalid parameters for tool '{name}': " + "; ".join(errors)
+            if name in self._sync_tools:
+                # 同步工具（CPU 密集或阻塞 I/O）放到共享线程池，不阻塞事件循环
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(self._executor, partial(tool.execute, **params))
             return await tool.execute(**params)
         except Exception as e:
             return f"Error executing {name}: {str(e)}"
 
+    def is_read_only(self, name: str) -> bool:
+        """
+        检查工具是否为只读工具（Check if Tool is Read-Only）
+        
+        参数说明：
+        - name：str，工具名称
+        
+        返回值：
+        - bool：工具存在且声明了 read_only 时为 True
+        """
+        tool = self._tools.get(name)
+        return tool is not None and tool.read_only
+    
+    def group_calls(self, names: list[str]) -> list[list[int]]:
+        """
+        按执行顺序对一轮工具调用分组（Group One Round of Tool Calls）
+        
+        功能描述：
+        主 Agent 与子代理共用的执行策略：组与组之间按顺序执行，组内并发。
+        连续的只读调用归为一组；有副作用的调用（write_file、exec 等）可能
+        互相依赖（例如先写文件再执行、先编辑再读取），每个单独成组。
+        
+        参数说明：
+        - names：list[str]，按 LLM 给出顺序排列的工具名称
+        
+        返回值：
+        - list[list[int]]：调用下标的分组，拼接后即为原始顺序
+        
+        使用示例：
+        ```python
+        registry.group_calls(["read_file", "list_dir", "write_file", "read_file"])
+        # [[0, 1], [2], [3]]
+        ```
+        """
+        groups: list[list[int]] = []
+        parallel: list[int] | None = None
+        for i, name in enumerate(names):
+            if self.is_read_only(name):
+                if parallel is None:
+                    parallel = []
+                    groups.append(parallel)
+                parallel.append(i)
+            else:
+                parallel = None
+                groups.append([i])
+        return groups
+    
     @property
     def tool_names(self) -> list[str]:
         """
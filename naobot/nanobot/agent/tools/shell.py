@@ -53,11 +53,16 @@ Shell Execution Tool - Shell 执行工具模块
 import asyncio
 import os
 import re
+import signal
 from pathlib import Path
 from typing import Any
 
 from nanobot.agent.tools.base import Tool
 
+# 调用方给整个工具调用设置的超时应比 ExecTool 自身的超时多出的余量（秒），
+# 保证 ExecTool 先超时并自行杀死、回收子进程
+EXEC_TIMEOUT_GRACE = 5.0
+
 
 class ExecTool(Tool):
     """
@@ -83,6 +88,24 @@ class ExecTool(Tool):
     ========================================================================
     """
     
+    name = "exec"
+    description = "Execute a shell command and return its output. Use with caution."
+    
+    parameters = {
+        "type": "object",
+        "properties": {
+            "command": {
+                "type": "string",
+                "description": "The shell command to execute"
+            },
+            "working_dir": {
+                "type": "string",
+                "description": "Optional working directory for the command"
+            }
+        },
+        "required": ["command"]
+    }
+    
     def __init__(
         self,
         timeout: int = 60,
@@ -143,53 +166,6 @@ class ExecTool(Tool):
         # 是否限制在 workspace 内操作
         self.restrict_to_workspace = restrict_to_workspace
     
-    @property
-    def name(self) -> str:
-        """
-        获取工具名称
-        
-        返回值:
-            str，工具名称为 "exec"
-        """
-        return "exec"
-    
-    @property
-    def description(self) -> str:
-        """
-        获取工具描述
-        
-        返回值:
-            str，描述信息
-        """
-        return "Execute a shell command and return its output. Use with caution."
-    
-    @property
-    def parameters(self) -> dict[str, Any]:
-        """
-        获取工具参数定义
-        
-        返回值:
-            dict，OpenAI 格式的工具参数定义
-        
-        参数说明:
-            - command: 要执行的 Shell 命令（必填）
-            - working_dir: 命令执行的工作目录（可选）
-        """
-        return {
-            "type": "object",
-            "properties": {
-                "command": {
-                    "type": "string",
-                    "description": "The shell command to execute"
-                },
-                "working_dir": {
-                    "type": "string",
-                    "description": "Optional working directory for the command"
-                }
-            },
-            "required": ["command"]
-        }
-    
     async def execute(self, command: str, working_dir: str | None = None, **kwargs: Any) -> str:
         """
         执行 Shell 命令
@@ -247,6 +223,8 @@ class ExecTool(Tool):
                 stdout=asyncio.subprocess.PIPE,
                 stderr=asyncio.subprocess.PIPE,
                 cwd=cwd,
+                # 独立进程组：超时或取消时连同 shell 启动的子进程一起结束
+                start_new_session=os.name != "nt",
             )
             
             try:
@@ -256,9 +234,13 @@ class ExecTool(Tool):
                     timeout=self.timeout
                 )
             except asyncio.TimeoutError:
-                # 超时：杀死进程
-                process.kill()
+                # 超时：杀死并回收进程
+                await self._kill(process)
                 return f"Error: Command timed out after {self.timeout} seconds"
+            except asyncio.CancelledError:
+                # 被外部取消（调用方超时、Agent 关闭等）：同样杀死并回收，不留下孤儿进程
+                await self._kill(process)
+                raise
             
             # 构建输出
             output_parts = []
@@ -290,6 +272,21 @@ class ExecTool(Tool):
         except Exception as e:
             return f"Error executing command: {str(e)}"
 
+    @staticmethod
+    async def _kill(process: asyncio.subprocess.Process) -> None:
+        """
+        杀死命令进程（POSIX 下为整个进程组）并等待其退出
+        """
+        if process.returncode is None:
+            try:
+                if os.name != "nt":
+                    os.killpg(process.pid, signal.SIGKILL)
+                else:
+                    process.kill()
+            except ProcessLookupError:
+                pass
+        await process.wait()
+
     def _guard_command(self, command: str, cwd: str) -> str | None:
         """
         安全检查：验证命令是否安全
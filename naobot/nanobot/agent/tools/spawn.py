@@ -60,6 +60,28 @@ class SpawnTool(Tool):
     ========================================================================
     """
     
+    name = "spawn"
+    description = (
+        "Spawn a subagent to handle a task in the background. "
+        "Use this for complex or time-consuming tasks that can run independently. "
+        "The subagent will complete the task and report back when done."
+    )
+    
+    parameters = {
+        "type": "object",
+        "properties": {
+            "task": {
+                "type": "string",
+                "description": "The task for the subagent to complete",
+            },
+            "label": {
+                "type": "string",
+                "description": "Optional short label for the task (for display)",
+            },
+        },
+        "required": ["task"],
+    }
+    
     def __init__(self, manager: "SubagentManager"):
         """
         初始化 Spawn 工具
@@ -86,57 +108,6 @@ class SpawnTool(Tool):
         self._origin_channel = channel
         self._origin_chat_id = chat_id
     
-    @property
-    def name(self) -> str:
-        """
-        获取工具名称
-        
-        返回值:
-            str，工具名称为 "spawn"
-        """
-        return "spawn"
-    
-    @property
-    def description(self) -> str:
-        """
-        获取工具描述
-        
-        返回值:
-            str，工具描述信息
-        """
-        return (
-            "Spawn a subagent to handle a task in the background. "
-            "Use this for complex or time-consuming tasks that can run independently. "
-            "The subagent will complete the task and report back when done."
-        )
-    
-    @property
-    def parameters(self) -> dict[str, Any]:
-        """
-        获取工具参数定义
-        
-        返回值:
-            dict，OpenAI 格式的工具参数定义
-        
-        参数说明:
-            - task: 要执行的任务描述（必填）
-            - label: 任务的可读标签（可选）
-        """
-        return {
-            "type": "object",
-            "properties": {
-                "task": {
-                    "type": "string",
-                    "description": "The task for the subagent to complete",
-                },
-                "label": {
-                    "type": "string",
-                    "description": "Optional short label for the task (for display)",
-                },
-            },
-            "required": ["task"],
-        }
-    
     async def execute(self, task: str, label: str | None = None, **kwargs: Any) -> str:
         """
         启动子代理
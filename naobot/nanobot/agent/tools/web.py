@@ -144,6 +144,7 @@ class WebSearchTool(Tool):
     """
     
     name = "web_search"
+    read_only = True
     description = "Search the web. Returns titles, URLs, and snippets."
     
     parameters = {
@@ -252,6 +253,7 @@ class WebFetchTool(Tool):
     """
     
     name = "web_fetch"
+    read_only = True
     description = "Fetch URL and extract readable content (HTML → markdown/text)."
     
     parameters = {
@@ -127,6 +127,22 @@ class MessageBus:
         """
         await self.outbound.put(msg)
     
+    def publish_outbound_nowait(self, msg: OutboundMessage) -> None:
+        """
+        同步发布出站消息
+        
+        功能描述:
+            出站队列没有容量上限，put_nowait 不会阻塞也不会失败，
+            调用方无需 await 或创建后台任务。
+        
+        参数说明:
+            msg: OutboundMessage，要发布的出站消息
+        
+        使用场景:
+            - AgentLoop.run() 发送响应后立即回到 consume_inbound()
+        """
+        self.outbound.put_nowait(msg)
+    
     async def consume_outbound(self) -> OutboundMessage:
         """
         消费出站消息
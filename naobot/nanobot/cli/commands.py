@@ -37,6 +37,15 @@ _USING_LIBEDIT = False
 _SAVED_TERM_ATTRS = None  # original termios settings, restored on exit
 
 
+def _install_uvloop() -> None:
+    """Use uvloop as the asyncio event loop policy when it is installed."""
+    try:
+        import uvloop
+    except ImportError:
+        return
+    uvloop.install()
+
+
 def _flush_pending_tty_input() -> None:
     """Drop unread keypresses typed while the model was generating output."""
     try:
@@ -359,6 +368,11 @@ def gateway(
         workspace=config.workspace_path,
         model=config.agents.defaults.model,
         max_iterations=config.agents.defaults.max_tool_iterations,
+        max_parallel_tools=config.agents.defaults.max_parallel_tools,
+        max_subagents=config.agents.defaults.max_subagents,
+        history_window=config.agents.defaults.history_window,
+        history_summary_threshold=config.agents.defaults.history_summary_threshold,
+        response_cache_ttl=config.agents.defaults.response_cache_ttl,
         brave_api_key=config.tools.web.search.api_key or None,
         exec_config=config.tools.exec,
         cron_service=cron,
@@ -426,6 +440,7 @@ def gateway(
             agent.stop()
             await channels.stop_all()
     
+    _install_uvloop()
     asyncio.run(run())
 
 
@@ -482,6 +497,7 @@ def agent(
                 response = await agent_loop.process_direct(message, session_id)
             _print_agent_response(response, render_markdown=markdown)
         
+        _install_uvloop()
         asyncio.run(run_once())
     else:
         # Interactive mode
@@ -491,6 +507,7 @@ def agent(
         # input() runs in a worker thread that can't be cancelled.
         # Without this handler, asyncio.run() would hang waiting for it.
         def _exit_on_sigint(signum, frame):
+            agent_loop.sessions.flush()
             _save_history()
             _restore_terminal()
             console.print("\nGoodbye!")
@@ -527,6 +544,7 @@ def agent(
                     console.print("\nGoodbye!")
                     break
         
+        _install_uvloop()
         asyncio.run(run_interactive())
 
 
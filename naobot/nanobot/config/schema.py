@@ -161,6 +161,11 @@ class AgentDefaults(BaseModel):
     max_tokens: int = 8192
     temperature: float = 0.7
     max_tool_iterations: int = 20
+    max_parallel_tools: int = 8
+    max_subagents: int = 4
+    history_window: int = 20
+    history_summary_threshold: int = 40
+    response_cache_ttl: float = 0.0  # Seconds to reuse a reply for an identical context (0 = off)
 
 
 class AgentsConfig(BaseModel):
@@ -52,6 +52,7 @@ class CronService:
         self._store: CronStore | None = None
         self._timer_task: asyncio.Task | None = None
         self._running = False
+        self.revision = 0  # Bumped whenever the job list is saved (i.e. changed)
     
     def _load_store(self) -> CronStore:
         """Load jobs from disk."""
@@ -105,6 +106,7 @@ class CronService:
         if not self._store:
             return
         
+        self.revision += 1
         self.store_path.parent.mkdir(parents=True, exist_ok=True)
         
         data = {
@@ -12,6 +12,8 @@ LLM Provider Base - LLM 提供者基类模块
     1. LLMProvider: 抽象基类，定义 LLM 交互的通用接口
     2. LLMResponse: LLM 响应数据结构
     3. ToolCallRequest: 工具调用请求数据结构
+    4. 流式接口: chat_stream() 在每个工具调用解码完成时立即产出，
+       最后产出完整的 LLMResponse
 
 主要组件:
     - ToolCallRequest: 工具调用请求
@@ -22,6 +24,7 @@ LLM Provider Base - LLM 提供者基类模块
 """
 
 from abc import ABC, abstractmethod
+from collections.abc import AsyncIterator
 from dataclasses import dataclass, field
 from typing import Any
 
@@ -39,6 +42,7 @@ class ToolCallRequest:
         - id: 工具调用的唯一标识
         - name: 要调用的工具名称
         - arguments: 工具参数（字典格式）
+        - raw_arguments: 原始 JSON 参数字符串（可选）
     
     使用场景:
         - LLM 决定需要调用工具时生成
@@ -55,6 +59,9 @@ class ToolCallRequest:
     
     arguments: dict[str, Any]
     """工具参数"""
+    
+    raw_arguments: str | None = field(default=None, repr=False, compare=False)
+    """LLM 返回的原始 JSON 参数字符串（解析成功时保留，回填消息历史时无需重新序列化）"""
 
 
 @dataclass
@@ -114,6 +121,8 @@ class LLMProvider(ABC):
     实现要求:
         - 实现 chat() 方法处理聊天补全请求
         - 实现 get_default_model() 返回默认模型名称
+        - 可选：覆盖 chat_stream() 并将 supports_streaming 设为 True，
+          让 Agent 在工具调用解码完成后立即开始执行
     
     已实现的提供者:
         - LiteLLMProvider: 支持多种模型的 LiteLLM 实现
@@ -121,6 +130,9 @@ class LLMProvider(ABC):
     ========================================================================
     """
     
+    supports_streaming: bool = False
+    """chat_stream() 是否会在响应结束前逐个产出工具调用"""
+    
     def __init__(self, api_key: str | None = None, api_base: str | None = None):
         """
         初始化 LLM 提供者
@@ -140,6 +152,7 @@ class LLMProvider(ABC):
         model: str | None = None,
         max_tokens: int = 4096,
         temperature: float = 0.7,
+        prompt_cache: bool = False,
     ) -> LLMResponse:
         """
         发送聊天补全请求
@@ -153,6 +166,9 @@ class LLMProvider(ABC):
             model: str | None，模型标识符
             max_tokens: int，最大生成令牌数
             temperature: float，采样温度
+            prompt_cache: bool，是否为静态前缀（系统提示词）请求提示词缓存
+                - 支持的提供者会在最后一条 system 消息上添加 cache_control 标记
+                - 不支持的提供者忽略此参数
         
         返回值:
             LLMResponse，包含内容或工具调用
@@ -162,6 +178,41 @@ class LLMProvider(ABC):
         """
         pass
     
+    async def chat_stream(
+        self,
+        messages: list[dict[str, Any]],
+        tools: list[dict[str, Any]] | None = None,
+        model: str | None = None,
+        max_tokens: int = 4096,
+        temperature: float = 0.7,
+        prompt_cache: bool = False,
+    ) -> AsyncIterator[ToolCallRequest | LLMResponse]:
+        """
+        发送流式聊天补全请求
+        
+        功能描述:
+            每个工具调用的参数解码完成时立即产出对应的 ToolCallRequest，
+            流结束后产出完整的 LLMResponse（包含全部工具调用）作为最后一个事件。
+        
+        参数说明:
+            与 chat() 相同
+        
+        产出:
+            ToolCallRequest: 已解码完成的工具调用（可能为 0 个或多个）
+            LLMResponse: 最终响应，总是最后一个事件
+        
+        默认实现:
+            调用 chat() 并只产出最终响应，不支持流式的提供者无需覆盖
+        """
+        yield await self.chat(
+            messages=messages,
+            tools=tools,
+            model=model,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            prompt_cache=prompt_cache,
+        )
+    
     @abstractmethod
     def get_default_model(self) -> str:
         """
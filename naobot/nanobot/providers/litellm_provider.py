@@ -26,6 +26,7 @@ LiteLLM Provider - LiteLLM 提供者模块
 
 import json
 import os
+from collections.abc import AsyncIterator
 from typing import Any
 
 import litellm
@@ -56,6 +57,8 @@ class LiteLLMProvider(LLMProvider):
     ========================================================================
     """
     
+    supports_streaming = True
+    
     def __init__(
         self,
         api_key: str | None = None,
@@ -166,6 +169,53 @@ class LiteLLMProvider(LLMProvider):
         
         return model
     
+    def _supports_prompt_caching(self, model: str) -> bool:
+        """
+        检查当前提供者是否支持 cache_control 提示词缓存标记
+        
+        参数说明:
+            model: 原始模型名称
+        
+        返回值:
+            bool，网关模式看网关配置，标准模式看模型匹配的提供者配置
+        """
+        spec = self._gateway or find_by_model(model)
+        return bool(spec and spec.supports_prompt_caching)
+    
+    @staticmethod
+    def _apply_cache_control(messages: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        """
+        在最后一条 system 消息上添加 ephemeral cache_control 标记
+        
+        功能描述:
+            将最后一条 system 消息的文本内容转换为内容块格式并附加
+            {"type": "ephemeral"} 缓存标记，使提供者缓存到此为止的静态前缀。
+            不修改传入的消息列表和消息字典。
+        
+        参数说明:
+            messages: 消息列表
+        
+        返回值:
+            list[dict]，添加了缓存标记的新消息列表
+        """
+        for i in range(len(messages) - 1, -1, -1):
+            msg = messages[i]
+            if msg.get("role") != "system":
+                continue
+            content = msg.get("content")
+            if not isinstance(content, str):
+                return messages
+            marked = {
+                **msg,
+                "content": [{
+                    "type": "text",
+                    "text": content,
+                    "cache_control": {"type": "ephemeral"},
+                }],
+            }
+            return messages[:i] + [marked] + messages[i + 1:]
+        return messages
+    
     def _apply_model_overrides(self, model: str, kwargs: dict[str, Any]) -> None:
         """
         应用模型特定的参数覆盖
@@ -185,39 +235,30 @@ class LiteLLMProvider(LLMProvider):
                     kwargs.update(overrides)
                     return
     
-    async def chat(
+    def _build_kwargs(
         self,
         messages: list[dict[str, Any]],
-        tools: list[dict[str, Any]] | None = None,
-        model: str | None = None,
-        max_tokens: int = 4096,
-        temperature: float = 0.7,
-    ) -> LLMResponse:
+        tools: list[dict[str, Any]] | None,
+        model: str | None,
+        max_tokens: int,
+        temperature: float,
+        prompt_cache: bool,
+    ) -> dict[str, Any]:
         """
-        发送聊天补全请求
-        
-        功能描述:
-            通过 LiteLLM 发送消息列表，获取 LLM 响应。
+        构建 acompletion 请求参数（chat 与 chat_stream 共用）
         
         参数说明:
-            messages: 消息列表（包含 role 和 content）
-            tools: 工具定义列表（OpenAI 格式）
-            model: 模型标识符
-            max_tokens: 最大生成令牌数
-            temperature: 采样温度
+            与 chat() 相同
         
         返回值:
-            LLMResponse，包含文本内容或工具调用
-        
-        处理流程:
-            1. 解析模型名称
-            2. 构建请求参数
-            3. 应用模型特定覆盖
-            4. 设置 API 密钥和基础 URL
-            5. 调用 LiteLLM
-            6. 解析响应
+            dict，传给 litellm.acompletion 的关键字参数
         """
-        model = self._resolve_model(model or self.default_model)
+        original_model = model or self.default_model
+        model = self._resolve_model(original_model)
+        
+        # 为支持提示词缓存的提供者标记静态前缀
+        if prompt_cache and self._supports_prompt_caching(original_model):
+            messages = self._apply_cache_control(messages)
         
         kwargs: dict[str, Any] = {
             "model": model,
@@ -246,6 +287,43 @@ class LiteLLMProvider(LLMProvider):
             kwargs["tools"] = tools
             kwargs["tool_choice"] = "auto"
         
+        return kwargs
+    
+    async def chat(
+        self,
+        messages: list[dict[str, Any]],
+        tools: list[dict[str, Any]] | None = None,
+        model: str | None = None,
+        max_tokens: int = 4096,
+        temperature: float = 0.7,
+        prompt_cache: bool = False,
+    ) -> LLMResponse:
+        """
+        发送聊天补全请求
+        
+        功能描述:
+            通过 LiteLLM 发送消息列表，获取 LLM 响应。
+        
+        参数说明:
+            messages: 消息列表（包含 role 和 content）
+            tools: 工具定义列表（OpenAI 格式）
+            model: 模型标识符
+            max_tokens: 最大生成令牌数
+            temperature: 采样温度
+            prompt_cache: 是否在最后一条 system 消息上标记 cache_control
+        
+        返回值:
+            LLMResponse，包含文本内容或工具调用
+        
+        处理流程:
+            1. 构建请求参数（_build_kwargs）
+            2. 调用 LiteLLM
+            3. 解析响应
+        """
+        kwargs = self._build_kwargs(
+            messages, tools, model, max_tokens, temperature, prompt_cache
+        )
+        
         try:
             # 调用 LiteLLM
             response = await acompletion(**kwargs)
@@ -257,6 +335,127 @@ class LiteLLMProvider(LLMProvider):
                 finish_reason="error",
             )
     
+    async def chat_stream(
+        self,
+        messages: list[dict[str, Any]],
+        tools: list[dict[str, Any]] | None = None,
+        model: str | None = None,
+        max_tokens: int = 4096,
+        temperature: float = 0.7,
+        prompt_cache: bool = False,
+    ) -> AsyncIterator[ToolCallRequest | LLMResponse]:
+        """
+        发送流式聊天补全请求
+        
+        功能描述:
+            以 stream=True 调用 LiteLLM，按 index 累积工具调用的增量片段。
+            出现更高 index 的工具调用时，前面的调用已解码完成，立即产出；
+            流结束后产出剩余的调用和完整的 LLMResponse。
+        
+        参数说明:
+            与 chat() 相同
+        
+        产出:
+            ToolCallRequest（解码完成的工具调用），最后是 LLMResponse
+        """
+        kwargs = self._build_kwargs(
+            messages, tools, model, max_tokens, temperature, prompt_cache
+        )
+        kwargs["stream"] = True
+        
+        content_parts: list[str] = []
+        reasoning_parts: list[str] = []
+        # index -> [id, name, 参数片段列表]
+        pending: dict[int, list[Any]] = {}
+        tool_calls: list[ToolCallRequest] = []
+        finish_reason = "stop"
+        usage: dict[str, int] = {}
+        
+        def finish(index: int) -> ToolCallRequest:
+            call_id, name, arg_parts = pending.pop(index)
+            tc = self._make_tool_call(call_id, name, "".join(arg_parts) or "{}")
+            tool_calls.append(tc)
+            return tc
+        
+        try:
+            stream = await acompletion(**kwargs)
+            async for chunk in stream:
+                chunk_usage = getattr(chunk, "usage", None)
+                if chunk_usage:
+                    usage = {
+                        "prompt_tokens": chunk_usage.prompt_tokens,
+                        "completion_tokens": chunk_usage.completion_tokens,
+                        "total_tokens": chunk_usage.total_tokens,
+                    }
+                if not chunk.choices:
+                    continue
+                choice = chunk.choices[0]
+                delta = choice.delta
+                if choice.finish_reason:
+                    finish_reason = choice.finish_reason
+                if delta is None:
+                    continue
+                
+                if getattr(delta, "content", None):
+                    content_parts.append(delta.content)
+                if getattr(delta, "reasoning_content", None):
+                    reasoning_parts.append(delta.reasoning_content)
+                
+                for tc_delta in getattr(delta, "tool_calls", None) or ():
+                    index = tc_delta.index or 0
+                    # 工具调用按 index 顺序流出，更小 index 的调用已经完整
+                    for done in sorted(i for i in pending if i < index):
+                        yield finish(done)
+                    entry = pending.setdefault(index, ["", "", []])
+                    if tc_delta.id:
+                        entry[0] = tc_delta.id
+                    function = tc_delta.function
+                    if function is not None:
+                        if function.name:
+                            entry[1] = function.name
+                        if function.arguments:
+                            entry[2].append(function.arguments)
+        except Exception as e:
+            # 与 chat() 一致：将错误作为内容返回
+            yield LLMResponse(
+                content=f"Error calling LLM: {str(e)}",
+                finish_reason="error",
+            )
+            return
+        
+        for index in sorted(pending):
+            yield finish(index)
+        
+        yield LLMResponse(
+            content="".join(content_parts) or None,
+            tool_calls=tool_calls,
+            finish_reason=finish_reason,
+            usage=usage,
+            reasoning_content="".join(reasoning_parts) or None,
+        )
+    
+    @staticmethod
+    def _make_tool_call(call_id: str, name: str, args: Any) -> ToolCallRequest:
+        """
+        构建工具调用请求，解析 JSON 参数
+        
+        参数说明:
+            call_id: 工具调用 ID
+            name: 工具名称
+            args: JSON 字符串或已解析的字典
+        
+        返回值:
+            ToolCallRequest，解析成功时在 raw_arguments 中保留原始字符串；
+            无法解析的字符串包装为 {"raw": args}
+        """
+        if not isinstance(args, str):
+            return ToolCallRequest(id=call_id, name=name, arguments=args)
+        try:
+            parsed = json.loads(args)
+        except json.JSONDecodeError:
+            return ToolCallRequest(id=call_id, name=name, arguments={"raw": args})
+        return ToolCallRequest(id=call_id, name=name, arguments=parsed, raw_arguments=args)
+    
     def _parse_response(self, response: Any) -> LLMResponse:
         """
         解析 LiteLLM 响应为标准格式
@@ -283,18 +482,9 @@ class LiteLLMProvider(LLMProvider):
         if hasattr(message, "tool_calls") and message.tool_calls:
             for tc in message.tool_calls:
                 # 如果需要，从 JSON 字符串解析参数
-                args = tc.function.arguments
-                if isinstance(args, str):
-                    try:
-                        args = json.loads(args)
-                    except json.JSONDecodeError:
-                        args = {"raw": args}
-                
-                tool_calls.append(ToolCallRequest(
-                    id=tc.id,
-                    name=tc.function.name,
-                    arguments=args,
-                ))
+                tool_calls.append(
+                    self._make_tool_call(tc.id, tc.function.name, tc.function.arguments)
+                )
         
         usage = {}
         if hasattr(response, "usage") and response.usage:
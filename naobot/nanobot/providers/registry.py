@@ -51,6 +51,9 @@ class ProviderSpec:
     # per-model param overrides, e.g. (("kimi-k2.5", {"temperature": 1.0}),)
     model_overrides: tuple[tuple[str, dict[str, Any]], ...] = ()
 
+    # prompt caching: accepts cache_control markers on message content blocks
+    supports_prompt_caching: bool = False
+
     @property
     def label(self) -> str:
         return self.display_name or self.name.title()
@@ -81,6 +84,7 @@ PROVIDERS: tuple[ProviderSpec, ...] = (
         default_api_base="https://openrouter.ai/api/v1",
         strip_model_prefix=False,
         model_overrides=(),
+        supports_prompt_caching=False,
     ),
 
     # AiHubMix: global gateway, OpenAI-compatible interface.
@@ -101,6 +105,7 @@ PROVIDERS: tuple[ProviderSpec, ...] = (
         default_api_base="https://aihubmix.com/v1",
         strip_model_prefix=True,            # anthropic/claude-3 → claude-3 → openai/claude-3
         model_overrides=(),
+        supports_prompt_caching=False,
     ),
 
     # === Standard providers (matched by model-name keywords) ===============
@@ -121,6 +126,7 @@ PROVIDERS: tuple[ProviderSpec, ...] = (
         default_api_base="",
         strip_model_prefix=False,
         model_overrides=(),
+        supports_prompt_caching=True,
     ),
 
     # OpenAI: LiteLLM recognizes "gpt-*" natively, no prefix needed.
@@ -139,6 +145,7 @@ PROVIDERS: tuple[ProviderSpec, ...] = (
         default_api_base="",
         strip_model_prefix=False,
         model_overrides=(),
+        supports_prompt_caching=False,
     ),
 
     # DeepSeek: needs "deepseek/" prefix for LiteLLM routing.
@@ -157,6 +164,7 @@ PROVIDERS: tuple[ProviderSpec, ...] = (
         default_api_base="",
         strip_model_prefix=False,
         model_overrides=(),
+        supports_prompt_caching=False,
     ),
 
     # Gemini: needs "gemini/" prefix for LiteLLM.
@@ -175,6 +183,7 @@ PROVIDERS: tuple[ProviderSpec, ...] = (
         default_api_base="",
         strip_model_prefix=False,
         model_overrides=(),
+        supports_prompt_caching=False,
     ),
 
     # Zhipu: LiteLLM uses "zai/" prefix.
@@ -197,6 +206,7 @@ PROVIDERS: tuple[ProviderSpec, ...] = (
         default_api_base="",
         strip_model_prefix=False,
         model_overrides=(),
+        supports_prompt_caching=False,
     ),
 
     # DashScope: Qwen models, needs "dashscope/" prefix.
@@ -215,6 +225,7 @@ PROVIDERS: tuple[ProviderSpec, ...] = (
         default_api_base="",
         strip_model_prefix=False,
         model_overrides=(),
+        supports_prompt_caching=False,
     ),
 
     # Moonshot: Kimi models, needs "moonshot/" prefix.
@@ -239,6 +250,7 @@ PROVIDERS: tuple[ProviderSpec, ...] = (
         model_overrides=(
             ("kimi-k2.5", {"temperature": 1.0}),
         ),
+        supports_prompt_caching=False,
     ),
 
     # === Local deployment (matched by config key, NOT by api_base) =========
@@ -260,6 +272,7 @@ PROVIDERS: tuple[ProviderSpec, ...] = (
         default_api_base="",                # user must provide in config
         strip_model_prefix=False,
         model_overrides=(),
+        supports_prompt_caching=False,
     ),
 
     # === Auxiliary (not a primary LLM provider) ============================
@@ -281,6 +294,7 @@ PROVIDERS: tuple[ProviderSpec, ...] = (
         default_api_base="",
         strip_model_prefix=False,
         model_overrides=(),
+        supports_prompt_caching=False,
     ),
 )
 
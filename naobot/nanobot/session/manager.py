@@ -13,6 +13,13 @@ Session Manager - 会话管理器模块
     2. SessionManager: 会话管理器，负责会话的加载和保存
     3. Session Key: 会话唯一标识（格式: channel:chat_id）
 
+写入策略:
+    - 内存 LRU 缓存最近使用的会话，命中时不读磁盘
+    - 事件循环中调用 save() 只标记为脏，200ms 内的多次保存合并为一次写入，
+      写入在线程池中执行，不阻塞事件循环
+    - 没有运行中的事件循环时（同步调用）立即写入
+    - flush() 立即写入所有待保存的会话（退出前调用）
+
 存储格式:
     - 目录: ~/.nanobot/sessions/
     - 文件: {safe_key}.jsonl
@@ -27,7 +34,11 @@ Session Manager - 会话管理器模块
 ================================================================================
 """
 
+import asyncio
+import itertools
 import json
+import threading
+from collections import OrderedDict
 from pathlib import Path
 from dataclasses import dataclass, field
 from datetime import datetime
@@ -124,9 +135,12 @@ class Session:
         清空会话
         
         功能描述:
-            删除所有消息并更新时间戳。
+            删除所有消息和历史摘要，并更新时间戳。
         """
         self.messages = []
+        # 历史摘要对应的是被清空的消息
+        self.metadata.pop("summary", None)
+        self.metadata.pop("summary_upto", None)
         self.updated_at = datetime.now()
 
 
@@ -139,9 +153,9 @@ class SessionManager:
     负责会话的加载、保存和列表操作。
     
     功能特点:
-        1. 内存缓存：加速会话访问
+        1. 内存缓存：LRU 缓存加速会话访问
         2. 持久化存储：JSONL 格式
-        3. 自动保存：每次修改后自动保存
+        3. 延迟写入：事件循环中的多次 save() 合并为一次后台写入
         
     使用流程:
         1. 创建 SessionManager
@@ -152,16 +166,29 @@ class SessionManager:
     ========================================================================
     """
     
-    def __init__(self, workspace: Path):
+    def __init__(self, workspace: Path, cache_size: int = 256, flush_delay: float = 0.2):
         """
         初始化会话管理器
         
         参数说明:
             workspace: Path，工作空间路径（用于构建 sessions 目录）
+            cache_size: int，内存中保留的最大会话数
+            flush_delay: float，事件循环中 save() 合并写入的窗口（秒）
         """
         self.workspace = workspace
         self.sessions_dir = ensure_dir(Path.home() / ".nanobot" / "sessions")
-        self._cache: dict[str, Session] = {}
+        self.cache_size = cache_size
+        self.flush_delay = flush_delay
+        self._cache: OrderedDict[str, Session] = OrderedDict()
+        # 已保存但尚未写入磁盘的会话（被 LRU 淘汰后仍由这里持有，直到写入）
+        self._dirty: dict[str, Session] = {}
+        self._flush_task: asyncio.Task[None] | None = None
+        # 后台线程和 flush() 可能同时写文件
+        self._write_lock = threading.Lock()
+        # 每次序列化快照分配递增序号；_written 记录每个会话已落盘的最新序号，
+        # 后台线程中较旧的快照晚于 flush() 写入时直接丢弃，不覆盖较新的内容
+        self._seq = itertools.count(1)
+        self._written: dict[str, int] = {}
     
     def _get_session_path(self, key: str) -> Path:
         """
@@ -200,17 +227,35 @@ class SessionManager:
             5. 加入缓存并返回
         """
         # 检查缓存
-        if key in self._cache:
-            return self._cache[key]
+        session = self._cache.get(key)
+        if session is not None:
+            self._cache.move_to_end(key)
+            return session
+        
+        # 已被淘汰但尚未写入的会话，磁盘上的内容是旧的
+        session = self._dirty.get(key)
         
         # 尝试从磁盘加载
-        session = self._load(key)
+        if session is None:
+            session = self._load(key)
         if session is None:
             session = Session(key=key)
         
-        self._cache[key] = session
+        self._remember(session)
         return session
     
+    def _remember(self, session: Session) -> None:
+        """
+        将会话放入 LRU 缓存，超出容量时淘汰最久未使用的会话
+        
+        参数说明:
+            session: Session，要缓存的会话
+        """
+        self._cache[session.key] = session
+        self._cache.move_to_end(session.key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+    
     def _load(self, key: str) -> Session | None:
         """
         从磁盘加载会话
@@ -260,32 +305,118 @@ class SessionManager:
     
     def save(self, session: Session) -> None:
         """
-        保存会话到磁盘
+        保存会话
         
         功能描述:
-            将会话写入 JSONL 文件。
+            在事件循环中调用时只标记为待写入，flush_delay 内的多次保存
+            合并为一次后台写入；没有运行中的事件循环时立即写入磁盘。
         
         参数说明:
             session: Session，要保存的会话
         """
-        path = self._get_session_path(session.key)
-        
-        with open(path, "w") as f:
-            # 写入元数据
-            metadata_line = {
-                "_type": "metadata",
-                "created_at": session.created_at.isoformat(),
-                "updated_at": session.updated_at.isoformat(),
-                "metadata": session.metadata
-            }
-            f.write(json.dumps(metadata_line) + "\n")
-            
-            # 写入消息
-            for msg in session.messages:
-                f.write(json.dumps(msg) + "\n")
-        
         # 更新缓存
-        self._cache[session.key] = session
+        self._remember(session)
+        
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._write(session.key, self._serialize(session), next(self._seq))
+            return
+        
+        self._dirty[session.key] = session
+        if self._flush_task is None:
+            self._flush_task = loop.create_task(self._flush_later())
+    
+    def flush(self) -> None:
+        """
+        立即将所有待写入的会话写入磁盘
+        
+        功能描述:
+            同步写入，用于退出前确保没有丢失的会话。
+        """
+        for key, data, seq in self._take_dirty():
+            self._write(key, data, seq)
+    
+    async def _flush_later(self) -> None:
+        """
+        后台写入任务：等待 flush_delay 后在线程池中写入所有待保存的会话
+        
+        任务被取消时（例如事件循环关闭）同步写入，避免丢失数据。
+        """
+        try:
+            await asyncio.sleep(self.flush_delay)
+        except asyncio.CancelledError:
+            self._flush_task = None
+            self.flush()
+            raise
+        
+        # 之后的 save() 会启动新的写入任务
+        self._flush_task = None
+        pending = self._take_dirty()
+        if pending:
+            await asyncio.to_thread(self._write_many, pending)
+    
+    def _take_dirty(self) -> list[tuple[str, str, int]]:
+        """
+        取出并清空所有待写入的会话，在当前线程完成序列化并分配快照序号
+        
+        返回值:
+            list[tuple[str, str, int]]，(会话 key, JSONL 文件内容, 快照序号) 列表
+        """
+        dirty, self._dirty = self._dirty, {}
+        return [(key, self._serialize(session), next(self._seq)) for key, session in dirty.items()]
+    
+    @staticmethod
+    def _serialize(session: Session) -> str:
+        """
+        将会话序列化为 JSONL 文件内容
+        
+        参数说明:
+            session: Session，要序列化的会话
+        
+        返回值:
+            str，第一行为元数据，后续每行一条消息
+        """
+        metadata_line = {
+            "_type": "metadata",
+            "created_at": session.created_at.isoformat(),
+            "updated_at": session.updated_at.isoformat(),
+            "metadata": session.metadata
+        }
+        lines = [json.dumps(metadata_line)]
+        lines.extend(json.dumps(msg) for msg in session.messages)
+        lines.append("")
+        return "\n".join(lines)
+    
+    def _write(self, key: str, data: str, seq: int) -> None:
+        """
+        将序列化后的会话写入磁盘
+        
+        参数说明:
+            key: str，会话 key
+            data: str，JSONL 文件内容
+            seq: int，快照序号；不大于已落盘序号的旧快照被跳过
+        """
+        path = self._get_session_path(key)
+        with self._write_lock:
+            if seq <= self._written.get(key, 0):
+                return
+            with open(path, "w") as f:
+                f.write(data)
+            self._written[key] = seq
+    
+    def _write_many(self, pending: list[tuple[str, str, int]]) -> None:
+        """
+        批量写入会话（在线程池中执行）
+        
+        参数说明:
+            pending: list[tuple[str, str, int]]，(会话 key, JSONL 文件内容, 快照序号) 列表
+        """
+        for key, data, seq in pending:
+            try:
+                self._write(key, data, seq)
+            except OSError as e:
+                logger.warning(f"Failed to save session {key}: {e}")
     
     def delete(self, key: str) -> bool:
         """
@@ -300,8 +431,9 @@ class SessionManager:
         返回值:
             bool，是否成功删除
         """
-        # 从缓存移除
+        # 从缓存和待写入列表移除
         self._cache.pop(key, None)
+        self._dirty.pop(key, None)
         
         # 删除文件
         path = self._get_session_path(key)
@@ -0,0 +1,382 @@
+import asyncio
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from nanobot.agent.loop import AgentLoop
+from nanobot.agent.tools.base import Tool
+from nanobot.bus.events import InboundMessage
+from nanobot.bus.queue import MessageBus
+from nanobot.providers.base import LLMProvider, LLMResponse, ToolCallRequest
+
+
+class ScriptedProvider(LLMProvider):
+    def __init__(self, responses: list[LLMResponse]):
+        super().__init__()
+        self.responses = list(responses)
+        self.calls: list[list[dict[str, Any]]] = []
+
+    async def chat(self, messages, tools=None, model=None, **kwargs):
+        self.calls.append(list(messages))
+        return self.responses.pop(0)
+
+    def get_default_model(self) -> str:
+        return "test-model"
+
+
+class SleepTool(Tool):
+    read_only = True
+
+    def __init__(self) -> None:
+        self.running = 0
+        self.peak = 0
+
+    @property
+    def name(self) -> str:
+        return "sleep"
+
+    @property
+    def description(self) -> str:
+        return "sleep then echo"
+
+    @property
+    def parameters(self) -> dict[str, Any]:
+        return {
+            "type": "object",
+            "properties": {"delay": {"type": "number"}, "text": {"type": "string"}},
+            "required": ["delay", "text"],
+        }
+
+    async def execute(self, delay: float, text: str, **kwargs: Any) -> str:
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        await asyncio.sleep(delay)
+        self.running -= 1
+        return text
+
+
+@pytest.fixture
+def home(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    monkeypatch.setenv("HOME", str(tmp_path / "home"))
+    return tmp_path
+
+
+def _tool_call(call_id: str, delay: float, text: str) -> ToolCallRequest:
+    return ToolCallRequest(id=call_id, name="sleep", arguments={"delay": delay, "text": text})
+
+
+async def test_tool_calls_run_concurrently_in_order(home: Path) -> None:
+    provider = ScriptedProvider([
+        LLMResponse(content=None, tool_calls=[
+            _tool_call("a", 0.2, "first"),
+            _tool_call("b", 0.05, "second"),
+        ]),
+        LLMResponse(content="done"),
+    ])
+    agent = AgentLoop(bus=MessageBus(), provider=provider, workspace=home / "ws")
+    tool = SleepTool()
+    agent.tools.register(tool)
+
+    assert await agent.process_direct("go") == "done"
+
+    assert tool.peak == 2
+    tool_msgs = [m for m in provider.calls[1] if m["role"] == "tool"]
+    assert [(m["tool_call_id"], m["content"]) for m in tool_msgs] == [
+        ("a", "first"),
+        ("b", "second"),
+    ]
+
+
+async def test_tool_concurrency_is_bounded(home: Path) -> None:
+    provider = ScriptedProvider([
+        LLMResponse(content=None, tool_calls=[_tool_call(str(i), 0.02, str(i)) for i in range(6)]),
+        LLMResponse(content="done"),
+    ])
+    agent = AgentLoop(
+        bus=MessageBus(), provider=provider, workspace=home / "ws", max_parallel_tools=2
+    )
+    tool = SleepTool()
+    agent.tools.register(tool)
+
+    await agent.process_direct("go")
+
+    assert tool.peak == 2
+    tool_msgs = [m for m in provider.calls[1] if m["role"] == "tool"]
+    assert [m["content"] for m in tool_msgs] == [str(i) for i in range(6)]
+
+
+async def test_identical_context_reuses_cached_response(home: Path) -> None:
+    provider = ScriptedProvider([LLMResponse(content="pong")])
+    agent = AgentLoop(bus=MessageBus(), provider=provider, workspace=home / "ws", response_cache_ttl=600)
+    agent.context._current_time = lambda: "2026-01-01 00:00 (Thursday)"  # type: ignore[method-assign]
+
+    assert await agent.process_direct("ping") == "pong"
+    agent.sessions.get_or_create("cli:direct").clear()
+    # 时间标记不参与缓存键，跨分钟仍能命中
+    agent.context._current_time = lambda: "2026-01-01 00:05 (Thursday)"  # type: ignore[method-assign]
+    assert await agent.process_direct("ping") == "pong"
+    assert len(provider.calls) == 1
+
+
+async def test_response_cache_is_off_by_default(home: Path) -> None:
+    provider = ScriptedProvider([LLMResponse(content="pong"), LLMResponse(content="pong again")])
+    agent = AgentLoop(bus=MessageBus(), provider=provider, workspace=home / "ws")
+    agent.context._current_time = lambda: "2026-01-01 00:00 (Thursday)"  # type: ignore[method-assign]
+
+    assert await agent.process_direct("ping") == "pong"
+    agent.sessions.get_or_create("cli:direct").clear()
+    assert await agent.process_direct("ping") == "pong again"
+
+
+def test_response_cache_skips_media_turns(home: Path) -> None:
+    agent = AgentLoop(
+        bus=MessageBus(), provider=ScriptedProvider([]), workspace=home / "ws", response_cache_ttl=60
+    )
+    image = {"type": "image_url", "image_url": {"url": "data:image/png;base64,AAAA"}}
+
+    assert agent._response_cache_key([{"role": "user", "content": "hi"}]) is not None
+    assert agent._response_cache_key([{"role": "user", "content": [image]}]) is None
+
+
+async def test_stop_wakes_idle_run_loop(home: Path) -> None:
+    agent = AgentLoop(bus=MessageBus(), provider=ScriptedProvider([]), workspace=home / "ws")
+    task = asyncio.create_task(agent.run())
+    await asyncio.sleep(0.01)
+
+    agent.stop()
+    await asyncio.wait_for(task, timeout=0.5)
+    assert agent._tool_executor._shutdown
+
+
+class StreamingProvider(ScriptedProvider):
+    supports_streaming = True
+
+    def __init__(self, responses: list[LLMResponse], tool: SleepTool):
+        super().__init__(responses)
+        self.tool = tool
+        self.started_mid_stream = False
+
+    async def chat_stream(self, messages, tools=None, model=None, **kwargs):
+        response = await self.chat(messages, tools=tools, model=model)
+        for tc in response.tool_calls:
+            yield tc
+        # 让出事件循环，模拟后续 token 仍在生成
+        await asyncio.sleep(0.01)
+        self.started_mid_stream = self.started_mid_stream or self.tool.peak > 0
+        yield response
+
+
+async def test_streamed_tool_calls_start_before_response_ends(home: Path) -> None:
+    tool = SleepTool()
+    provider = StreamingProvider([
+        LLMResponse(content=None, tool_calls=[_tool_call("a", 0.05, "first")]),
+        LLMResponse(content="done"),
+    ], tool)
+    agent = AgentLoop(bus=MessageBus(), provider=provider, workspace=home / "ws")
+    agent.tools.register(tool)
+
+    assert await agent.process_direct("go") == "done"
+
+    assert provider.started_mid_stream
+    tool_msgs = [m for m in provider.calls[1] if m["role"] == "tool"]
+    assert [m["content"] for m in tool_msgs] == ["first"]
+
+
+class WriteTool(SleepTool):
+    read_only = False
+
+    @property
+    def name(self) -> str:
+        return "write"
+
+
+class FailingStreamProvider(StreamingProvider):
+    async def chat_stream(self, messages, tools=None, model=None, **kwargs):
+        self.calls.append(list(messages))
+        yield ToolCallRequest(id="w", name="write", arguments={"delay": 0, "text": "x"})
+        await asyncio.sleep(0.01)
+        yield LLMResponse(content="Error calling LLM: stream broke", finish_reason="error")
+
+
+async def test_side_effecting_tools_do_not_start_mid_stream(home: Path) -> None:
+    tool = WriteTool()
+    provider = FailingStreamProvider([], tool)
+    agent = AgentLoop(bus=MessageBus(), provider=provider, workspace=home / "ws")
+    agent.tools.register(tool)
+
+    assert await agent.process_direct("go") == "Error calling LLM: stream broke"
+    assert tool.peak == 0
+
+
+async def test_side_effecting_calls_run_in_order_between_reads(home: Path) -> None:
+    log: list[str] = []
+
+    class LoggingSleep(SleepTool):
+        async def execute(self, delay: float, text: str, **kwargs: Any) -> str:
+            log.append(f"start {text}")
+            result = await super().execute(delay, text)
+            log.append(f"end {text}")
+            return result
+
+    class LoggingWrite(LoggingSleep):
+        read_only = False
+
+        @property
+        def name(self) -> str:
+            return "write"
+
+    def write_call(call_id: str, delay: float, text: str) -> ToolCallRequest:
+        return ToolCallRequest(id=call_id, name="write", arguments={"delay": delay, "text": text})
+
+    provider = ScriptedProvider([
+        LLMResponse(content=None, tool_calls=[
+            _tool_call("r1", 0.02, "r1"),
+            write_call("w1", 0.02, "w1"),
+            write_call("w2", 0.0, "w2"),
+            _tool_call("r2", 0.0, "r2"),
+            _tool_call("r3", 0.0, "r3"),
+        ]),
+        LLMResponse(content="done"),
+    ])
+    agent = AgentLoop(bus=MessageBus(), provider=provider, workspace=home / "ws")
+    agent.tools.register(LoggingSleep())
+    agent.tools.register(LoggingWrite())
+
+    assert await agent.process_direct("go") == "done"
+
+    assert log[:6] == ["start r1", "end r1", "start w1", "end w1", "start w2", "end w2"]
+    assert sorted(log[6:]) == ["end r2", "end r3", "start r2", "start r3"]
+
+
+async def test_tool_timeout_uses_registry_error_format(home: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    from nanobot.agent import loop as loop_module
+    from nanobot.config.schema import ExecToolConfig
+
+    monkeypatch.setattr(loop_module, "EXEC_TIMEOUT_GRACE", 0.1)
+    provider = ScriptedProvider([
+        LLMResponse(content=None, tool_calls=[_tool_call("a", 1.0, "late")]),
+        LLMResponse(content="done"),
+    ])
+    agent = AgentLoop(
+        bus=MessageBus(), provider=provider, workspace=home / "ws",
+        exec_config=ExecToolConfig.model_construct(timeout=0.1),
+    )
+    agent.tools.register(SleepTool())
+
+    await agent.process_direct("go")
+
+    tool_msgs = [m for m in provider.calls[1] if m["role"] == "tool"]
+    assert [m["content"] for m in tool_msgs] == ["Error: Tool 'sleep' timed out after 0.2s"]
+
+
+async def test_long_history_is_summarized_and_windowed(home: Path) -> None:
+    provider = ScriptedProvider([LLMResponse(content="talked about cats"), LLMResponse(content="ok")])
+    agent = AgentLoop(
+        bus=MessageBus(), provider=provider, workspace=home / "ws",
+        history_window=4, history_summary_threshold=10,
+    )
+    session = agent.sessions.get_or_create("cli:direct")
+    for i in range(12):
+        session.add_message("user" if i % 2 == 0 else "assistant", f"msg {i}")
+
+    assert await agent.process_direct("next") == "ok"
+
+    summary_call, chat_call = provider.calls
+    assert "msg 7" in summary_call[-1]["content"]
+    assert "msg 8" not in summary_call[-1]["content"]
+    assert chat_call[1]["role"] == "system"
+    assert "talked about cats" in chat_call[1]["content"]
+    assert [m["content"] for m in chat_call[2:-1]] == ["msg 8", "msg 9", "msg 10", "msg 11"]
+    assert session.metadata["summary_upto"] == 8
+
+
+async def test_history_window_larger_than_threshold_skips_summary(home: Path) -> None:
+    provider = ScriptedProvider([LLMResponse(content="ok")])
+    agent = AgentLoop(
+        bus=MessageBus(), provider=provider, workspace=home / "ws",
+        history_window=50, history_summary_threshold=10,
+    )
+    session = agent.sessions.get_or_create("cli:direct")
+    for i in range(12):
+        session.add_message("user" if i % 2 == 0 else "assistant", f"msg {i}")
+
+    assert await agent.process_direct("next") == "ok"
+
+    assert len(provider.calls) == 1
+    assert "summary_upto" not in session.metadata
+
+
+async def test_run_publishes_response_without_blocking(home: Path) -> None:
+    bus = MessageBus()
+    agent = AgentLoop(bus=bus, provider=ScriptedProvider([LLMResponse(content="hi")]), workspace=home / "ws")
+    task = asyncio.create_task(agent.run())
+    await bus.publish_inbound(InboundMessage(channel="cli", sender_id="u", chat_id="c", content="hello"))
+
+    out = await asyncio.wait_for(bus.consume_outbound(), timeout=0.5)
+    agent.stop()
+    await asyncio.wait_for(task, timeout=0.5)
+
+    assert (out.channel, out.chat_id, out.content) == ("cli", "c", "hi")
+
+
+async def test_system_message_routes_back_to_origin(home: Path) -> None:
+    agent = AgentLoop(bus=MessageBus(), provider=ScriptedProvider([LLMResponse(content="done")]), workspace=home / "ws")
+    out = await agent._process_message(
+        InboundMessage(channel="system", sender_id="subagent", chat_id="telegram:42:x", content="result")
+    )
+
+    assert (out.channel, out.chat_id, out.content) == ("telegram", "42:x", "done")
+
+
+async def test_identical_read_only_calls_share_one_execution(home: Path) -> None:
+    class ReadOnlySleep(SleepTool):
+        read_only = True
+
+        def __init__(self) -> None:
+            super().__init__()
+            self.calls = 0
+
+        async def execute(self, delay: float, text: str, **kwargs: Any) -> str:
+            self.calls += 1
+            return await super().execute(delay, text)
+
+    provider = ScriptedProvider([
+        LLMResponse(content=None, tool_calls=[
+            _tool_call("a", 0.01, "same"),
+            _tool_call("b", 0.01, "same"),
+            _tool_call("c", 0.01, "other"),
+        ]),
+        LLMResponse(content="done"),
+    ])
+    agent = AgentLoop(bus=MessageBus(), provider=provider, workspace=home / "ws")
+    tool = ReadOnlySleep()
+    agent.tools.register(tool)
+
+    await agent.process_direct("go")
+
+    assert tool.calls == 2
+    tool_msgs = [m for m in provider.calls[1] if m["role"] == "tool"]
+    assert [(m["tool_call_id"], m["content"]) for m in tool_msgs] == [
+        ("a", "same"), ("b", "same"), ("c", "other"),
+    ]
+
+
+async def test_repeated_identical_tool_rounds_stop_early(home: Path) -> None:
+    provider = ScriptedProvider([
+        LLMResponse(content=None, tool_calls=[_tool_call(f"id{i}", 0, "same")]) for i in range(5)
+    ])
+    agent = AgentLoop(bus=MessageBus(), provider=provider, workspace=home / "ws")
+    agent.tools.register(SleepTool())
+
+    reply = await agent.process_direct("go")
+
+    assert len(provider.calls) == 2
+    assert "repeating the same tool calls" in reply
+
+
+def test_file_tools_use_shared_tool_executor(home: Path) -> None:
+    agent = AgentLoop(bus=MessageBus(), provider=ScriptedProvider([]), workspace=home / "ws")
+
+    for name in ("read_file", "write_file", "edit_file", "list_dir"):
+        assert agent.tools.get(name)._executor is agent._tool_executor
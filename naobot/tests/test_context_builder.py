@@ -0,0 +1,62 @@
+import os
+from pathlib import Path
+
+from nanobot.agent.context import ContextBuilder
+
+
+def test_memory_context_cached_until_file_changes(tmp_path: Path) -> None:
+    builder = ContextBuilder(tmp_path)
+    calls = 0
+    original = builder.memory.get_memory_context
+
+    def counting(date: str | None = None) -> str:
+        nonlocal calls
+        calls += 1
+        return original(date)
+
+    builder.memory.get_memory_context = counting  # type: ignore[method-assign]
+
+    builder.memory.write_long_term("likes vim")
+    assert "likes vim" in builder.build_system_prompt()
+    assert "likes vim" in builder.build_system_prompt()
+    assert calls == 1
+
+    builder.memory.write_long_term("likes emacs and vim")
+    assert "likes emacs and vim" in builder.build_system_prompt()
+    assert calls == 2
+
+
+def test_media_is_inlined_and_missing_files_skipped(tmp_path: Path) -> None:
+    image = tmp_path / "cat.png"
+    image.write_bytes(b"\x89PNG fake")
+    builder = ContextBuilder(tmp_path)
+    content = builder._build_user_content("look", [str(image), str(tmp_path / "missing.png")])
+    assert len(content) == 2
+    assert content[0]["image_url"]["url"].startswith("data:image/png;base64,")
+
+
+def test_skill_edits_show_up_in_system_prompt(tmp_path: Path) -> None:
+    skill = tmp_path / "skills" / "notes" / "SKILL.md"
+    skill.parent.mkdir(parents=True)
+    skill.write_text("---\nname: notes\ndescription: first version\n---\n", encoding="utf-8")
+    builder = ContextBuilder(tmp_path)
+    assert "first version" in builder.build_system_prompt()
+
+    skill.write_text("---\nname: notes\ndescription: second version\n---\n", encoding="utf-8")
+    st = skill.stat()
+    os.utime(skill, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+
+    prompt = builder.build_system_prompt()
+    assert "second version" in prompt and "first version" not in prompt
+
+
+def test_current_time_is_sent_with_user_message(tmp_path: Path) -> None:
+    builder = ContextBuilder(tmp_path)
+    builder._current_time = lambda: "2026-01-01 09:00 (Thursday)"  # type: ignore[method-assign]
+    first = builder.build_messages([], "hi")
+    builder._current_time = lambda: "2026-01-01 09:01 (Thursday)"  # type: ignore[method-assign]
+    second = builder.build_messages([], "hi")
+
+    assert first[0] is second[0]
+    assert "09:0" not in first[0]["content"]
+    assert second[-1]["content"] == "[Current time: 2026-01-01 09:01 (Thursday)]\n\nhi"
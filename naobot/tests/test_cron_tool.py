@@ -0,0 +1,34 @@
+from pathlib import Path
+
+from nanobot.agent.tools.cron import CronTool
+from nanobot.cron.service import CronService
+
+
+async def test_list_output_is_reused_until_jobs_change(tmp_path: Path, monkeypatch) -> None:
+    service = CronService(tmp_path / "jobs.json")
+    tool = CronTool(service)
+    tool.set_context("cli", "direct")
+    calls = 0
+    original = service.list_jobs
+
+    def counting(*args, **kwargs):
+        nonlocal calls
+        calls += 1
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(service, "list_jobs", counting)
+
+    assert await tool.execute("list") == "No scheduled jobs."
+    assert await tool.execute("list") == "No scheduled jobs."
+    assert calls == 1
+
+    created = await tool.execute("add", message="stretch", every_seconds=60)
+    job_id = created.rsplit("id: ", 1)[1].rstrip(")")
+    listing = await tool.execute("list")
+    assert listing == f"Scheduled jobs:\n- stretch (id: {job_id}, every)"
+    assert await tool.execute("list") is listing
+    assert calls == 2
+
+    assert await tool.execute("remove", job_id=job_id) == f"Removed job {job_id}"
+    assert await tool.execute("list") == "No scheduled jobs."
+    assert calls == 3
@@ -0,0 +1,28 @@
+import asyncio
+from pathlib import Path
+
+from nanobot.agent.tools.shell import ExecTool
+
+
+async def test_cancelled_command_does_not_leave_children_running(tmp_path: Path) -> None:
+    marker = tmp_path / "orphan_marker"
+    tool = ExecTool(timeout=30, working_dir=str(tmp_path))
+
+    task = asyncio.create_task(tool.execute(f"sleep 0.5; touch {marker}"))
+    await asyncio.sleep(0.2)
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+    await asyncio.sleep(0.8)
+
+    assert not marker.exists()
+
+
+async def test_timed_out_command_is_killed(tmp_path: Path) -> None:
+    marker = tmp_path / "orphan_marker"
+    tool = ExecTool(timeout=0.2, working_dir=str(tmp_path))
+
+    result = await tool.execute(f"sleep 0.5; touch {marker}")
+    await asyncio.sleep(0.8)
+
+    assert result == "Error: Command timed out after 0.2 seconds"
+    assert not marker.exists()
@@ -0,0 +1,86 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from nanobot.agent.tools.filesystem import EditFileTool, ReadFileTool
+
+
+async def test_edit_file_replaces_single_occurrence_in_place(tmp_path: Path) -> None:
+    target = tmp_path / "config.txt"
+    target.write_text("name = old\nsize = 10\n", encoding="utf-8")
+    tool = EditFileTool()
+
+    assert await tool.execute(str(target), "old", "a much longer new value") == f"Successfully edited {target}"
+    assert target.read_text(encoding="utf-8") == "name = a much longer new value\nsize = 10\n"
+
+    assert await tool.execute(str(target), "a much longer new value", "x") == f"Successfully edited {target}"
+    assert target.read_text(encoding="utf-8") == "name = x\nsize = 10\n"
+
+
+async def test_edit_file_reports_missing_and_ambiguous_text(tmp_path: Path) -> None:
+    target = tmp_path / "notes.txt"
+    target.write_text("a a", encoding="utf-8")
+    tool = EditFileTool()
+
+    assert await tool.execute(str(tmp_path / "nope.txt"), "a", "b") == f"Error: File not found: {tmp_path / 'nope.txt'}"
+    assert (await tool.execute(str(target), "zzz", "b")).startswith("Error: old_text not found")
+    assert (await tool.execute(str(target), "a", "b")).startswith("Warning: old_text appears 2 times")
+    assert target.read_text(encoding="utf-8") == "a a"
+
+
+async def test_allowed_dir_check_respects_path_boundaries(tmp_path: Path) -> None:
+    allowed = tmp_path / "work"
+    sibling = tmp_path / "workspace-other"
+    allowed.mkdir()
+    sibling.mkdir()
+    (allowed / "ok.txt").write_text("inside", encoding="utf-8")
+    (sibling / "secret.txt").write_text("outside", encoding="utf-8")
+    tool = ReadFileTool(allowed_dir=allowed)
+
+    assert await tool.execute(str(allowed / "ok.txt")) == "inside"
+    result = await tool.execute(str(sibling / "secret.txt"))
+    assert result.startswith("Error: Path") and "outside allowed directory" in result
+
+
+async def test_read_file_reports_missing_file_and_directory(tmp_path: Path) -> None:
+    tool = ReadFileTool()
+
+    assert await tool.execute(str(tmp_path / "missing.txt")) == f"Error: File not found: {tmp_path / 'missing.txt'}"
+    assert await tool.execute(str(tmp_path)) == f"Error: Not a file: {tmp_path}"
+
+
+async def test_edit_file_rejects_empty_old_text(tmp_path: Path) -> None:
+    target = tmp_path / "notes.txt"
+    target.write_text("", encoding="utf-8")
+
+    assert await EditFileTool().execute(str(target), "", "x") == "Error: old_text must not be empty"
+    assert target.read_text(encoding="utf-8") == ""
+
+
+async def test_read_file_truncates_past_max_chars(tmp_path: Path) -> None:
+    target = tmp_path / "big.log"
+    target.write_text("line\r\n" * 10, encoding="utf-8")
+
+    assert await ReadFileTool(max_chars=100).execute(str(target)) == "line\n" * 10
+    assert await ReadFileTool(max_chars=12).execute(str(target)) == (
+        "line\nline\nli\n... (truncated, file is longer than 12 chars)"
+    )
+
+
+async def test_file_io_runs_on_injected_executor(tmp_path: Path, monkeypatch) -> None:
+    target = tmp_path / "a.txt"
+    target.write_text("hi", encoding="utf-8")
+    threads: list[str] = []
+    original = ReadFileTool._read
+
+    def recording(file_path: Path, max_chars: int) -> str:
+        threads.append(threading.current_thread().name)
+        return original(file_path, max_chars)
+
+    monkeypatch.setattr(ReadFileTool, "_read", staticmethod(recording))
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="nanobot-tool")
+    try:
+        assert await ReadFileTool(executor=executor).execute(str(target)) == "hi"
+    finally:
+        executor.shutdown()
+    assert threads and threads[0].startswith("nanobot-tool")
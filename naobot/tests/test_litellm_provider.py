@@ -0,0 +1,78 @@
+from types import SimpleNamespace
+
+from nanobot.providers import litellm_provider
+from nanobot.providers.base import LLMResponse, ToolCallRequest
+from nanobot.providers.litellm_provider import LiteLLMProvider
+
+
+def test_cache_control_marks_last_system_message_only() -> None:
+    messages = [
+        {"role": "system", "content": "static prefix"},
+        {"role": "user", "content": "hi"},
+    ]
+    marked = LiteLLMProvider._apply_cache_control(messages)
+
+    assert marked[0]["content"] == [
+        {"type": "text", "text": "static prefix", "cache_control": {"type": "ephemeral"}}
+    ]
+    assert marked[1] is messages[1]
+    assert messages[0]["content"] == "static prefix"
+
+
+def test_prompt_caching_only_for_supporting_providers() -> None:
+    provider = LiteLLMProvider(default_model="anthropic/claude-opus-4-5")
+    assert provider._supports_prompt_caching("anthropic/claude-opus-4-5")
+    assert not provider._supports_prompt_caching("deepseek-chat")
+
+
+def _chunk(content=None, tool_calls=None, finish_reason=None):
+    delta = SimpleNamespace(content=content, tool_calls=tool_calls)
+    return SimpleNamespace(choices=[SimpleNamespace(delta=delta, finish_reason=finish_reason)])
+
+
+def _tc_delta(index, call_id=None, name=None, arguments=None):
+    return SimpleNamespace(
+        index=index, id=call_id, function=SimpleNamespace(name=name, arguments=arguments)
+    )
+
+
+async def test_chat_stream_yields_tool_calls_as_they_close(monkeypatch) -> None:
+    chunks = [
+        _chunk(content="ok"),
+        _chunk(tool_calls=[_tc_delta(0, "a", "read_file", '{"path": ')]),
+        _chunk(tool_calls=[_tc_delta(0, arguments='"x"}')]),
+        _chunk(tool_calls=[_tc_delta(1, "b", "list_dir", "")]),
+        _chunk(finish_reason="tool_calls"),
+    ]
+
+    async def fake_acompletion(**kwargs):
+        assert kwargs["stream"] is True
+
+        async def gen():
+            for chunk in chunks:
+                yield chunk
+
+        return gen()
+
+    monkeypatch.setattr(litellm_provider, "acompletion", fake_acompletion)
+    provider = LiteLLMProvider(default_model="deepseek-chat")
+
+    events = [e async for e in provider.chat_stream([{"role": "user", "content": "hi"}])]
+
+    assert events[0] == ToolCallRequest(id="a", name="read_file", arguments={"path": "x"})
+    assert events[1] == ToolCallRequest(id="b", name="list_dir", arguments={})
+    final = events[2]
+    assert isinstance(final, LLMResponse)
+    assert final.content == "ok"
+    assert final.finish_reason == "tool_calls"
+    assert final.tool_calls == events[:2]
+
+
+def test_tool_call_keeps_raw_arguments_only_when_valid() -> None:
+    ok = LiteLLMProvider._make_tool_call("a", "read_file", '{"path": "x"}')
+    assert ok.arguments == {"path": "x"}
+    assert ok.raw_arguments == '{"path": "x"}'
+
+    bad = LiteLLMProvider._make_tool_call("b", "read_file", '{"path": ')
+    assert bad.arguments == {"raw": '{"path": '}
+    assert bad.raw_arguments is None
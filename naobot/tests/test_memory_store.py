@@ -0,0 +1,91 @@
+from pathlib import Path
+
+from nanobot.agent.memory import _MMAP_THRESHOLD, MemoryStore, _read_text
+
+
+def test_long_term_read_is_cached_until_file_changes(tmp_path: Path, monkeypatch) -> None:
+    store = MemoryStore(tmp_path)
+    store.write_long_term("likes vim")
+    reads: list[Path] = []
+    original = Path.read_bytes
+
+    def counting(self: Path) -> bytes:
+        reads.append(self)
+        return original(self)
+
+    monkeypatch.setattr(Path, "read_bytes", counting)
+
+    assert store.read_long_term() == "likes vim"
+    assert store.read_long_term() == "likes vim"
+    assert len(reads) == 1
+
+    store.write_long_term("likes emacs")
+    assert store.read_long_term() == "likes emacs"
+
+
+def test_append_today_adds_header_once(tmp_path: Path) -> None:
+    store = MemoryStore(tmp_path)
+    assert store.read_today() == ""
+    store.append_today("- first")
+    store.append_today("- second")
+
+    text = store.read_today()
+    assert text.startswith("# ")
+    assert text.count("# ") == 1
+    assert text.endswith("- first\n- second")
+
+
+def test_list_memory_files_only_returns_daily_notes_newest_first(tmp_path: Path) -> None:
+    store = MemoryStore(tmp_path)
+    for name in ("2026-01-02.md", "2026-01-10.md", "MEMORY.md", "2026-1-3.md", "notes.md"):
+        (store.memory_dir / name).write_text("x", encoding="utf-8")
+
+    assert [p.name for p in store.list_memory_files()] == ["2026-01-10.md", "2026-01-02.md"]
+
+
+def test_iter_memory_files_matches_unsorted_listing(tmp_path: Path) -> None:
+    store = MemoryStore(tmp_path)
+    for name in ("2026-01-02.md", "2026-01-10.md", "MEMORY.md"):
+        (store.memory_dir / name).write_text("x", encoding="utf-8")
+
+    assert sorted(store.iter_memory_files()) == sorted(store.list_memory_files(sort=False))
+    assert len(store.list_memory_files(sort=False)) == 2
+
+
+def test_recent_memories_reads_only_existing_days(tmp_path: Path) -> None:
+    from datetime import date, timedelta
+
+    store = MemoryStore(tmp_path)
+    today = date.today()
+    for offset, text in ((0, "today"), (2, "two days ago"), (9, "too old")):
+        day = (today - timedelta(days=offset)).strftime("%Y-%m-%d")
+        (store.memory_dir / f"{day}.md").write_text(text, encoding="utf-8")
+
+    assert store.get_recent_memories(days=7) == "today\n\n---\n\ntwo days ago"
+
+
+def test_large_long_term_memory_round_trips(tmp_path: Path) -> None:
+    store = MemoryStore(tmp_path)
+    text = "记忆 line\n" * 20000
+    store.write_long_term(text)
+    assert store.read_long_term() == text
+
+
+def test_crlf_notes_are_normalized(tmp_path: Path) -> None:
+    store = MemoryStore(tmp_path)
+    store.memory_file.write_bytes(b"a\r\nb\r\n")
+    assert store.read_long_term() == "a\nb\n"
+
+
+def test_memory_context_uses_given_date(tmp_path: Path) -> None:
+    store = MemoryStore(tmp_path)
+    (store.memory_dir / "2020-01-02.md").write_text("old note", encoding="utf-8")
+
+    assert store.get_memory_context("2020-01-02") == "## Today's Notes\nold note"
+
+
+def test_read_text_handles_file_truncated_after_stat(tmp_path: Path) -> None:
+    path = tmp_path / "MEMORY.md"
+    path.write_text("", encoding="utf-8")
+
+    assert _read_text(path, _MMAP_THRESHOLD) == ""
@@ -0,0 +1,65 @@
+import asyncio
+from pathlib import Path
+
+import pytest
+
+from nanobot.session.manager import SessionManager
+
+
+@pytest.fixture
+def manager(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> SessionManager:
+    monkeypatch.setenv("HOME", str(tmp_path))
+    return SessionManager(tmp_path / "ws", cache_size=1, flush_delay=0.05)
+
+
+def test_save_without_event_loop_writes_immediately(manager: SessionManager) -> None:
+    session = manager.get_or_create("cli:a")
+    session.add_message("user", "hi")
+    manager.save(session)
+
+    assert manager._get_session_path("cli:a").read_text().count("\n") == 2
+
+
+async def test_saves_in_event_loop_are_coalesced(manager: SessionManager) -> None:
+    session = manager.get_or_create("cli:a")
+    writes: list[str] = []
+    original = manager._write
+
+    def counting(key: str, data: str, seq: int) -> None:
+        writes.append(key)
+        original(key, data, seq)
+
+    manager._write = counting  # type: ignore[method-assign]
+    for text in ("one", "two", "three"):
+        session.add_message("user", text)
+        manager.save(session)
+    assert not manager._get_session_path("cli:a").exists()
+
+    await asyncio.sleep(0.2)
+    assert writes == ["cli:a"]
+    assert "three" in manager._get_session_path("cli:a").read_text()
+
+
+async def test_evicted_dirty_session_is_not_reloaded_stale(manager: SessionManager) -> None:
+    first = manager.get_or_create("cli:a")
+    first.add_message("user", "kept")
+    manager.save(first)
+    manager.get_or_create("cli:b")
+
+    assert manager.get_or_create("cli:a") is first
+    manager.flush()
+    assert "kept" in manager._get_session_path("cli:a").read_text()
+
+
+async def test_older_snapshot_does_not_overwrite_newer_flush(manager: SessionManager) -> None:
+    session = manager.get_or_create("cli:a")
+    session.add_message("user", "old")
+    manager.save(session)
+    stale = manager._take_dirty()
+
+    session.add_message("user", "new")
+    manager.save(session)
+    manager.flush()
+    manager._write_many(stale)
+
+    assert "new" in manager._get_session_path("cli:a").read_text()
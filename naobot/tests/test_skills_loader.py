@@ -0,0 +1,178 @@
+import os
+from pathlib import Path
+
+import pytest
+
+from nanobot.agent import skills as skills_module
+from nanobot.agent.skills import SkillsLoader
+
+
+def _write_skill(root: Path, name: str, frontmatter: str, body: str = "# Body\n") -> Path:
+    path = root / "skills" / name / "SKILL.md"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(f"---\n{frontmatter}\n---\n\n{body}", encoding="utf-8")
+    return path
+
+
+@pytest.fixture
+def loader(tmp_path: Path) -> SkillsLoader:
+    return SkillsLoader(tmp_path, builtin_skills_dir=tmp_path / "builtin")
+
+
+@pytest.mark.skipif(skills_module.yaml is None, reason="PyYAML not installed")
+def test_nested_yaml_metadata_is_read(tmp_path: Path, loader: SkillsLoader) -> None:
+    _write_skill(tmp_path, "deploy", (
+        "name: deploy\n"
+        "description: Ship it\n"
+        "metadata:\n"
+        "  nanobot:\n"
+        "    always: true\n"
+        "    requires:\n"
+        "      bins: [definitely-not-a-real-binary]"
+    ))
+
+    assert loader._get_skill_meta("deploy")["requires"]["bins"] == ["definitely-not-a-real-binary"]
+    assert loader.list_skills() == []
+    assert loader.get_always_skills() == []
+
+
+def test_single_line_json_metadata_still_works(tmp_path: Path, loader: SkillsLoader) -> None:
+    _write_skill(tmp_path, "notes", 'name: notes\nmetadata: {"nanobot":{"always":true}}')
+
+    assert loader.get_always_skills() == ["notes"]
+
+
+def test_metadata_cached_until_file_changes(
+    tmp_path: Path, loader: SkillsLoader, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    path = _write_skill(tmp_path, "notes", "name: notes\ndescription: first")
+    reads = 0
+    original = Path.read_text
+
+    def counting(self: Path, *args, **kwargs) -> str:
+        nonlocal reads
+        reads += 1
+        return original(self, *args, **kwargs)
+
+    monkeypatch.setattr(Path, "read_text", counting)
+
+    assert loader.get_skill_metadata("notes")["description"] == "first"
+    assert loader.get_skill_metadata("notes")["description"] == "first"
+    assert reads == 1
+
+    path.write_text("---\nname: notes\ndescription: second\n---\n", encoding="utf-8")
+    st = path.stat()
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    assert loader.get_skill_metadata("notes")["description"] == "second"
+    assert reads == 2
+
+
+def test_which_lookups_are_memoized(
+    tmp_path: Path, loader: SkillsLoader, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    _write_skill(tmp_path, "gh", 'name: gh\nmetadata: {"nanobot":{"requires":{"bins":["gh"]}}}')
+    lookups: list[str] = []
+
+    def fake_which(name: str) -> str | None:
+        lookups.append(name)
+        return None
+
+    monkeypatch.setattr(skills_module.shutil, "which", fake_which)
+
+    assert loader.list_skills() == []
+    assert "gh" in loader.build_skills_summary()
+    assert lookups == ["gh"]
+
+    loader.invalidate_which_cache()
+    loader.list_skills()
+    assert lookups == ["gh", "gh"]
+
+
+def test_summary_reads_each_skill_file_once(
+    tmp_path: Path, loader: SkillsLoader, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    _write_skill(tmp_path, "a", "name: a\ndescription: first <skill>")
+    _write_skill(tmp_path, "b", 'name: b\nmetadata: {"nanobot":{"requires":{"env":["NANOBOT_TEST_UNSET"]}}}')
+    monkeypatch.delenv("NANOBOT_TEST_UNSET", raising=False)
+    reads: list[str] = []
+    original = Path.read_text
+
+    def counting(self: Path, *args, **kwargs) -> str:
+        reads.append(self.parent.name)
+        return original(self, *args, **kwargs)
+
+    monkeypatch.setattr(Path, "read_text", counting)
+
+    summary = loader.build_skills_summary()
+
+    assert sorted(reads) == ["a", "b"]
+    assert "<description>first &lt;skill&gt;</description>" in summary
+    assert '<skill available="false">' in summary
+    assert "<requires>ENV: NANOBOT_TEST_UNSET</requires>" in summary
+
+
+def test_workspace_skill_shadows_builtin(tmp_path: Path) -> None:
+    builtin = tmp_path / "builtin"
+    _write_skill(tmp_path, "notes", "name: notes")
+    for name in ("notes", "other"):
+        (builtin / name).mkdir(parents=True)
+        (builtin / name / "SKILL.md").write_text("---\nname: x\n---\n", encoding="utf-8")
+    (builtin / "stray.md").write_text("not a skill", encoding="utf-8")
+
+    loader = SkillsLoader(tmp_path, builtin_skills_dir=builtin)
+    found = sorted((s["name"], s["source"]) for s in loader.list_skills())
+
+    assert found == [("notes", "workspace"), ("other", "builtin")]
+
+
+def test_load_skills_for_context_strips_frontmatter(tmp_path: Path, loader: SkillsLoader) -> None:
+    _write_skill(tmp_path, "notes", "name: notes\ndescription: d", body="# Notes\nbody")
+
+    assert loader.load_skills_for_context(["notes", "missing"]) == "### Skill: notes\n\n# Notes\nbody"
+
+
+def test_skill_text_shared_between_load_and_metadata(
+    tmp_path: Path, loader: SkillsLoader, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    _write_skill(tmp_path, "notes", "name: notes\ndescription: d")
+    reads = 0
+    original = Path.read_text
+
+    def counting(self: Path, *args, **kwargs) -> str:
+        nonlocal reads
+        reads += 1
+        return original(self, *args, **kwargs)
+
+    monkeypatch.setattr(Path, "read_text", counting)
+
+    for _ in range(3):
+        assert "# Body" in loader.load_skill("notes")
+        assert loader.get_skill_metadata("notes")["description"] == "d"
+    assert reads == 1
+
+
+def test_load_skills_for_context_keeps_requested_order(tmp_path: Path, loader: SkillsLoader) -> None:
+    for name in ("a", "b", "c"):
+        _write_skill(tmp_path, name, f"name: {name}", body=f"body {name}")
+
+    content = loader.load_skills_for_context(["c", "missing", "a", "b"])
+
+    assert content.split("\n\n---\n\n") == [
+        "### Skill: c\n\nbody c", "### Skill: a\n\nbody a", "### Skill: b\n\nbody b",
+    ]
+
+
+def test_fallback_parser_without_yaml(tmp_path: Path, loader: SkillsLoader, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(skills_module, "yaml", None)
+    _write_skill(tmp_path, "web", (
+        'name: web\n'
+        'description: "Fetch pages: fast"\n'
+        'homepage: https://example.com/:help\n'
+        'metadata: {"nanobot":{"requires":{"env":["HOME"]}}}'
+    ))
+
+    meta = loader.get_skill_metadata("web")
+
+    assert meta["description"] == "Fetch pages: fast"
+    assert meta["homepage"] == "https://example.com/:help"
+    assert loader._get_skill_meta("web") == {"requires": {"env": ["HOME"]}}
@@ -0,0 +1,256 @@
+import asyncio
+from pathlib import Path
+from typing import Any
+
+from nanobot.agent.subagent import SubagentManager
+from nanobot.bus.queue import MessageBus
+from nanobot.providers.base import LLMProvider, LLMResponse, ToolCallRequest
+
+
+class ScriptedProvider(LLMProvider):
+    def __init__(self, responses: list[LLMResponse]):
+        super().__init__()
+        self.responses = list(responses)
+        self.calls: list[dict[str, Any]] = []
+
+    async def chat(self, messages, tools=None, model=None, **kwargs):
+        self.calls.append({"messages": list(messages), "tools": tools})
+        return self.responses.pop(0)
+
+    def get_default_model(self) -> str:
+        return "test-model"
+
+
+async def _wait_done(manager: SubagentManager) -> None:
+    while manager.get_running_count():
+        await asyncio.sleep(0.01)
+
+
+async def test_subagents_share_tool_definitions(tmp_path: Path) -> None:
+    (tmp_path / "note.txt").write_text("hello", encoding="utf-8")
+    provider = ScriptedProvider([
+        LLMResponse(content=None, tool_calls=[
+            ToolCallRequest(id="r1", name="read_file", arguments={"path": str(tmp_path / "note.txt")}),
+        ]),
+        LLMResponse(content="read it"),
+        LLMResponse(content="second"),
+    ])
+    bus = MessageBus()
+    manager = SubagentManager(provider=provider, workspace=tmp_path, bus=bus)
+
+    await manager.spawn("read the note", origin_channel="telegram", origin_chat_id="42")
+    await _wait_done(manager)
+    await manager.spawn("another task")
+    await _wait_done(manager)
+
+    assert provider.calls[0]["tools"] is provider.calls[2]["tools"]
+    tool_msg = provider.calls[1]["messages"][-1]
+    assert (tool_msg["role"], tool_msg["content"]) == ("tool", "hello")
+
+    first = await bus.consume_inbound()
+    assert (first.channel, first.chat_id) == ("system", "telegram:42")
+    assert "read it" in first.content
+
+
+async def test_read_only_tool_calls_run_concurrently(tmp_path: Path) -> None:
+    for i in range(3):
+        (tmp_path / f"d{i}").mkdir()
+    calls = [
+        ToolCallRequest(id=str(i), name="list_dir", arguments={"path": str(tmp_path / f"d{i}")}) for i in range(3)
+    ] + [ToolCallRequest(id="w", name="write_file", arguments={"path": str(tmp_path / "out.txt"), "content": "x"})]
+    provider = ScriptedProvider([LLMResponse(content=None, tool_calls=calls), LLMResponse(content="done")])
+    manager = SubagentManager(provider=provider, workspace=tmp_path, bus=MessageBus())
+
+    running = 0
+    peak = 0
+    original = manager._tools.execute
+
+    async def tracking(name: str, params: dict[str, Any]) -> str:
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.02)
+        running -= 1
+        return await original(name, params)
+
+    manager._tools.execute = tracking  # type: ignore[method-assign]
+
+    await manager.spawn("list things")
+    await _wait_done(manager)
+
+    assert peak == 3
+    tool_msgs = [m for m in provider.calls[1]["messages"] if m["role"] == "tool"]
+    assert [m["tool_call_id"] for m in tool_msgs] == ["0", "1", "2", "w"]
+    assert (tmp_path / "out.txt").read_text() == "x"
+
+
+async def test_spawn_respects_concurrency_limit(tmp_path: Path) -> None:
+    class SlowProvider(ScriptedProvider):
+        def __init__(self) -> None:
+            super().__init__([])
+            self.running = 0
+            self.peak = 0
+
+        async def chat(self, messages, tools=None, model=None, **kwargs):
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+            await asyncio.sleep(0.02)
+            self.running -= 1
+            return LLMResponse(content="ok")
+
+    provider = SlowProvider()
+    manager = SubagentManager(provider=provider, workspace=tmp_path, bus=MessageBus(), max_concurrent=2)
+
+    for i in range(5):
+        await manager.spawn(f"task {i}")
+    await asyncio.sleep(0)
+    assert manager.get_queued_count() == 3
+    await _wait_done(manager)
+
+    assert provider.peak == 2
+
+
+async def test_stuck_subagent_is_reaped_and_reported(tmp_path: Path) -> None:
+    class HangingProvider(ScriptedProvider):
+        async def chat(self, messages, tools=None, model=None, **kwargs):
+            await asyncio.sleep(10)
+
+    bus = MessageBus()
+    manager = SubagentManager(
+        provider=HangingProvider([]), workspace=tmp_path, bus=bus,
+        max_runtime=0.05, reap_interval=0.01,
+    )
+
+    await manager.spawn("hang forever", origin_channel="cli", origin_chat_id="c")
+    msg = await asyncio.wait_for(bus.consume_inbound(), timeout=1)
+    await _wait_done(manager)
+
+    assert msg.chat_id == "cli:c"
+    assert "time limit" in msg.content
+
+
+async def test_tool_timeout_is_returned_to_llm(tmp_path: Path, monkeypatch) -> None:
+    from nanobot.agent import subagent as subagent_module
+    from nanobot.config.schema import ExecToolConfig
+
+    monkeypatch.setattr(subagent_module, "EXEC_TIMEOUT_GRACE", 0.1)
+
+    provider = ScriptedProvider([
+        LLMResponse(content=None, tool_calls=[
+            ToolCallRequest(id="x", name="exec", arguments={"command": "sleep 5"}),
+        ]),
+        LLMResponse(content="gave up"),
+    ])
+    bus = MessageBus()
+    manager = SubagentManager(
+        provider=provider, workspace=tmp_path, bus=bus, exec_config=ExecToolConfig.model_construct(timeout=0.1),
+    )
+
+    async def slow_execute(name: str, params: dict[str, Any]) -> str:
+        await asyncio.sleep(5)
+        return "never"
+
+    manager._tools.execute = slow_execute  # type: ignore[method-assign]
+
+    await manager.spawn("run something slow")
+    await _wait_done(manager)
+
+    tool_msg = provider.calls[1]["messages"][-1]
+    assert tool_msg["content"] == "Error: Tool 'exec' timed out after 0.2s"
+    assert "gave up" in (await bus.consume_inbound()).content
+
+
+async def test_long_tool_results_are_truncated(tmp_path: Path) -> None:
+    (tmp_path / "big.txt").write_text("x" * 100, encoding="utf-8")
+    provider = ScriptedProvider([
+        LLMResponse(content=None, tool_calls=[
+            ToolCallRequest(id="r", name="read_file", arguments={"path": str(tmp_path / "big.txt")}),
+        ]),
+        LLMResponse(content="done"),
+    ])
+    manager = SubagentManager(
+        provider=provider, workspace=tmp_path, bus=MessageBus(), max_tool_result_chars=10,
+    )
+
+    await manager.spawn("read big file")
+    await _wait_done(manager)
+
+    assert provider.calls[1]["messages"][-1]["content"] == "x" * 10 + "\n... (truncated, 90 more chars)"
+
+
+def test_subagent_tools_use_the_agent_executor(tmp_path: Path, monkeypatch) -> None:
+    from nanobot.agent.loop import AgentLoop
+
+    monkeypatch.setenv("HOME", str(tmp_path / "home"))
+    agent = AgentLoop(bus=MessageBus(), provider=ScriptedProvider([]), workspace=tmp_path)
+
+    assert agent.subagents._tools._executor is agent._tool_executor
+
+
+async def test_aclose_cancels_running_subagents(tmp_path: Path) -> None:
+    class HangingProvider(ScriptedProvider):
+        async def chat(self, messages, tools=None, model=None, **kwargs):
+            await asyncio.sleep(10)
+
+    manager = SubagentManager(provider=HangingProvider([]), workspace=tmp_path, bus=MessageBus())
+    await manager.spawn("hang", label="stuck")
+    await asyncio.sleep(0)
+    assert [t.get_name() for t in asyncio.all_tasks() if t.get_name().startswith("subagent:")]
+
+    await asyncio.wait_for(manager.aclose(), timeout=0.5)
+
+    assert manager.get_running_count() == 0
+
+
+async def test_repeated_reads_reuse_cached_result_until_a_write(tmp_path: Path) -> None:
+    note = str(tmp_path / "note.txt")
+    (tmp_path / "note.txt").write_text("v1", encoding="utf-8")
+
+    def read(call_id: str) -> ToolCallRequest:
+        return ToolCallRequest(id=call_id, name="read_file", arguments={"path": note})
+
+    provider = ScriptedProvider([
+        LLMResponse(content=None, tool_calls=[read("a"), read("b")]),
+        LLMResponse(content=None, tool_calls=[read("c")]),
+        LLMResponse(content=None, tool_calls=[
+            ToolCallRequest(id="w", name="write_file", arguments={"path": note, "content": "v2"}),
+        ]),
+        LLMResponse(content=None, tool_calls=[read("d")]),
+        LLMResponse(content="done"),
+    ])
+    manager = SubagentManager(provider=provider, workspace=tmp_path, bus=MessageBus())
+    executed: list[str] = []
+    original = manager._tools.execute
+
+    async def counting(name: str, params: dict[str, Any]) -> str:
+        executed.append(name)
+        return await original(name, params)
+
+    manager._tools.execute = counting  # type: ignore[method-assign]
+
+    await manager.spawn("read twice")
+    await _wait_done(manager)
+
+    assert executed == ["read_file", "write_file", "read_file"]
+    tool_msgs = [m for m in provider.calls[-1]["messages"] if m["role"] == "tool"]
+    assert [m["content"] for m in tool_msgs if m["name"] == "read_file"] == ["v1", "v1", "v1", "v2"]
+
+
+async def test_reads_after_a_write_in_the_same_round_see_new_content(tmp_path: Path) -> None:
+    note = str(tmp_path / "note.txt")
+    (tmp_path / "note.txt").write_text("v1", encoding="utf-8")
+    provider = ScriptedProvider([
+        LLMResponse(content=None, tool_calls=[
+            ToolCallRequest(id="r1", name="read_file", arguments={"path": note}),
+            ToolCallRequest(id="w", name="write_file", arguments={"path": note, "content": "v2"}),
+            ToolCallRequest(id="r2", name="read_file", arguments={"path": note}),
+        ]),
+        LLMResponse(content="done"),
+    ])
+    manager = SubagentManager(provider=provider, workspace=tmp_path, bus=MessageBus())
+
+    await manager.spawn("edit then read")
+    await _wait_done(manager)
+
+    tool_msgs = [m for m in provider.calls[1]["messages"] if m["role"] == "tool"]
+    assert [m["content"] for m in tool_msgs if m["name"] == "read_file"] == ["v1", "v2"]
@@ -1,5 +1,9 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any
 
+import pytest
+
 from nanobot.agent.tools.base import Tool
 from nanobot.agent.tools.registry import ToolRegistry
 
@@ -86,3 +90,136 @@ async def test_registry_returns_validation_error() -> None:
     reg.register(SampleTool())
     result = await reg.execute("sample", {"query": "hi"})
     assert "Invalid parameters" in result
+
+
+def test_registry_definitions_cached_until_registration_changes() -> None:
+    reg = ToolRegistry()
+    reg.register(SampleTool())
+    first = reg.get_definitions()
+    assert reg.get_definitions() is first
+
+    reg.unregister("sample")
+    assert reg.get_definitions() == []
+
+
+async def test_registry_runs_sync_tools_in_executor() -> None:
+    class SyncTool(SampleTool):
+        def execute(self, **kwargs: Any) -> str:  # type: ignore[override]
+            return threading.current_thread().name
+
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="tool-pool")
+    reg = ToolRegistry(executor=executor)
+    reg.register(SyncTool())
+    try:
+        result = await reg.execute("sample", {"query": "hi", "count": 2})
+    finally:
+        executor.shutdown()
+    assert result.startswith("tool-pool")
+
+
+def test_to_schema_is_cached_per_class() -> None:
+    tool = SampleTool()
+    assert tool.to_schema() is tool.to_schema()
+    assert tool.to_schema()["function"]["name"] == "sample"
+    assert SampleTool().to_schema() is tool.to_schema()
+
+    class NamedTool(SampleTool):
+        def __init__(self, tool_name: str) -> None:
+            self._tool_name = tool_name
+
+        @property
+        def name(self) -> str:
+            return self._tool_name
+
+        def _schema_cache_key(self) -> Any:
+            return (type(self), self._tool_name)
+
+    assert NamedTool("a").to_schema()["function"]["name"] == "a"
+    assert NamedTool("b").to_schema()["function"]["name"] == "b"
+
+
+def test_validate_params_does_not_apply_defaults() -> None:
+    class DefaultTool(SampleTool):
+        @property
+        def parameters(self) -> dict[str, Any]:
+            return {"type": "object", "properties": {"mode": {"type": "string", "default": "fast"}}}
+
+    params: dict[str, Any] = {}
+    assert DefaultTool().validate_params(params) == []
+    assert params == {}
+
+
+def test_compiled_validator_is_shared_per_class() -> None:
+    from nanobot.agent.tools import base
+
+    first, second = SampleTool(), SampleTool()
+    assert first.validate_params({"query": "hi", "count": 2}) == []
+    assert second.validate_params({"query": "hi", "count": 0}) == ["count must be >= 1"]
+
+    assert SampleTool in Tool._validators
+    assert (Tool._validators[SampleTool] is None) == (base.fastjsonschema is None)
+
+
+def test_validate_params_skips_unconstrained_schema(monkeypatch) -> None:
+    class LooseTool(SampleTool):
+        parameters = {"type": "object"}
+
+    tool = LooseTool()
+    monkeypatch.setattr(tool, "_validate", lambda *a: ["should not run"])
+
+    assert tool.validate_params({"anything": 1}) == []
+
+
+def test_validate_handles_nesting_deeper_than_recursion_limit() -> None:
+    import sys
+
+    depth = sys.getrecursionlimit() + 100
+    schema: dict[str, Any] = {"type": "integer"}
+    value: Any = "deep"
+    for _ in range(depth):
+        schema = {"type": "array", "items": schema}
+        value = [value]
+
+    errors = SampleTool()._validate(value, schema, "")
+
+    assert errors == ["[0]" * depth + " should be integer"]
+
+
+def test_validate_params_uses_msgspec_struct_when_declared() -> None:
+    msgspec = pytest.importorskip("msgspec")
+
+    class SampleArgs(msgspec.Struct):
+        query: str
+        count: int
+
+    class StructTool(SampleTool):
+        struct_type = SampleArgs
+
+    tool = StructTool()
+    assert tool.validate_params({"query": "hi", "count": 3, "extra": True}) == []
+    errors = tool.validate_params({"query": "hi", "count": "3"})
+    assert len(errors) == 1 and "count" in errors[0]
+
+
+def test_compiled_validator_rejects_integral_float_for_integer() -> None:
+    tool = SampleTool()
+    assert tool.validate_params({"query": "hi", "count": 2.0}) == ["count should be integer"]
+
+
+def test_compiled_validator_follows_schema_cache_key() -> None:
+    class LimitTool(SampleTool):
+        __slots__ = ("limit",)
+
+        def __init__(self, limit: int) -> None:
+            self.limit = limit
+
+        @property
+        def parameters(self) -> dict[str, Any]:
+            return {"type": "object", "properties": {"count": {"type": "integer", "maximum": self.limit}}}
+
+        def _schema_cache_key(self) -> Any:
+            return (type(self), self.limit)
+
+    assert LimitTool(5).validate_params({"count": 4}) == []
+    assert LimitTool(3).validate_params({"count": 4}) == ["count must be <= 3"]
+    assert (LimitTool, 5) in Tool._validators and (LimitTool, 3) in Tool._validators